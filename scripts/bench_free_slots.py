@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Free-slot search benchmark for scheduling_service.
+
+Computes a year of free slots for one doctor with a realistic weekly schedule
+and a densely booked calendar, and reports the time per search for:
+
+  sweep   app.core.slots.find_free_slots (one pass over sorted intervals)
+  naive   every candidate slot checked against every appointment, day by day,
+          i.e. what clients had to emulate with POST-until-no-409
+
+Modes:
+  (default)  pure in-process computation, no database needed
+  --url URL  time GET /api/v1/availability/doctors/{id}/slots on a running
+             deployment (the doctor must already have availability/appointments)
+
+Example:
+  python scripts/bench_free_slots.py --days 365 --appointments 8000
+  python scripts/bench_free_slots.py --url http://localhost:8003 --doctor-id <uuid>
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent / "services" / "scheduling_service"
+UTC = timezone.utc
+
+
+def build_calendar(days: int, appointments: int, seed: int = 7):
+    # Saturday..Wednesday, morning and afternoon shifts (day_of_week: 0=Sunday)
+    rules = [(d, dtime(8), dtime(12)) for d in (6, 0, 1, 2, 3)]
+    rules += [(d, dtime(14), dtime(19)) for d in (6, 0, 1, 2, 3)]
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    end = start + timedelta(days=days)
+
+    rng = random.Random(seed)
+    busy = []
+    for _ in range(appointments):
+        day = start + timedelta(days=rng.randrange(days))
+        slot_start = day.replace(hour=rng.choice([8, 9, 10, 11, 14, 15, 16, 17, 18]), minute=rng.choice([0, 15, 30, 45]))
+        busy.append((slot_start, slot_start + timedelta(minutes=rng.choice([15, 30, 45]))))
+    busy.sort()
+    return rules, busy, start, end
+
+
+def naive_free_slots(rules, busy, start, end, duration, tz):
+    from app.core.slots import spec_day_of_week
+
+    slots = []
+    day = start.date()
+    while day < end.date():
+        for dow, rule_start, rule_end in rules:
+            if dow != spec_day_of_week(day):
+                continue
+            candidate = datetime.combine(day, rule_start, tzinfo=tz)
+            rule_end_dt = datetime.combine(day, rule_end, tzinfo=tz)
+            while candidate + duration <= rule_end_dt:
+                candidate_end = candidate + duration
+                if not any(b_start < candidate_end and b_end > candidate for b_start, b_end in busy):
+                    slots.append((candidate, candidate_end))
+                candidate = candidate_end
+        day += timedelta(days=1)
+    return slots
+
+
+def time_it(fn, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, samples
+
+
+def bench_in_process(days: int, appointments: int, duration_min: int, repeat: int, include_naive: bool) -> None:
+    sys.path.insert(0, str(SERVICE_ROOT))
+    from app.core.slots import find_free_slots
+
+    rules, busy, start, end = build_calendar(days, appointments)
+    duration = timedelta(minutes=duration_min)
+
+    slots, samples = time_it(lambda: find_free_slots(rules, busy, start, end, duration, UTC), repeat)
+    print(f"range={days}d appointments={len(busy)} duration={duration_min}min -> {len(slots)} free slots")
+    print(f"sweep: median {statistics.median(samples) * 1000:.1f} ms  min {min(samples) * 1000:.1f} ms")
+
+    if include_naive:
+        naive_slots, naive_samples = time_it(lambda: naive_free_slots(rules, busy, start, end, duration, UTC), 1)
+        print(f"naive: {naive_samples[0] * 1000:.1f} ms (aligned-grid candidates, {len(naive_slots)} slots)")
+
+
+def bench_remote(url: str, doctor_id: str, days: int, duration_min: int, repeat: int) -> None:
+    start = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    params = {
+        "from": start.isoformat(),
+        "to": (start + timedelta(days=days)).isoformat(),
+        "duration": duration_min,
+    }
+    samples = []
+    with httpx.Client(base_url=url, timeout=60) as client:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            resp = client.get(f"/api/v1/availability/doctors/{doctor_id}/slots", params=params)
+            samples.append(time.perf_counter() - started)
+            resp.raise_for_status()
+    print(f"GET slots over {days}d -> {len(resp.json())} slots")
+    print(f"median {statistics.median(samples) * 1000:.1f} ms  max {max(samples) * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--appointments", type=int, default=8000)
+    parser.add_argument("--duration", type=int, default=15, help="slot length in minutes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-naive", action="store_true", help="skip the slow baseline")
+    parser.add_argument("--url", help="Benchmark a running scheduling_service instead")
+    parser.add_argument("--doctor-id", help="Doctor to query in --url mode")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.doctor_id:
+            parser.error("--doctor-id is required with --url")
+        bench_remote(args.url, args.doctor_id, args.days, args.duration, args.repeat)
+    else:
+        bench_in_process(args.days, args.appointments, args.duration, args.repeat, not args.skip_naive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Large upload benchmark for pacs_service.
+
+Sends a generated multipart/form-data body (default 2 GiB) through the study
+upload path into MinIO and reports throughput and the process's peak RSS.
+
+Modes:
+  --mode buffered   spool the file to a temporary file, then upload_fileobj
+                    (behaviour before streaming uploads)
+  --mode streaming  parse the body as it arrives and push S3 multipart parts
+                    from worker threads (app.core.streaming_upload)
+  --url URL         POST /api/v1/studies/ on a running deployment instead; the
+                    server's memory has to be watched separately (docker stats)
+
+Example (in-process, needs MinIO):
+  MINIO_ENDPOINT_URL=http://localhost:9000 MINIO_ROOT_USER=minioadmin MINIO_ROOT_PASSWORD=minioadmin \\
+  python scripts/bench_pacs_upload.py --mode buffered
+  ... --mode streaming --part-size-mb 16 --parallel 8
+  python scripts/bench_pacs_upload.py --url https://pacs.example.com --token "$TOKEN"
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent / "services" / "pacs_service"
+BUCKET = "pacs-bench"
+BOUNDARY = "bench-" + uuid.uuid4().hex
+CHUNK = 64 * 1024
+MIB = 1024 * 1024
+
+FIELDS = {
+    "patient_full_name": "Bench Patient",
+    "patient_national_id": "0000000000",
+    "patient_phone_number": "09120000000",
+    "study_description": "upload benchmark",
+}
+
+
+def form_body(size: int):
+    """A multipart body with the study fields and a ``size`` byte image, in chunks."""
+    head = "".join(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in FIELDS.items()
+    )
+    head += (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="image_file"; filename="bench.dcm"\r\n'
+        "Content-Type: application/dicom\r\n\r\n"
+    )
+    yield head.encode()
+    # One random block repeated: generating 2 GiB of randomness would dominate the run
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        piece = block[: min(CHUNK, size - sent)]
+        sent += len(piece)
+        yield piece
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def async_body(size: int):
+    for chunk in form_body(size):
+        yield chunk
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def upload_buffered(s3, size: int) -> None:
+    from starlette.datastructures import Headers
+    from starlette.formparsers import MultiPartParser
+
+    headers = Headers({"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+    form = await MultiPartParser(headers, async_body(size)).parse()
+    image = form["image_file"]
+    await image.seek(0)
+    s3.upload_fileobj(image.file, BUCKET, f"{uuid.uuid4()}_bench.dcm")
+    await form.close()
+
+
+async def upload_streaming(s3, size: int, part_size: int, parallel: int) -> None:
+    from app.core.streaming_upload import MultipartUploadWriter, stream_form
+
+    content_type = f"multipart/form-data; boundary={BOUNDARY}"
+    writer = None
+    async for kind, value in stream_form(async_body(size), content_type, max_field_size=64 * 1024):
+        if kind == "file":
+            writer = MultipartUploadWriter(
+                s3,
+                BUCKET,
+                f"{uuid.uuid4()}_bench.dcm",
+                content_type=value.content_type,
+                part_size=part_size,
+                max_parallel=parallel,
+            )
+            await writer.start()
+        elif kind == "data":
+            await writer.write(value)
+        elif kind == "end":
+            await writer.complete()
+
+
+async def bench_in_process(mode: str, size: int, part_size: int, parallel: int) -> dict:
+    sys.path.insert(0, str(SERVICE_ROOT))
+    from app.core.s3_client import close_s3, create_bucket_if_not_exists, get_async_s3, init_s3
+
+    s3 = init_s3()
+    create_bucket_if_not_exists(BUCKET)
+    # The spooled temporary file has to fit somewhere
+    if mode == "buffered" and shutil.disk_usage(tempfile.gettempdir()).free < size * 1.1:
+        raise SystemExit(f"Not enough space in {tempfile.gettempdir()} for a {size} byte spool")
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    try:
+        if mode == "buffered":
+            await upload_buffered(s3, size)
+        else:
+            await upload_streaming(get_async_s3(), size, part_size, parallel)
+    finally:
+        close_s3()
+    wall = time.perf_counter() - started
+    return {
+        "wall_s": wall,
+        "throughput_mb_s": size / MIB / wall,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_before_mb": rss_before,
+    }
+
+
+async def bench_remote(url: str, token: str, size: int) -> dict:
+    headers = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}", "Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        started = time.perf_counter()
+        resp = await client.post("/api/v1/studies/", content=async_body(size), headers=headers)
+        wall = time.perf_counter() - started
+    resp.raise_for_status()
+    return {"wall_s": wall, "throughput_mb_s": size / MIB / wall, "object_name": resp.json()["object_name"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["buffered", "streaming"], default="streaming")
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--url", help="Benchmark a running pacs_service instead of an in-process upload")
+    parser.add_argument("--token", help="Bearer token for --url")
+    args = parser.parse_args()
+
+    size = args.size_mb * MIB
+    if args.url:
+        result = asyncio.run(bench_remote(args.url, args.token or "", size))
+        label = args.url
+    else:
+        result = asyncio.run(bench_in_process(args.mode, size, args.part_size_mb * MIB, args.parallel))
+        label = f"in-process/{args.mode}"
+
+    print(f"{label}: {args.size_mb} MiB upload")
+    for key, value in result.items():
+        print(f"  {key:>15}: {value:.1f}" if isinstance(value, float) else f"  {key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""create outbox_events table
+
+Revision ID: 20261017_000007
+Revises: 20250921_000001
+Create Date: 2026-10-17 00:00:07.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '20261017_000007'
+down_revision: Union[str, None] = '20250921_000001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Create outbox_events table if it doesn't exist
+    if 'outbox_events' not in existing_tables:
+        op.create_table(
+            'outbox_events',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('event_type', sa.String(length=64), nullable=False),
+            sa.Column('payload', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index('ix_outbox_events_created_at', 'outbox_events', ['created_at'])
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Drop outbox_events table and index if they exist
+    if 'outbox_events' in existing_tables:
+        try:
+            op.drop_index('ix_outbox_events_created_at', table_name='outbox_events')
+        except Exception:
+            pass  # Index might not exist
+        op.drop_table('outbox_events')
@@ -8,9 +8,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_session
 from app.core.security import create_access_token, verify_token
+from app.core.outbox import outbox_relay
+from app.core.user_cache import user_cache
 from app.schemas.token_schema import Token
 from app.schemas.user_schema import UserPublic, UserCreate
-from app.crud.crud_user import authenticate_user, get_user_by_email, create_user
+from app.crud.crud_user import authenticate_user, get_user_by_email, get_user_by_id, create_user
 from app.models.user_model import User
 
 router = APIRouter()
@@ -30,14 +32,11 @@ async def login_for_access_token(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    access_token = create_access_token(subject=str(user.id))
+    access_token = create_access_token(subject=str(user.id), role=user.role)
     return Token(access_token=access_token, token_type="bearer")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), 
-    db: AsyncSession = Depends(get_session)
-) -> User:
+def _get_token_user_id(token: str) -> _uuid.UUID:
     payload = verify_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(
@@ -48,7 +47,7 @@ async def get_current_user(
     user_id = payload["sub"]
     
     try:
-        user_uuid = _uuid.UUID(user_id)
+        return _uuid.UUID(user_id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
@@ -56,6 +55,13 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), 
+    db: AsyncSession = Depends(get_session)
+) -> User:
+    user_uuid = _get_token_user_id(token)
+
     result = await db.execute(select(User).where(User.id == user_uuid))
     user = result.scalar_one_or_none()
     if not user:
@@ -67,8 +73,29 @@ async def get_current_user(
     return user
 
 
+async def get_current_user_public(
+    token: str = Depends(oauth2_scheme), 
+    db: AsyncSession = Depends(get_session)
+) -> UserPublic:
+    """Like get_current_user, but served from the user cache (no DB hit when warm)."""
+    user_uuid = _get_token_user_id(token)
+
+    async def load_user() -> Optional[UserPublic]:
+        user = await get_user_by_id(db, user_uuid)
+        return UserPublic.model_validate(user) if user else None
+
+    user = await user_cache.get(user_uuid, load_user)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+
 @router.get("/me", response_model=UserPublic)
-async def read_users_me(current_user: User = Depends(get_current_user)) -> UserPublic:
+async def read_users_me(current_user: UserPublic = Depends(get_current_user_public)) -> UserPublic:
     return current_user
 
 
@@ -84,17 +111,6 @@ async def register_user(
             detail="Email already registered"
         )
     user = await create_user(db, payload)
-
-    # Publish USER_CREATED event (best-effort)
-    try:
-        from app.core.messaging import publish_user_created
-        await publish_user_created(
-            user_id=str(user.id), 
-            user_email=user.email, 
-            workspace_name=payload.workspace_name
-        )
-    except Exception:
-        # Don't block registration on messaging failures
-        pass
-
+    # USER_CREATED was written to the outbox with the user; publish it without waiting for the next poll
+    outbox_relay.notify()
     return user
@@ -12,7 +12,27 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # Local JWT verification cache (see shared.jwt_cache)
+    jwt_cache_size: int = 10000
+    jwt_negative_cache_ttl_seconds: int = 30
+
+    # bcrypt worker pool (see app.core.hashing)
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+
     redis_url: str = "redis://redis_cache:6379/0"
+    # Per-command timeout, so a stalled Redis cannot hang /me or the outbox relay
+    redis_socket_timeout_seconds: float = 0.5
+
+    # /me user projection cache (see app.core.user_cache)
+    user_cache_local_size: int = 10000
+    user_cache_local_ttl_seconds: int = 10
+    user_cache_redis_ttl_seconds: int = 300
+
+    # Outbox relay to the event bus (see app.core.outbox)
+    outbox_relay_batch_size: int = 100
+    outbox_relay_poll_interval_seconds: float = 1.0
+
     my_domain: str = "localhost"  # Domain for CORS and routing
 
 
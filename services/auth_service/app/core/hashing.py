@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool already has too many calls queued."""
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify on a bounded thread pool.
+
+    bcrypt releases the GIL, so worker threads keep the event loop free while a
+    hash is computed. Calls beyond ``max_pending`` (running + queued) are rejected
+    with ``PasswordHashingBusy`` instead of piling up behind a login burst.
+    """
+
+    def __init__(self, context: CryptContext, *, max_workers: int, max_pending: int) -> None:
+        self._context = context
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so the pool also works when the app lifespan is not run (tests)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self._max_pending:
+            raise PasswordHashingBusy()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import uuid
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from shared.messaging import Event, parse_event, publish_many
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.outbox_model import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def add_to_outbox(db: AsyncSession, event: Event) -> None:
+    """Stage an event in the caller's transaction; it is published after commit by the relay."""
+    db.add(OutboxEvent(id=uuid.UUID(event.event_id), event_type=event.event_type, payload=event.model_dump_json()))
+
+
+class OutboxRelay:
+    """Moves committed outbox rows to the event bus in batches.
+
+    Rows are locked with ``FOR UPDATE SKIP LOCKED`` so several auth replicas can
+    relay concurrently without publishing the same row twice, and are deleted in
+    the same transaction after ``publish_many`` succeeds. A crash between the two
+    republishes the batch with unchanged event IDs, which consumers deduplicate
+    (at-least-once delivery).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        retry_after: float = 5.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_after = retry_after
+        self.published = 0
+        self._wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake the relay right away instead of at the next poll."""
+        self._wakeup.set()
+
+    async def relay_batch(self) -> int:
+        """Publish and delete one batch of pending rows; returns how many were relayed."""
+        async with self.session_factory() as db:
+            res = await db.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.created_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = res.scalars().all()
+            if not rows:
+                return 0
+            await publish_many(parse_event(row.payload) for row in rows)
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows])))
+            await db.commit()
+        self.published += len(rows)
+        return len(rows)
+
+    async def drain(self) -> int:
+        relayed = 0
+        while True:
+            count = await self.relay_batch()
+            relayed += count
+            if count < self.batch_size:
+                return relayed
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox relay failed, retrying in {self.retry_after}s: {e}")
+                await asyncio.sleep(self.retry_after)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {"published": self.published}
+
+
+outbox_relay = OutboxRelay(
+    async_session,
+    batch_size=settings.outbox_relay_batch_size,
+    poll_interval=settings.outbox_relay_poll_interval_seconds,
+)
@@ -4,16 +4,26 @@ from typing import Dict, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from shared.jwt_cache import decoder_from_settings
+
 from app.core.config import settings
+from app.core.hashing import PasswordHasher
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+token_decoder = decoder_from_settings(settings)
 
 
 def create_access_token(
     subject: Union[str, int], 
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    role: Optional[str] = None,
 ) -> str:
-    """Create JWT access token."""
+    """Create JWT access token; ``role`` lets other services authorize without a lookup."""
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
     
@@ -21,6 +31,8 @@ def create_access_token(
         "sub": str(subject), 
         "exp": datetime.now(timezone.utc) + expires_delta
     }
+    if role is not None:
+        to_encode["role"] = str(role)
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -28,8 +40,7 @@ def create_access_token(
 def verify_token(token: str) -> Optional[Dict[str, Union[str, int]]]:
     """Verify JWT token and return payload."""
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
+        return token_decoder.decode(token)
     except JWTError:
         return None
 
@@ -42,3 +53,13 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """Generate password hash."""
     return pwd_context.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the hashing pool without blocking the event loop."""
+    return await password_hasher.hash(password)
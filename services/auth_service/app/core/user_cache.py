@@ -0,0 +1,140 @@
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from shared.messaging import get_redis
+
+from app.core.config import settings
+from app.schemas.user_schema import UserPublic
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "yakhteh:user:"
+
+
+class UserCache:
+    """Read-through cache of the ``UserPublic`` projection.
+
+    Lookups go in-process LRU -> Redis -> loader (Postgres). Local entries live for
+    ``local_ttl`` seconds, which bounds how stale another replica can be after an
+    invalidation; Redis entries are deleted on invalidation and expire after
+    ``redis_ttl``. Redis errors are logged and the tier is skipped for
+    ``redis_retry_after`` seconds, so an outage degrades to plain DB reads.
+    """
+
+    def __init__(
+        self,
+        *,
+        local_maxsize: int,
+        local_ttl: float,
+        redis_ttl: int,
+        redis_retry_after: float = 30.0,
+    ) -> None:
+        self._redis_disabled_until = 0.0
+        self._local: "OrderedDict[uuid.UUID, Tuple[UserPublic, float]]" = OrderedDict()
+        self.local_maxsize = local_maxsize
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.redis_retry_after = redis_retry_after
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _get_redis(self, *, force: bool = False) -> Optional[Redis]:
+        if not force and time.monotonic() < self._redis_disabled_until:
+            return None
+        try:
+            return get_redis()
+        except RuntimeError:
+            return None
+
+    def _redis_failed(self, exc: Exception) -> None:
+        self.redis_errors += 1
+        self._redis_disabled_until = time.monotonic() + self.redis_retry_after
+        logger.warning(f"User cache Redis tier unavailable, skipping for {self.redis_retry_after}s: {exc}")
+
+    def _get_local(self, user_id: uuid.UUID) -> Optional[UserPublic]:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return user
+
+    def _put_local(self, user: UserPublic) -> None:
+        self._local[user.id] = (user, time.monotonic() + self.local_ttl)
+        self._local.move_to_end(user.id)
+        while len(self._local) > self.local_maxsize:
+            self._local.popitem(last=False)
+
+    async def get(
+        self, user_id: uuid.UUID, loader: Callable[[], Awaitable[Optional[UserPublic]]]
+    ) -> Optional[UserPublic]:
+        user = self._get_local(user_id)
+        if user is not None:
+            self.local_hits += 1
+            return user
+
+        r = self._get_redis()
+        if r is not None:
+            try:
+                raw = await r.get(f"{KEY_PREFIX}{user_id}")
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+            else:
+                if raw is not None:
+                    self.redis_hits += 1
+                    user = UserPublic.model_validate_json(raw)
+                    self._put_local(user)
+                    return user
+
+        self.misses += 1
+        user = await loader()
+        if user is None:
+            return None
+        self._put_local(user)
+        r = self._get_redis()
+        if r is not None:
+            try:
+                await r.set(f"{KEY_PREFIX}{user_id}", user.model_dump_json(), ex=self.redis_ttl)
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+        return user
+
+    async def invalidate(self, user_id: uuid.UUID) -> None:
+        self._local.pop(user_id, None)
+        # Ignore the cooldown here: skipping a delete would leave a stale entry for redis_ttl
+        r = self._get_redis(force=True)
+        if r is not None:
+            try:
+                await r.delete(f"{KEY_PREFIX}{user_id}")
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "local_size": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+        }
+
+    def clear(self) -> None:
+        self._local.clear()
+
+
+user_cache = UserCache(
+    local_maxsize=settings.user_cache_local_size,
+    local_ttl=settings.user_cache_local_ttl_seconds,
+    redis_ttl=settings.user_cache_redis_ttl_seconds,
+)
@@ -3,9 +3,13 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
+from shared.messaging import UserCreatedEvent
+
 from app.models.user_model import User
 from app.schemas.user_schema import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
+from app.core.user_cache import user_cache
+from app.core.outbox import add_to_outbox
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
@@ -15,12 +19,18 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     user = User(
+        id=uuid.uuid4(),
         email=user_in.email,
         full_name=user_in.full_name,
         role=user_in.role,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
     )
     db.add(user)
+    # Committed together with the user, so a workspace is always requested for it
+    add_to_outbox(
+        db,
+        UserCreatedEvent(user_id=user.id, user_email=user.email, workspace_name=user_in.workspace_name),
+    )
     await db.commit()
     await db.refresh(user)
     return user
@@ -37,10 +47,19 @@ async def update_user(db: AsyncSession, user: User, user_in: UserUpdate) -> User
     if user_in.role is not None:
         user.role = user_in.role
     if user_in.password is not None:
-        user.hashed_password = get_password_hash(user_in.password)
+        user.hashed_password = await get_password_hash_async(user_in.password)
+
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.id)
+    return user
 
+
+async def deactivate_user(db: AsyncSession, user: User) -> User:
+    user.is_active = False
     await db.commit()
     await db.refresh(user)
+    await user_cache.invalidate(user.id)
     return user
 
 
@@ -48,6 +67,8 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # End the read transaction so the pooled DB connection isn't held while bcrypt runs
+    await db.commit()
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
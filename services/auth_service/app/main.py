@@ -1,14 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
 
+from shared.messaging import close_redis, init_redis
+
 from app.core.config import settings
+from app.core.hashing import PasswordHashingBusy
+from app.core.outbox import outbox_relay
+from app.core.security import password_hasher, token_decoder
+from app.core.user_cache import user_cache
 from app.api.v1.endpoints.auth import router as auth_router
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    # Startup
+    init_redis(settings.redis_url, socket_timeout=settings.redis_socket_timeout_seconds)
+    relay_task = asyncio.create_task(outbox_relay.run())
+    yield
+    # Shutdown
+    relay_task.cancel()
+    try:
+        await relay_task
+    except asyncio.CancelledError:
+        pass
+    password_hasher.shutdown()
+    user_cache.clear()
+    await close_redis()
+
+
 async def validation_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """Handle validation errors consistently."""
     logger.error(f"Validation error on {request.url}: {exc}")
@@ -18,6 +45,16 @@ async def validation_exception_handler(request: Request, exc: Exception) -> JSON
     )
 
 
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy) -> JSONResponse:
+    """Shed load when the bcrypt pool queue is full."""
+    logger.warning(f"Password hashing pool saturated on {request.url}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
 async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """Handle general exceptions."""
     logger.error(f"Unhandled error on {request.url}: {exc}", exc_info=True)
@@ -32,11 +69,13 @@ def create_app() -> FastAPI:
         title="Yakhteh Auth Service", 
         version="0.1.0",
         docs_url="/docs",  # Default docs URL
-        redoc_url="/redoc"  # Default ReDoc URL
+        redoc_url="/redoc",  # Default ReDoc URL
+        lifespan=lifespan
     )
 
     # Add exception handlers
     app.add_exception_handler(422, validation_exception_handler)
+    app.add_exception_handler(PasswordHashingBusy, password_hashing_busy_handler)
     app.add_exception_handler(500, general_exception_handler)
 
     # CORS (restrict to specific origins for security)
@@ -63,7 +102,10 @@ def create_app() -> FastAPI:
             "status": "ok", 
             "service": "auth", 
             "environment": settings.environment,
-            "version": "0.1.0"
+            "version": "0.1.0",
+            "jwt_cache": token_decoder.cache.stats(),
+            "user_cache": user_cache.stats(),
+            "outbox": outbox_relay.stats(),
         }
 
     return app
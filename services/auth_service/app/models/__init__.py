@@ -1,2 +1,4 @@
 from . import user_model  # noqa: F401
-from .user_model import User, UserRole  # noqa
\ No newline at end of file
+from . import outbox_model  # noqa: F401
+from .user_model import User, UserRole  # noqa
+from .outbox_model import OutboxEvent  # noqa
@@ -8,7 +8,10 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from shared.messaging import close_redis, init_redis
+
 from app.core.config import settings
+from app.core.user_cache import user_cache
 from app.db.session import Base, get_session
 from app.main import create_app
 
@@ -102,5 +105,9 @@ async def app_with_overrides(test_engine_and_sessionmaker) -> FastAPI:
 
 @pytest.fixture()
 async def client(app_with_overrides: FastAPI) -> AsyncGenerator[AsyncClient, None]:
+    # ASGITransport does not run the lifespan; mirror its Redis setup per test event loop
+    init_redis(settings.redis_url)
     async with AsyncClient(transport=ASGITransport(app=app_with_overrides), base_url="http://test") as ac:
         yield ac
+    user_cache.clear()
+    await close_redis()
@@ -1,5 +1,6 @@
 import pytest
 from faker import Faker
+from jose import jwt
 
 
 pytestmark = pytest.mark.anyio
@@ -65,6 +66,8 @@ async def test_login_success(client):
     data = resp.json()
     assert "access_token" in data and data["access_token"]
     assert data["token_type"] == "bearer"
+    # Other services authorize by the role claim
+    assert jwt.get_unverified_claims(data["access_token"])["role"] == "doctor"
 
 
 async def test_login_wrong_password(client):
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+from faker import Faker
+from sqlalchemy import select
+
+from shared.messaging import STREAM, PAYLOAD_FIELD, get_redis
+
+from app.core.outbox import OutboxRelay
+from app.models.outbox_model import OutboxEvent
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/auth"
+
+
+async def _register(client) -> dict:
+    fake = Faker()
+    payload = {
+        "email": fake.unique.email(),
+        "password": "StrongPassw0rd!",
+        "full_name": fake.name(),
+        "workspace_name": f"{fake.last_name()} Clinic",
+    }
+    r = await client.post(f"{BASE}/register", json=payload)
+    assert r.status_code == 201, r.text
+    return {**payload, "id": r.json()["id"]}
+
+
+async def _pending_rows(SessionLocal) -> list[OutboxEvent]:
+    async with SessionLocal() as session:
+        return list((await session.execute(select(OutboxEvent))).scalars().all())
+
+
+async def test_register_writes_user_created_to_outbox(client, test_engine_and_sessionmaker):
+    _, SessionLocal = test_engine_and_sessionmaker
+    user = await _register(client)
+
+    rows = await _pending_rows(SessionLocal)
+    assert len(rows) == 1
+    payload = json.loads(rows[0].payload)
+    assert rows[0].event_type == payload["event_type"] == "USER_CREATED"
+    assert payload["event_id"] == str(rows[0].id)
+    assert payload["user_id"] == user["id"]
+    assert payload["workspace_name"] == user["workspace_name"]
+
+
+async def test_relay_publishes_and_clears_outbox(client, test_engine_and_sessionmaker):
+    _, SessionLocal = test_engine_and_sessionmaker
+    users = [await _register(client) for _ in range(3)]
+    event_ids = {str(row.id) for row in await _pending_rows(SessionLocal)}
+    before = await get_redis().xrevrange(STREAM, count=1)
+
+    relay = OutboxRelay(SessionLocal, batch_size=2)
+    assert await relay.drain() == 3
+
+    assert await _pending_rows(SessionLocal) == []
+    entries = await get_redis().xrange(STREAM, min=f"({before[0][0]}" if before else "-")
+    published = [json.loads(fields[PAYLOAD_FIELD]) for _, fields in entries]
+    assert {event["event_id"] for event in published} >= event_ids
+    assert {event["user_id"] for event in published} >= {user["id"] for user in users}
+
+
+async def test_locked_rows_are_skipped_by_other_relays(client, test_engine_and_sessionmaker):
+    _, SessionLocal = test_engine_and_sessionmaker
+    await _register(client)
+
+    async with SessionLocal() as holder:
+        locked = await holder.execute(select(OutboxEvent).with_for_update())
+        assert len(locked.scalars().all()) == 1
+
+        # Another replica's relay must not block on, or publish, the locked row
+        assert await OutboxRelay(SessionLocal).relay_batch() == 0
+        await holder.rollback()
+
+    assert await OutboxRelay(SessionLocal).relay_batch() == 1
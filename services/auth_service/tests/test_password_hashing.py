@@ -0,0 +1,43 @@
+import pytest
+from faker import Faker
+
+from app.core.hashing import PasswordHashingBusy
+from app.core.security import password_hasher
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/auth"
+
+
+async def test_pool_hash_and_verify_roundtrip():
+    hashed = await password_hasher.hash("StrongPassw0rd!")
+    assert await password_hasher.verify("StrongPassw0rd!", hashed) is True
+    assert await password_hasher.verify("WrongPassword!", hashed) is False
+    assert password_hasher.pending == 0
+
+
+async def test_pool_rejects_when_queue_full(monkeypatch):
+    monkeypatch.setattr(password_hasher, "_max_pending", 0)
+    with pytest.raises(PasswordHashingBusy):
+        await password_hasher.hash("StrongPassw0rd!")
+
+
+async def test_login_returns_503_when_pool_saturated(client, monkeypatch):
+    fake = Faker()
+
+    email = fake.unique.email()
+    password = "StrongPassw0rd!"
+    payload = {
+        "email": email,
+        "password": password,
+        "full_name": fake.name(),
+        "workspace_name": f"{fake.last_name()} Clinic",
+    }
+    r = await client.post(f"{BASE}/register", json=payload)
+    assert r.status_code == 201, r.text
+
+    monkeypatch.setattr(password_hasher, "_max_pending", 0)
+    resp = await client.post(f"{BASE}/login", data={"username": email, "password": password})
+    assert resp.status_code == 503, resp.text
+    assert resp.headers.get("Retry-After") == "1"
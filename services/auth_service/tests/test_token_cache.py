@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+from jose.exceptions import ExpiredSignatureError, JWTError
+
+from shared.jwt_cache import CachedJWTDecoder, TokenCache
+
+from app.core.config import settings
+from app.core.security import create_access_token
+
+
+def _decoder(**cache_kwargs) -> CachedJWTDecoder:
+    return CachedJWTDecoder(settings.secret_key, settings.algorithm, TokenCache(**cache_kwargs))
+
+
+def test_valid_token_is_decoded_once():
+    decoder = _decoder()
+    token = create_access_token(subject="user-1")
+
+    first = decoder.decode(token)
+    second = decoder.decode(token)
+
+    assert first["sub"] == second["sub"] == "user-1"
+    stats = decoder.cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_cached_claims_cannot_be_mutated_by_callers():
+    decoder = _decoder()
+    token = create_access_token(subject="user-1")
+
+    decoder.decode(token)["sub"] = "someone-else"
+    assert decoder.decode(token)["sub"] == "user-1"
+
+
+def test_rejected_tokens_are_negatively_cached():
+    decoder = _decoder()
+
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            decoder.decode("not-a-jwt")
+
+    stats = decoder.cache.stats()
+    assert stats["misses"] == 1
+    assert stats["negative_hits"] == 1
+
+
+def test_expired_token_keeps_its_error_type_when_cached():
+    decoder = _decoder()
+    token = create_access_token(subject="user-1", expires_delta=timedelta(seconds=-1))
+
+    for _ in range(2):
+        with pytest.raises(ExpiredSignatureError):
+            decoder.decode(token)
+    assert decoder.cache.stats()["negative_hits"] == 1
+
+
+def test_cache_is_size_bounded():
+    decoder = _decoder(maxsize=2)
+    for i in range(3):
+        decoder.decode(create_access_token(subject=f"user-{i}"))
+
+    stats = decoder.cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+from faker import Faker
+
+from app.core.user_cache import user_cache
+from app.crud.crud_user import deactivate_user, get_user_by_id, update_user
+from app.schemas.user_schema import UserUpdate
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/auth"
+
+
+async def _register_and_login(client) -> tuple[str, dict]:
+    fake = Faker()
+    email = fake.unique.email()
+    password = "StrongPassw0rd!"
+    payload = {
+        "email": email,
+        "password": password,
+        "full_name": fake.name(),
+        "workspace_name": f"{fake.last_name()} Clinic",
+    }
+    r = await client.post(f"{BASE}/register", json=payload)
+    assert r.status_code == 201, r.text
+    resp = await client.post(f"{BASE}/login", data={"username": email, "password": password})
+    assert resp.status_code == 200, resp.text
+    return r.json()["id"], {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def test_me_is_served_from_cache_after_first_call(client):
+    _, headers = await _register_and_login(client)
+
+    before = user_cache.stats()
+    first = await client.get(f"{BASE}/me", headers=headers)
+    second = await client.get(f"{BASE}/me", headers=headers)
+    after = user_cache.stats()
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert after["misses"] - before["misses"] == 1
+    assert after["local_hits"] - before["local_hits"] == 1
+
+
+async def test_update_user_invalidates_cached_projection(client, test_engine_and_sessionmaker):
+    _, SessionLocal = test_engine_and_sessionmaker
+    user_id, headers = await _register_and_login(client)
+    assert (await client.get(f"{BASE}/me", headers=headers)).status_code == 200
+
+    async with SessionLocal() as session:
+        user = await get_user_by_id(session, uuid.UUID(user_id))
+        await update_user(session, user, UserUpdate(full_name="Renamed Doctor"))
+
+    me = await client.get(f"{BASE}/me", headers=headers)
+    assert me.status_code == 200, me.text
+    assert me.json()["full_name"] == "Renamed Doctor"
+
+
+async def test_deactivation_invalidates_cached_projection(client, test_engine_and_sessionmaker):
+    _, SessionLocal = test_engine_and_sessionmaker
+    user_id, headers = await _register_and_login(client)
+    assert (await client.get(f"{BASE}/me", headers=headers)).json()["is_active"] is True
+
+    async with SessionLocal() as session:
+        user = await get_user_by_id(session, uuid.UUID(user_id))
+        await deactivate_user(session, user)
+
+    me = await client.get(f"{BASE}/me", headers=headers)
+    assert me.status_code == 200, me.text
+    assert me.json()["is_active"] is False
@@ -0,0 +1,95 @@
+"""unique owner workspace and clinic membership
+
+Revision ID: 20261017_000006
+Revises: 20250921_000002
+Create Date: 2026-10-17 00:00:06.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000006'
+down_revision: Union[str, None] = '20250921_000002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Mark the workspace created at registration; at most one per owner.
+    # Clinics created before this migration stay ordinary clinics.
+    clinic_columns = [c['name'] for c in inspector.get_columns('clinics')]
+    if 'is_workspace' not in clinic_columns:
+        op.add_column('clinics', sa.Column('is_workspace', sa.Boolean(), nullable=False, server_default=sa.false()))
+    clinic_indexes = [ix['name'] for ix in inspector.get_indexes('clinics')]
+    if 'uq_clinics_workspace_owner_id' not in clinic_indexes:
+        op.create_index(
+            'uq_clinics_workspace_owner_id',
+            'clinics',
+            ['owner_id'],
+            unique=True,
+            postgresql_where=sa.text('is_workspace'),
+        )
+
+    # clinic_members is written by the membership worker, which has no migrations of its own
+    member_role_enum = postgresql.ENUM('admin', 'member', name='memberrole', create_type=False)
+    member_role_enum.create(op.get_bind(), checkfirst=True)
+
+    if 'clinic_members' not in existing_tables:
+        op.create_table(
+            'clinic_members',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('clinic_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('role', member_role_enum, nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.UniqueConstraint('clinic_id', 'user_id', name='uq_clinic_members_clinic_id_user_id'),
+        )
+        op.create_index('ix_clinic_members_clinic_id', 'clinic_members', ['clinic_id'])
+        op.create_index('ix_clinic_members_user_id', 'clinic_members', ['user_id'])
+    else:
+        constraints = [uc['name'] for uc in inspector.get_unique_constraints('clinic_members')]
+        if 'uq_clinic_members_clinic_id_user_id' not in constraints:
+            # Keep the oldest row of any duplicated membership before adding the constraint
+            op.execute(
+                """
+                DELETE FROM clinic_members m
+                USING clinic_members keep
+                WHERE m.clinic_id = keep.clinic_id
+                  AND m.user_id = keep.user_id
+                  AND (m.created_at, m.id) > (keep.created_at, keep.id)
+                """
+            )
+            op.create_unique_constraint(
+                'uq_clinic_members_clinic_id_user_id', 'clinic_members', ['clinic_id', 'user_id']
+            )
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # The table itself is left in place: it predates this migration on most databases
+    if 'clinic_members' in existing_tables:
+        try:
+            op.drop_constraint('uq_clinic_members_clinic_id_user_id', 'clinic_members', type_='unique')
+        except Exception:
+            pass  # Constraint might not exist
+
+    if 'clinics' in existing_tables:
+        try:
+            op.drop_index('uq_clinics_workspace_owner_id', table_name='clinics')
+        except Exception:
+            pass  # Index might not exist
+        try:
+            op.drop_column('clinics', 'is_workspace')
+        except Exception:
+            pass  # Column might not exist
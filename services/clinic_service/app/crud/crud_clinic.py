@@ -1,7 +1,8 @@
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence, Tuple
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 
 from app.models.clinic_model import Clinic
 from app.schemas.clinic_schema import ClinicCreate, ClinicUpdate
@@ -30,6 +31,38 @@ async def create_clinic(db: AsyncSession, payload: ClinicCreate) -> Clinic:
     return clinic
 
 
+async def create_workspaces(
+    db: AsyncSession, workspaces: Sequence[Tuple[str, uuid.UUID]]
+) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+    """Ensure each ``(name, owner_id)`` has a workspace clinic, using one multi-row INSERT.
+
+    Owners that already have a workspace are left untouched, so replaying the same
+    registration is a no-op. Returns ``(clinic_id, owner_id)`` for every requested
+    owner, including those whose workspace already existed.
+    """
+    if not workspaces:
+        return []
+    names_by_owner = {owner_id: name for name, owner_id in workspaces}
+    rows = [
+        {"id": uuid.uuid4(), "name": name, "owner_id": owner_id, "is_workspace": True}
+        for owner_id, name in names_by_owner.items()
+    ]
+    stmt = (
+        insert(Clinic)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=[Clinic.owner_id], index_where=Clinic.is_workspace)
+    )
+    await db.execute(stmt)
+    res = await db.execute(
+        select(Clinic.id, Clinic.owner_id).where(
+            Clinic.is_workspace, Clinic.owner_id.in_(list(names_by_owner))
+        )
+    )
+    created = [(clinic_id, owner_id) for clinic_id, owner_id in res.all()]
+    await db.commit()
+    return created
+
+
 async def update_clinic(db: AsyncSession, clinic: Clinic, payload: ClinicUpdate) -> Clinic:
     if payload.name is not None:
         clinic.name = payload.name
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.api.deps import token_decoder
 from app.api.v1.endpoints.clinics import router as clinics_router
 
 
@@ -31,6 +32,11 @@ def create_app() -> FastAPI:
 
     @app.get("/healthz")
     async def healthz():
-        return {"status": "ok", "service": "clinic", "environment": settings.environment}
+        return {
+            "status": "ok",
+            "service": "clinic",
+            "environment": settings.environment,
+            "jwt_cache": token_decoder.cache.stats(),
+        }
 
     return app
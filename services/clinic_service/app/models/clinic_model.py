@@ -1,7 +1,7 @@
 import uuid
 from enum import StrEnum
 
-from sqlalchemy import String, Enum
+from sqlalchemy import Boolean, Enum, Index, String, false, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -22,3 +22,9 @@ class Clinic(Base):
     address: Mapped[str | None] = mapped_column(String(500), nullable=True)
     owner_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
     subscription_status: Mapped[SubscriptionStatus] = mapped_column(Enum(SubscriptionStatus), nullable=False, default=SubscriptionStatus.free)
+    # The workspace created for the owner at registration; at most one per owner
+    is_workspace: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index("uq_clinics_workspace_owner_id", "owner_id", unique=True, postgresql_where=text("is_workspace")),
+    )
@@ -1,38 +1,43 @@
 import asyncio
-import json
+import logging
 import uuid
-from typing import Final
+from typing import List, Tuple
 
-from redis.asyncio import from_url as redis_from_url
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from shared.event_consumer import StreamConsumer
+from shared.logging_config import setup_logging
+from shared.messaging import (
+    UserCreatedEvent,
+    WorkspaceCreatedEvent,
+    close_redis,
+    derived_event_id,
+    init_redis,
+    publish_many,
+)
 
 from app.core.config import settings
+from app.crud.crud_clinic import create_workspaces
 from app.db.session import async_session, engine
-from app.models.clinic_model import Clinic
 
-CHANNEL: Final[str] = "yakhteh_events"
+logger = logging.getLogger(__name__)
 
+CONSUMER_GROUP = "clinic_service"
 
-async def _publish_workspace_created(r, *, clinic_id: str, user_id: str) -> None:
-    evt = {"event_type": "WORKSPACE_CREATED", "clinic_id": clinic_id, "user_id": user_id}
-    await r.publish(CHANNEL, json.dumps(evt))
 
+async def _handle_user_created(events: List[UserCreatedEvent]) -> None:
+    workspaces: List[Tuple[str, uuid.UUID]] = [(event.workspace_name, event.user_id) for event in events]
+    async with async_session() as db:
+        created = await create_workspaces(db, workspaces)
 
-async def _handle_user_created(session_factory: async_sessionmaker[AsyncSession], r, message: dict) -> None:
-    try:
-        user_id = str(message["user_id"])  # may be uuid or str
-        workspace_name = str(message["workspace_name"])  # required
-        owner_uuid = uuid.UUID(user_id)
-    except Exception:
-        return
-
-    async with session_factory() as db:
-        clinic = Clinic(name=workspace_name, address=None, owner_id=owner_uuid)
-        db.add(clinic)
-        await db.commit()
-        await db.refresh(clinic)
-
-        await _publish_workspace_created(r, clinic_id=str(clinic.id), user_id=str(owner_uuid))
+    # Re-published for existing workspaces too (a previous attempt may have stopped before
+    # publishing); the derived event_id lets consumers recognise the repeat
+    await publish_many(
+        WorkspaceCreatedEvent(
+            event_id=derived_event_id("WORKSPACE_CREATED", clinic_id),
+            clinic_id=str(clinic_id),
+            user_id=str(owner_id),
+        )
+        for clinic_id, owner_id in created
+    )
 
 
 async def run_worker() -> None:
@@ -41,24 +46,20 @@ async def run_worker() -> None:
         from app.db.session import Base
         await conn.run_sync(Base.metadata.create_all)
 
-    r = redis_from_url(settings.redis_url, decode_responses=True)
+    init_redis(settings.redis_url)
+    consumer = StreamConsumer(
+        CONSUMER_GROUP,
+        {"USER_CREATED": _handle_user_created},
+        batch_size=settings.worker_batch_size,
+        batch_linger_ms=settings.worker_batch_linger_ms,
+        concurrency=settings.worker_concurrency,
+    )
     try:
-        pubsub = r.pubsub()
-        await pubsub.subscribe(CHANNEL)
-        async for msg in pubsub.listen():
-            if msg.get("type") != "message":
-                continue
-            try:
-                payload = json.loads(msg.get("data", "{}"))
-            except json.JSONDecodeError:
-                continue
-            event_type = payload.get("event_type")
-            if event_type == "USER_CREATED":
-                await _handle_user_created(async_session, r, payload)
+        await consumer.run()
     finally:
-        await r.aclose()
+        await close_redis()
 
 
 if __name__ == "__main__":
+    setup_logging("clinic_worker")
     asyncio.run(run_worker())
-
@@ -1,4 +1,7 @@
 import uuid
+from typing import Sequence, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.clinic_member_model import ClinicMember, MemberRole
@@ -11,3 +14,21 @@ async def create_member_admin(db: AsyncSession, *, clinic_id: uuid.UUID, user_id
     await db.refresh(member)
     return member
 
+
+
+async def create_member_admins(db: AsyncSession, memberships: Sequence[Tuple[uuid.UUID, uuid.UUID]]) -> None:
+    """Add an admin membership for each ``(clinic_id, user_id)`` with a single multi-row INSERT.
+
+    Pairs that already have a membership are skipped, so replays are no-ops.
+    """
+    if not memberships:
+        return
+    rows = [
+        {"id": uuid.uuid4(), "clinic_id": clinic_id, "user_id": user_id, "role": MemberRole.admin}
+        for clinic_id, user_id in memberships
+    ]
+    stmt = insert(ClinicMember).values(rows).on_conflict_do_nothing(
+        index_elements=[ClinicMember.clinic_id, ClinicMember.user_id]
+    )
+    await db.execute(stmt)
+    await db.commit()
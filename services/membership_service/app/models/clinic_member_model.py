@@ -2,7 +2,7 @@ import uuid
 from enum import StrEnum
 from datetime import datetime
 
-from sqlalchemy import Enum, DateTime
+from sqlalchemy import Enum, DateTime, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -17,6 +17,7 @@ class MemberRole(StrEnum):
 
 class ClinicMember(Base):
     __tablename__ = "clinic_members"
+    __table_args__ = (UniqueConstraint("clinic_id", "user_id", name="uq_clinic_members_clinic_id_user_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     clinic_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
@@ -1,26 +1,31 @@
 import asyncio
-import json
+import logging
 import uuid
-from typing import Final
+from typing import List, Tuple
 
-from redis.asyncio import from_url as redis_from_url
+from shared.event_consumer import StreamConsumer
+from shared.logging_config import setup_logging
+from shared.messaging import WorkspaceCreatedEvent, close_redis, init_redis
 
 from app.core.config import settings
 from app.db.session import async_session, engine, Base
-from app.crud.clinic_member_crud import create_member_admin
+from app.crud.clinic_member_crud import create_member_admins
 
-CHANNEL: Final = "yakhteh_events"
+logger = logging.getLogger(__name__)
 
+CONSUMER_GROUP = "membership_service"
 
-async def _handle_workspace_created(message: dict) -> None:
-    try:
-        clinic_id = uuid.UUID(str(message["clinic_id"]))
-        user_id = uuid.UUID(str(message["user_id"]))
-    except Exception:
-        return
+
+async def _handle_workspace_created(events: List[WorkspaceCreatedEvent]) -> None:
+    memberships: List[Tuple[uuid.UUID, uuid.UUID]] = []
+    for event in events:
+        try:
+            memberships.append((uuid.UUID(event.clinic_id), uuid.UUID(event.user_id)))
+        except ValueError:
+            logger.warning(f"Skipping WORKSPACE_CREATED with invalid ids {event.clinic_id!r}/{event.user_id!r}")
 
     async with async_session() as db:
-        await create_member_admin(db, clinic_id=clinic_id, user_id=user_id)
+        await create_member_admins(db, memberships)
 
 
 async def run_worker() -> None:
@@ -28,23 +33,20 @@ async def run_worker() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
-    r = redis_from_url(settings.redis_url, decode_responses=True)
+    init_redis(settings.redis_url)
+    consumer = StreamConsumer(
+        CONSUMER_GROUP,
+        {"WORKSPACE_CREATED": _handle_workspace_created},
+        batch_size=settings.worker_batch_size,
+        batch_linger_ms=settings.worker_batch_linger_ms,
+        concurrency=settings.worker_concurrency,
+    )
     try:
-        pubsub = r.pubsub()
-        await pubsub.subscribe(CHANNEL)
-        async for msg in pubsub.listen():
-            if msg.get("type") != "message":
-                continue
-            try:
-                payload = json.loads(msg.get("data", "{}"))
-            except json.JSONDecodeError:
-                continue
-            if payload.get("event_type") == "WORKSPACE_CREATED":
-                await _handle_workspace_created(payload)
+        await consumer.run()
     finally:
-        await r.aclose()
+        await close_redis()
 
 
 if __name__ == "__main__":
+    setup_logging("membership_worker")
     asyncio.run(run_worker())
-
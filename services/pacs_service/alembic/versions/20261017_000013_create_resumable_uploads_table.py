@@ -0,0 +1,67 @@
+"""create resumable uploads table
+
+Revision ID: 20261017_000013
+Revises: 20250921_000005
+Create Date: 2026-10-17 00:00:13.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000013'
+down_revision: Union[str, None] = '20250921_000005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create enum type if it doesn't exist
+    upload_status_enum = postgresql.ENUM('ACTIVE', 'COMPLETED', name='uploadstatus', create_type=False)
+    upload_status_enum.create(op.get_bind(), checkfirst=True)
+
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'resumable_uploads' not in existing_tables:
+        op.create_table(
+            'resumable_uploads',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('created_by', sa.String(length=64), nullable=True),
+            sa.Column('object_name', sa.String(length=255), nullable=False),
+            sa.Column('filename', sa.String(length=255), nullable=False),
+            sa.Column('content_type', sa.String(length=255), nullable=True),
+            sa.Column('fields', postgresql.JSONB(), nullable=False),
+            sa.Column('upload_length', sa.BigInteger(), nullable=False),
+            sa.Column('upload_offset', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('s3_upload_id', sa.Text(), nullable=False),
+            sa.Column('part_etags', postgresql.ARRAY(sa.String(length=128)), nullable=False, server_default='{}'),
+            sa.Column('tail_size', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('status', upload_status_enum, nullable=False, server_default='ACTIVE'),
+            sa.Column('study_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('image_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        )
+        op.create_index('ix_resumable_uploads_expires_at', 'resumable_uploads', ['expires_at'])
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'resumable_uploads' in existing_tables:
+        try:
+            op.drop_index('ix_resumable_uploads_expires_at', table_name='resumable_uploads')
+        except Exception:
+            pass  # Index might not exist
+        op.drop_table('resumable_uploads')
+
+    # Drop enum type if it exists
+    upload_status_enum = postgresql.ENUM(name='uploadstatus')
+    upload_status_enum.drop(op.get_bind(), checkfirst=True)
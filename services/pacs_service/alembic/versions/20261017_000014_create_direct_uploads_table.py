@@ -0,0 +1,55 @@
+"""create direct uploads table
+
+Revision ID: 20261017_000014
+Revises: 20261017_000013
+Create Date: 2026-10-17 00:00:14.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000014'
+down_revision: Union[str, None] = '20261017_000013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Shared with resumable_uploads; create it if that migration was skipped
+    upload_status_enum = postgresql.ENUM('ACTIVE', 'COMPLETED', name='uploadstatus', create_type=False)
+    upload_status_enum.create(op.get_bind(), checkfirst=True)
+
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'direct_uploads' not in existing_tables:
+        op.create_table(
+            'direct_uploads',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('created_by', sa.String(length=64), nullable=True),
+            sa.Column('fields', postgresql.JSONB(), nullable=False),
+            sa.Column('objects', postgresql.JSONB(), nullable=False),
+            sa.Column('status', upload_status_enum, nullable=False, server_default='ACTIVE'),
+            sa.Column('study_id', postgresql.UUID(as_uuid=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        )
+        op.create_index('ix_direct_uploads_expires_at', 'direct_uploads', ['expires_at'])
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'direct_uploads' in existing_tables:
+        try:
+            op.drop_index('ix_direct_uploads_expires_at', table_name='direct_uploads')
+        except Exception:
+            pass  # Index might not exist
+        op.drop_table('direct_uploads')
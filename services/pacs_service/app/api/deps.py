@@ -1,18 +1,20 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from jose.exceptions import ExpiredSignatureError, JWTError
+
+from shared.jwt_cache import build_current_user_dependency, decoder_from_settings
 
 from app.core.config import settings
 
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_user_payload(token: str = Depends(oauth2_scheme)) -> dict:
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
-    except ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+token_decoder = decoder_from_settings(settings)
+
+get_current_user_payload = build_current_user_dependency(token_decoder, oauth2_scheme)
+
 
+def token_subject(token_payload: dict) -> Optional[str]:
+    """The token's ``sub``, recorded as the owner of uploads."""
+    sub = token_payload.get("sub")
+    return str(sub) if sub is not None else None
@@ -0,0 +1,364 @@
+"""Two-phase uploads straight from the client to MinIO.
+
+``POST /direct-uploads/`` takes the study fields and the list of files and
+returns presigned URLs: a form POST (size enforced by MinIO) or a PUT for
+files up to one part, and one PUT URL per part of an S3 multipart upload for
+larger ones. The client sends the bytes to MinIO itself, then calls
+``/complete`` with the part ETags; the service completes the multipart
+uploads, checks every object's size and writes the study and all image rows
+in one transaction. No image byte passes through this service.
+
+URLs expire after ``direct_upload_url_ttl_seconds`` but the upload is kept for
+``direct_upload_session_ttl_hours``: ``/urls`` signs new URLs for the files
+not uploaded yet, so a large series on a slow link can outlast any one URL.
+"""
+
+import asyncio
+import logging
+import mimetypes
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import PurePosixPath
+from typing import List, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user_payload, token_subject
+from app.api.v1.endpoints.studies import BUCKET_NAME, STUDY_FIELDS
+from app.core.config import settings
+from app.core.s3_client import AsyncS3, ensure_bucket, get_async_s3, get_presign_client
+from app.core.streaming_upload import UploadedObject
+from app.crud import direct_upload_crud
+from app.crud.study_crud import create_study_with_images
+from app.db.session import get_session
+from app.models.pacs_models import DirectUpload, Image, Study, UploadStatus
+from app.schemas.direct_upload_schema import (
+    DirectUploadComplete,
+    DirectUploadCreate,
+    DirectUploadImage,
+    DirectUploadPublic,
+    DirectUploadResult,
+    DirectUploadTarget,
+    PresignedMultipart,
+    PresignedPart,
+    PresignedPost,
+)
+
+logger = logging.getLogger(__name__)
+
+# Expired uploads cleaned up each time a new one is created
+PURGE_BATCH = 20
+
+router = APIRouter()
+
+
+def _presign_single(key: str, size: int, content_type: Optional[str]) -> dict:
+    s3 = get_presign_client()
+    ttl = settings.direct_upload_url_ttl_seconds
+    fields = {"Content-Type": content_type} if content_type else {}
+    post = s3.generate_presigned_post(
+        BUCKET_NAME,
+        key,
+        Fields=fields,
+        Conditions=[["content-length-range", size, size], *({k: v} for k, v in fields.items())],
+        ExpiresIn=ttl,
+    )
+    params = {"Bucket": BUCKET_NAME, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    put_url = s3.generate_presigned_url("put_object", Params=params, ExpiresIn=ttl)
+    return {"post": PresignedPost(url=post["url"], fields=post["fields"]), "put_url": put_url}
+
+
+def _presign_parts(key: str, upload_id: str, size: int, part_size: int) -> PresignedMultipart:
+    s3 = get_presign_client()
+    parts = [
+        PresignedPart(
+            part_number=number,
+            url=s3.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": BUCKET_NAME, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                ExpiresIn=settings.direct_upload_url_ttl_seconds,
+            ),
+        )
+        for number in range(1, -(-size // part_size) + 1)
+    ]
+    return PresignedMultipart(upload_id=upload_id, part_size=part_size, parts=parts)
+
+
+def _presign_targets(objects: List[dict]) -> List[DirectUploadTarget]:
+    # Signing is local but adds up over a series; callers run this off the event loop
+    targets = []
+    for obj in objects:
+        target = DirectUploadTarget(filename=obj["filename"], object_name=obj["key"], size=obj["size"])
+        if obj["upload_id"]:
+            # Uploads created before part sizes were stored used the setting of the day
+            part_size = obj.get("part_size") or settings.upload_part_size_bytes
+            target.multipart = _presign_parts(obj["key"], obj["upload_id"], obj["size"], part_size)
+        else:
+            for name, value in _presign_single(obj["key"], obj["size"], obj["content_type"]).items():
+                setattr(target, name, value)
+        targets.append(target)
+    return targets
+
+
+def _urls_expire_at() -> datetime:
+    # Taken before signing, so it is never later than the URLs' real expiry
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.direct_upload_url_ttl_seconds)
+
+
+async def _drop_objects(s3: AsyncS3, objects: List[dict]) -> None:
+    """Abort unfinished multipart uploads and delete whatever was uploaded, logging failures."""
+    for obj in objects:
+        if obj["upload_id"]:
+            try:
+                await s3.abort_multipart_upload(Bucket=BUCKET_NAME, Key=obj["key"], UploadId=obj["upload_id"])
+            except Exception as e:
+                # Already completed or aborted
+                logger.info(f"Could not abort multipart upload of {obj['key']}: {e}")
+    keys = [{"Key": obj["key"]} for obj in objects]
+    for i in range(0, len(keys), 1000):
+        try:
+            await s3.delete_objects(Bucket=BUCKET_NAME, Delete={"Objects": keys[i : i + 1000], "Quiet": True})
+        except Exception as e:
+            logger.warning(f"Could not delete {len(keys[i : i + 1000])} objects of a direct upload: {e}")
+
+
+async def _purge_expired(db: AsyncSession) -> None:
+    s3 = get_async_s3()
+    now = datetime.now(timezone.utc)
+    for upload in await direct_upload_crud.list_expired_direct_uploads(db, now=now, limit=PURGE_BATCH):
+        if upload.status == UploadStatus.ACTIVE:
+            await _drop_objects(s3, upload.objects)
+        await db.delete(upload)
+    await db.commit()
+
+
+async def _load(db: AsyncSession, upload_id: uuid.UUID, token_payload: dict) -> DirectUpload:
+    try:
+        upload = await direct_upload_crud.get_direct_upload(db, upload_id=upload_id, for_update=True)
+    except OperationalError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This upload is being completed already")
+    if upload is None or upload.created_by != token_subject(token_payload):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    # A completed upload keeps answering /complete until it is purged
+    if upload.status == UploadStatus.ACTIVE and upload.expires_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Upload expired")
+    return upload
+
+
+async def _object_size(s3: AsyncS3, key: str) -> Optional[int]:
+    try:
+        return (await s3.head_object(Bucket=BUCKET_NAME, Key=key))["ContentLength"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+async def _complete_parts(s3: AsyncS3, obj: dict, parts: List[dict]) -> None:
+    try:
+        await s3.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=obj["key"],
+            UploadId=obj["upload_id"],
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": p["part_number"], "ETag": p["etag"]}
+                    for p in sorted(parts, key=lambda p: p["part_number"])
+                ]
+            },
+        )
+    except ClientError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Could not complete {obj['filename']}: {e.response['Error'].get('Message', e)}",
+        )
+
+
+async def _result(db: AsyncSession, upload: DirectUpload) -> DirectUploadResult:
+    """The study an already completed upload created."""
+    study = await db.get(Study, upload.study_id)
+    images = (await db.scalars(select(Image).where(Image.study_id == upload.study_id))).all()
+    by_key = {obj["key"]: obj for obj in upload.objects}
+    return DirectUploadResult(
+        patient_id=study.patient_id,
+        study_id=study.id,
+        images=[
+            DirectUploadImage(
+                image_id=image.id,
+                object_name=image.object_name,
+                filename=by_key[image.object_name]["filename"],
+                size=by_key[image.object_name]["size"],
+            )
+            for image in images
+            if image.object_name in by_key
+        ],
+    )
+
+
+@router.post("/", response_model=DirectUploadPublic, status_code=201)
+async def create_direct_upload(
+    payload: DirectUploadCreate,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    if len(payload.files) > settings.upload_max_series_files:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A study can have at most {settings.upload_max_series_files} images",
+        )
+    too_large = [f.filename for f in payload.files if f.size > settings.direct_upload_max_file_bytes]
+    if too_large:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Files over {settings.direct_upload_max_file_bytes} bytes: {', '.join(too_large)}",
+        )
+
+    await ensure_bucket(BUCKET_NAME)
+    await _purge_expired(db)
+
+    s3 = get_async_s3()
+    objects = []
+    for file in payload.files:
+        objects.append(
+            {
+                "key": f"{uuid.uuid4()}_{PurePosixPath(file.filename).name[:200]}",
+                "filename": file.filename,
+                "content_type": file.content_type or mimetypes.guess_type(file.filename)[0],
+                "size": file.size,
+                "upload_id": None,
+                # Kept so that URLs signed later cut the file the same way
+                "part_size": None,
+            }
+        )
+    large = [obj for obj in objects if obj["size"] > settings.upload_part_size_bytes]
+    try:
+        results = await asyncio.gather(
+            *(
+                s3.create_multipart_upload(
+                    Bucket=BUCKET_NAME,
+                    Key=obj["key"],
+                    **({"ContentType": obj["content_type"]} if obj["content_type"] else {}),
+                )
+                for obj in large
+            ),
+            return_exceptions=True,
+        )
+        for obj, res in zip(large, results):
+            if not isinstance(res, BaseException):
+                obj["upload_id"] = res["UploadId"]
+                obj["part_size"] = settings.upload_part_size_bytes
+        for res in results:
+            if isinstance(res, BaseException):
+                raise res
+
+        urls_expire_at = _urls_expire_at()
+        targets = await s3.run(_presign_targets, objects)
+        upload = await direct_upload_crud.create_direct_upload(
+            db,
+            upload_id=uuid.uuid4(),
+            created_by=token_subject(token_payload),
+            fields={name: getattr(payload, name) for name in STUDY_FIELDS},
+            objects=objects,
+            ttl=timedelta(hours=settings.direct_upload_session_ttl_hours),
+        )
+    except Exception:
+        await _drop_objects(s3, objects)
+        raise
+
+    return DirectUploadPublic(
+        upload_id=upload.id, expires_at=upload.expires_at, urls_expire_at=urls_expire_at, files=targets
+    )
+
+
+@router.post("/{upload_id}/urls", response_model=DirectUploadPublic)
+async def renew_direct_upload_urls(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """New URLs for the files not uploaded yet, and a new lifetime for the upload.
+
+    Files already in MinIO at their declared size are left out. Multipart files
+    get a URL for every part; parts sent before stay valid with their ETags.
+    """
+    upload = await _load(db, upload_id, token_payload)
+    if upload.status == UploadStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This upload is completed already")
+
+    s3 = get_async_s3()
+    sizes = await asyncio.gather(*(_object_size(s3, obj["key"]) for obj in upload.objects))
+    # A multipart object exists only once completed, after which its parts cannot be sent again
+    unfinished = [
+        obj
+        for obj, size in zip(upload.objects, sizes)
+        if (size is None if obj["upload_id"] else size != obj["size"])
+    ]
+    urls_expire_at = _urls_expire_at()
+    targets = await s3.run(_presign_targets, unfinished)
+    upload = await direct_upload_crud.extend_direct_upload(
+        db, upload, ttl=timedelta(hours=settings.direct_upload_session_ttl_hours)
+    )
+    return DirectUploadPublic(
+        upload_id=upload.id, expires_at=upload.expires_at, urls_expire_at=urls_expire_at, files=targets
+    )
+
+
+@router.post("/{upload_id}/complete", response_model=DirectUploadResult)
+async def complete_direct_upload(
+    upload_id: uuid.UUID,
+    payload: DirectUploadComplete,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Register the uploaded files as a study; safe to call again after fixing a failed file."""
+    upload = await _load(db, upload_id, token_payload)
+    if upload.status == UploadStatus.COMPLETED:
+        return await _result(db, upload)
+
+    s3 = get_async_s3()
+    sizes = await asyncio.gather(*(_object_size(s3, obj["key"]) for obj in upload.objects))
+
+    # Multipart objects appear once their upload is completed with the client's ETags
+    pending = [obj for obj, size in zip(upload.objects, sizes) if size is None and obj["upload_id"]]
+    missing_parts = [obj["filename"] for obj in pending if obj["key"] not in payload.parts]
+    if missing_parts:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Part ETags are missing for: {', '.join(missing_parts)}",
+        )
+    await asyncio.gather(
+        *(_complete_parts(s3, obj, [p.model_dump() for p in payload.parts[obj["key"]]]) for obj in pending)
+    )
+    if pending:
+        sizes = await asyncio.gather(*(_object_size(s3, obj["key"]) for obj in upload.objects))
+
+    wrong = [obj["filename"] for obj, size in zip(upload.objects, sizes) if size != obj["size"]]
+    if wrong:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Not uploaded or of the wrong size: {', '.join(wrong)}",
+        )
+
+    images = [
+        UploadedObject(key=obj["key"], filename=obj["filename"], content_type=obj["content_type"], size=obj["size"])
+        for obj in upload.objects
+    ]
+    patient, study, image_ids = await create_study_with_images(db, fields=dict(upload.fields), objects=images)
+    upload.status = UploadStatus.COMPLETED
+    upload.study_id = study.id
+    await db.commit()
+
+    return DirectUploadResult(
+        patient_id=patient.id,
+        study_id=study.id,
+        images=[
+            DirectUploadImage(image_id=image_id, object_name=obj.key, filename=obj.filename, size=obj.size)
+            for image_id, obj in zip(image_ids, images)
+        ],
+    )
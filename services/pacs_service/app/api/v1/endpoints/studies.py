@@ -1,81 +1,265 @@
+import mimetypes
 import uuid
-from datetime import datetime
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from pathlib import PurePosixPath
+from typing import Dict, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.db.session import get_session
+from app.crud.study_crud import create_study_with_images
 from app.models.pacs_models import Patient, Study, Image
-from app.core.s3_client import upload_file, create_bucket_if_not_exists, generate_presigned_url
+from app.core.s3_client import ensure_bucket, generate_presigned_url, get_async_s3
 from app.core.sms_client import send_sms
 from app.core.config import settings
+from app.core.streaming_upload import (
+    BatchUpload,
+    FilePart,
+    InvalidMultipartBody,
+    MultipartUploadWriter,
+    TarStream,
+    UploadedObject,
+    stream_form,
+)
 from app.api.deps import get_current_user_payload
 
 BUCKET_NAME = "pacs-images"
 
+STUDY_FIELDS = ("patient_full_name", "patient_national_id", "patient_phone_number", "study_description")
+IMAGE_FIELD = "image_file"
+SERIES_FIELD = "image_files"
+
+# Files in image_files that are unpacked instead of stored as they are
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz")
+ARCHIVE_TYPES = ("application/x-tar", "application/gzip", "application/x-gzip", "application/x-gtar")
+
+
+def _form_body(file_field: str, file_schema: dict) -> dict:
+    # The body is parsed by hand, so the form is described for the docs here
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [*STUDY_FIELDS, file_field],
+                        "properties": {
+                            **{name: {"type": "string"} for name in STUDY_FIELDS},
+                            file_field: file_schema,
+                        },
+                    }
+                }
+            },
+        }
+    }
+
+
+UPLOAD_STUDY_BODY = _form_body(IMAGE_FIELD, {"type": "string", "format": "binary"})
+UPLOAD_SERIES_BODY = _form_body(
+    SERIES_FIELD,
+    {
+        "type": "array",
+        "items": {"type": "string", "format": "binary"},
+        "description": "Image files, or .tar / .tar.gz archives of them",
+    },
+)
+
 router = APIRouter()
 
-@router.post("/", status_code=201)
+
+def _check_fields(fields: Dict[str, str], file_field: str, has_file: bool) -> None:
+    missing = [name for name in STUDY_FIELDS if name not in fields]
+    if not has_file:
+        missing.append(file_field)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing form fields: {', '.join(missing)}",
+        )
+
+
+def _upload_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, InvalidMultipartBody):
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return HTTPException(status_code=500, detail=f"Failed to upload image: {e}")
+
+
+def _form_events(request: Request):
+    return stream_form(
+        request.stream(),
+        request.headers.get("content-type", ""),
+        max_field_size=settings.upload_max_field_bytes,
+    )
+
+
+async def _stream_image(request: Request):
+    """Stream the form's image into MinIO; returns the form fields and the writer."""
+    fields = {}
+    image = None
+    writer = None
+    try:
+        async for kind, value in _form_events(request):
+            if kind == "field":
+                name, text = value
+                fields[name] = text
+            elif kind == "file":
+                if value.field_name != IMAGE_FIELD or writer is not None:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"Expected a single file in {IMAGE_FIELD}",
+                    )
+                image = value
+                writer = MultipartUploadWriter(
+                    get_async_s3(),
+                    BUCKET_NAME,
+                    f"{uuid.uuid4()}_{value.filename}",
+                    content_type=value.content_type,
+                    part_size=settings.upload_part_size_bytes,
+                    max_parallel=settings.upload_max_parallel_parts,
+                )
+                await writer.start()
+            elif kind == "data":
+                await writer.write(value)
+            else:
+                await writer.complete()
+        _check_fields(fields, IMAGE_FIELD, image is not None)
+    except Exception as e:
+        if writer is not None:
+            await writer.abort()
+        raise _upload_error(e)
+    return fields, image, writer
+
+
+def _is_archive(part: FilePart) -> bool:
+    return (part.filename or "").lower().endswith(ARCHIVE_SUFFIXES) or part.content_type in ARCHIVE_TYPES
+
+
+async def _open_series_object(batch: BatchUpload, filename: str, content_type) -> None:
+    if len(batch.objects) >= settings.upload_max_series_files:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A series can have at most {settings.upload_max_series_files} images",
+        )
+    # Archive members keep only their base name; the UUID prefix keeps keys unique
+    name = PurePosixPath(filename).name[:200]
+    await batch.open(
+        f"{uuid.uuid4()}_{name}",
+        filename,
+        content_type or mimetypes.guess_type(name)[0],
+    )
+
+
+async def _stream_series(request: Request) -> Tuple[Dict[str, str], List[UploadedObject], BatchUpload]:
+    """Stream every file (and archive member) of the form into MinIO, several at a time."""
+    fields = {}
+    batch = BatchUpload(
+        get_async_s3(),
+        BUCKET_NAME,
+        part_size=settings.upload_part_size_bytes,
+        max_parallel_parts=settings.upload_max_parallel_parts,
+        max_concurrent=settings.upload_max_concurrent_objects,
+    )
+    archive = None
+    try:
+        async for kind, value in _form_events(request):
+            if kind == "field":
+                name, text = value
+                fields[name] = text
+            elif kind == "file":
+                if value.field_name != SERIES_FIELD:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"Files are expected in {SERIES_FIELD}",
+                    )
+                if _is_archive(value):
+                    archive = TarStream(
+                        max_header_size=settings.upload_max_field_bytes,
+                        max_size=settings.upload_max_archive_bytes,
+                    )
+                else:
+                    await _open_series_object(batch, value.filename, value.content_type)
+            elif kind == "data" and archive is None:
+                await batch.write(value)
+            elif kind == "data":
+                for member_kind, member in archive.feed(value):
+                    if member_kind == "file":
+                        await _open_series_object(batch, member[0], None)
+                    elif member_kind == "data":
+                        await batch.write(member)
+                    else:
+                        await batch.close()
+            elif archive is None:
+                await batch.close()
+            else:
+                archive.finish()
+                archive = None
+        _check_fields(fields, SERIES_FIELD, bool(batch.objects))
+        objects = await batch.finish()
+    except Exception as e:
+        await batch.abort()
+        raise _upload_error(e)
+    return fields, objects, batch
+
+
+@router.post("/", status_code=201, openapi_extra=UPLOAD_STUDY_BODY)
 async def upload_study(
-    patient_full_name: str = Form(...),
-    patient_national_id: str = Form(...),
-    patient_phone_number: str = Form(...),
-    study_description: str = Form(...),
-    image_file: UploadFile = File(...),
+    request: Request,
     db: AsyncSession = Depends(get_session),
     token_payload: dict = Depends(get_current_user_payload),
 ):
-    # Ensure bucket exists
-    create_bucket_if_not_exists(BUCKET_NAME)
+    # Ensure bucket exists (cached after the first upload)
+    await ensure_bucket(BUCKET_NAME)
 
-    # Find or create patient
-    result = await db.execute(select(Patient).where(Patient.national_id == patient_national_id))
-    patient = result.scalar_one_or_none()
-    if not patient:
-        patient = Patient(
-            full_name=patient_full_name,
-            national_id=patient_national_id,
-            phone_number=patient_phone_number,
-        )
-        db.add(patient)
-        await db.commit()
-        await db.refresh(patient)
-
-    # Create study
-    study = Study(
-        patient_id=patient.id,
-        clinic_id=uuid.uuid4(),  # Placeholder, should come from context
-        description=study_description,
-        study_date=datetime.utcnow(),
+    # The image goes to MinIO while the body arrives, before any row is written
+    fields, image_part, writer = await _stream_image(request)
+
+    image = UploadedObject(
+        key=writer.key, filename=image_part.filename, content_type=image_part.content_type, size=writer.size
     )
-    db.add(study)
-    await db.commit()
-    await db.refresh(study)
+    try:
+        patient, study, [image_id] = await create_study_with_images(db, fields=fields, objects=[image])
+        await db.commit()
+    except Exception:
+        # Do not leave an object no row points to
+        await writer.abort()
+        raise
+
+    return {
+        "patient_id": str(patient.id),
+        "study_id": str(study.id),
+        "image_id": str(image_id),
+        "object_name": writer.key,
+    }
+
+
+@router.post("/series", status_code=201, openapi_extra=UPLOAD_SERIES_BODY)
+async def upload_series(
+    request: Request,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Upload a whole series (many files or tar archives) as one study."""
+    await ensure_bucket(BUCKET_NAME)
+
+    fields, objects, batch = await _stream_series(request)
 
-    # Prepare upload
-    object_name = f"{uuid.uuid4()}_{image_file.filename}"
     try:
-        await image_file.seek(0)
-        upload_file(image_file.file, BUCKET_NAME, object_name)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload image: {e}")
-
-    # Create image record
-    image = Image(
-        study_id=study.id,
-        object_name=object_name,
-        file_format=image_file.content_type or "unknown",
-        upload_timestamp=datetime.utcnow(),
-    )
-    db.add(image)
-    await db.commit()
-    await db.refresh(image)
+        patient, study, image_ids = await create_study_with_images(db, fields=fields, objects=objects)
+        await db.commit()
+    except Exception:
+        await batch.abort()
+        raise
 
     return {
         "patient_id": str(patient.id),
         "study_id": str(study.id),
-        "image_id": str(image.id),
-        "object_name": object_name,
+        "images": [
+            {"image_id": str(image_id), "object_name": obj.key, "filename": obj.filename, "size": obj.size}
+            for image_id, obj in zip(image_ids, objects)
+        ],
     }
 
 
@@ -0,0 +1,335 @@
+"""Resumable study uploads following the tus 1.0 core protocol.
+
+POST creates an upload from ``Upload-Length`` and ``Upload-Metadata`` (the
+study form fields, ``filename`` and optionally ``filetype``), PATCH appends
+bytes at ``Upload-Offset``, HEAD reports how far it got and DELETE drops it
+(the tus termination extension). When the last byte arrives the object is
+completed and the patient, study and image rows are created as for
+``POST /studies/``.
+
+Each upload is an S3 multipart upload whose ID and part ETags are kept in
+``resumable_uploads``. Bytes that do not fill a part yet are stored in a
+temporary ``.partial`` object, so every byte acknowledged in ``Upload-Offset``
+survives a dropped connection and a PATCH never holds more than about one
+part per parallel slot in memory.
+"""
+
+import base64
+import binascii
+import logging
+import mimetypes
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import PurePosixPath
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from app.api.deps import get_current_user_payload, token_subject
+from app.api.v1.endpoints.studies import BUCKET_NAME, STUDY_FIELDS
+from app.core.config import settings
+from app.core.s3_client import AsyncS3, ensure_bucket, get_async_s3, read_object
+from app.core.streaming_upload import MultipartUploadWriter, UploadedObject
+from app.crud import upload_crud
+from app.crud.study_crud import create_study_with_images
+from app.db.session import get_session
+from app.models.pacs_models import ResumableUpload, UploadStatus
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = "1.0.0"
+TUS_CONTENT_TYPE = "application/offset+octet-stream"
+# Expired uploads cleaned up each time a new one is created
+PURGE_BATCH = 20
+
+router = APIRouter()
+
+
+def _tail_key(upload: ResumableUpload) -> str:
+    # Named after the offset it ends at, so a tail written by a PATCH that then
+    # failed to commit never replaces the one the database points to
+    return f"{upload.object_name}.{upload.upload_offset}.partial"
+
+
+def _upload_headers(upload: ResumableUpload) -> Dict[str, str]:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(upload.upload_offset),
+        "Upload-Length": str(upload.upload_length),
+        "Upload-Expires": format_datetime(upload.expires_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def _int_header(request: Request, name: str) -> int:
+    value = request.headers.get(name, "")
+    if not value.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{name} must be a non-negative integer")
+    return int(value)
+
+
+def _parse_metadata(header: str) -> Dict[str, str]:
+    """``Upload-Metadata``: comma-separated ``key base64(value)`` pairs."""
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Upload-Metadata value of {key!r} is not base64-encoded UTF-8",
+            )
+    return metadata
+
+
+async def _load(
+    db: AsyncSession, upload_id: uuid.UUID, token_payload: dict, *, for_update: bool = False
+) -> ResumableUpload:
+    try:
+        upload = await upload_crud.get_upload(db, upload_id=upload_id, for_update=for_update)
+    except OperationalError:
+        # The row is locked by a PATCH still in progress
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another request is writing to this upload")
+    if upload is None or upload.created_by != token_subject(token_payload):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if upload.expires_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Upload expired")
+    return upload
+
+
+async def _drop_objects(s3: AsyncS3, upload: ResumableUpload) -> None:
+    """Abort the multipart upload and delete its tail, logging failures."""
+    try:
+        await s3.abort_multipart_upload(Bucket=BUCKET_NAME, Key=upload.object_name, UploadId=upload.s3_upload_id)
+    except Exception as e:
+        logger.warning(f"Could not abort multipart upload of {upload.object_name}: {e}")
+    if upload.tail_size:
+        await _delete_tail(s3, _tail_key(upload))
+
+
+async def _delete_tail(s3: AsyncS3, key: str) -> None:
+    try:
+        await s3.delete_object(Bucket=BUCKET_NAME, Key=key)
+    except Exception as e:
+        logger.warning(f"Could not delete {key}: {e}")
+
+
+async def _discard_completed(
+    db: AsyncSession, upload_id: uuid.UUID, writer: MultipartUploadWriter, tail: Optional[str]
+) -> None:
+    """Drop an upload whose object was completed but whose study was not saved.
+
+    Its multipart upload no longer exists, so the row could never be resumed;
+    the object goes too, as nothing refers to it.
+    """
+    await writer.abort()
+    if tail:
+        await _delete_tail(get_async_s3(), tail)
+    try:
+        await upload_crud.delete_upload(db, upload_id=upload_id)
+    except Exception as e:
+        # Purged when it expires; until then PATCH keeps failing
+        logger.warning(f"Could not delete upload {upload_id}: {e}")
+
+
+async def _purge_expired(db: AsyncSession) -> None:
+    s3 = get_async_s3()
+    for upload in await upload_crud.list_expired_uploads(db, now=datetime.now(timezone.utc), limit=PURGE_BATCH):
+        if upload.status == UploadStatus.ACTIVE:
+            await _drop_objects(s3, upload)
+        await db.delete(upload)
+    await db.commit()
+
+
+@router.post("/", status_code=201)
+async def create_upload(
+    request: Request,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    length = _int_header(request, "Upload-Length")
+    if not 0 < length <= settings.resumable_upload_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload-Length must be between 1 and {settings.resumable_upload_max_bytes}",
+        )
+    metadata = _parse_metadata(request.headers.get("Upload-Metadata", ""))
+    missing = [name for name in (*STUDY_FIELDS, "filename") if not metadata.get(name)]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Missing Upload-Metadata keys: {', '.join(missing)}",
+        )
+
+    await ensure_bucket(BUCKET_NAME)
+    await _purge_expired(db)
+
+    filename = metadata["filename"]
+    content_type = metadata.get("filetype") or mimetypes.guess_type(filename)[0]
+    writer = MultipartUploadWriter(
+        get_async_s3(),
+        BUCKET_NAME,
+        f"{uuid.uuid4()}_{PurePosixPath(filename).name[:200]}",
+        content_type=content_type,
+        part_size=settings.upload_part_size_bytes,
+        max_parallel=settings.upload_max_parallel_parts,
+    )
+    await writer.start()
+    try:
+        upload = await upload_crud.create_upload(
+            db,
+            created_by=token_subject(token_payload),
+            object_name=writer.key,
+            filename=filename,
+            content_type=content_type,
+            fields={name: metadata[name] for name in STUDY_FIELDS},
+            upload_length=length,
+            s3_upload_id=writer.upload_id,
+            ttl=timedelta(hours=settings.resumable_upload_ttl_hours),
+        )
+    except Exception:
+        await writer.abort()
+        raise
+
+    headers = {**_upload_headers(upload), "Location": f"{request.url.path.rstrip('/')}/{upload.id}"}
+    return Response(status_code=201, headers=headers)
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    upload = await _load(db, upload_id, token_payload)
+    return Response(status_code=200, headers=_upload_headers(upload))
+
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Upload progress, and the study and image created once it completes."""
+    upload = await _load(db, upload_id, token_payload)
+    return {
+        "upload_id": str(upload.id),
+        "filename": upload.filename,
+        "status": upload.status,
+        "upload_offset": upload.upload_offset,
+        "upload_length": upload.upload_length,
+        "expires_at": upload.expires_at.isoformat(),
+        "study_id": str(upload.study_id) if upload.study_id else None,
+        "image_id": str(upload.image_id) if upload.image_id else None,
+        "object_name": upload.object_name if upload.status == UploadStatus.COMPLETED else None,
+    }
+
+
+@router.patch("/{upload_id}", status_code=204)
+async def append_to_upload(
+    upload_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    if request.headers.get("content-type") != TUS_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Content-Type must be {TUS_CONTENT_TYPE}"
+        )
+    offset = _int_header(request, "Upload-Offset")
+    # Locked until the commit below, so two PATCHes cannot interleave
+    upload = await _load(db, upload_id, token_payload, for_update=True)
+    if offset != upload.upload_offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload-Offset does not match the stored offset",
+            headers=_upload_headers(upload),
+        )
+    if upload.status == UploadStatus.COMPLETED:
+        return Response(status_code=204, headers=_upload_headers(upload))
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and offset + int(declared) > upload.upload_length:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="The chunk goes past Upload-Length")
+
+    s3 = get_async_s3()
+    writer = MultipartUploadWriter(
+        s3,
+        BUCKET_NAME,
+        upload.object_name,
+        content_type=upload.content_type,
+        part_size=settings.upload_part_size_bytes,
+        max_parallel=settings.upload_max_parallel_parts,
+    )
+    writer.resume(upload.s3_upload_id, upload.part_etags)
+    old_tail = _tail_key(upload) if upload.tail_size else None
+    received = 0
+    try:
+        if old_tail:
+            # What the previous PATCH left short of a part goes first
+            await writer.write(await s3.run(read_object, BUCKET_NAME, old_tail))
+        try:
+            async for chunk in request.stream():
+                if offset + received + len(chunk) > upload.upload_length:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="The chunk goes past Upload-Length"
+                    )
+                received += len(chunk)
+                await writer.write(chunk)
+        except ClientDisconnect:
+            # Keep what arrived; the client resumes from the offset HEAD reports
+            logger.info(f"Upload {upload.id} interrupted after {received} bytes")
+
+        upload.upload_offset = offset + received
+        if upload.upload_offset == upload.upload_length:
+            await writer.complete()
+            image = UploadedObject(
+                key=upload.object_name,
+                filename=upload.filename,
+                content_type=upload.content_type,
+                size=upload.upload_length,
+            )
+            _, study, [image_id] = await create_study_with_images(db, fields=dict(upload.fields), objects=[image])
+            upload.status = UploadStatus.COMPLETED
+            upload.study_id, upload.image_id = study.id, image_id
+            upload.tail_size = 0
+        else:
+            upload.part_etags, rest = await writer.flush()
+            if rest:
+                await s3.put_object(Bucket=BUCKET_NAME, Key=_tail_key(upload), Body=rest)
+            upload.tail_size = len(rest)
+        upload.expires_at = datetime.now(timezone.utc) + timedelta(hours=settings.resumable_upload_ttl_hours)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        if writer.completed:
+            await _discard_completed(db, upload_id, writer, old_tail)
+        else:
+            # The stored state still describes the last good offset
+            await writer.cancel()
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to store upload data: {e}")
+
+    if old_tail and not (upload.tail_size and _tail_key(upload) == old_tail):
+        await _delete_tail(s3, old_tail)
+    return Response(status_code=204, headers=_upload_headers(upload))
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def terminate_upload(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    upload = await _load(db, upload_id, token_payload, for_update=True)
+    if upload.status == UploadStatus.ACTIVE:
+        await _drop_objects(get_async_s3(), upload)
+    await db.delete(upload)
+    await db.commit()
+    return Response(status_code=204, headers={"Tus-Resumable": TUS_VERSION})
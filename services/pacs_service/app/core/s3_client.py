@@ -1,36 +1,193 @@
-import os
+"""MinIO (S3) access for pacs_service.
+
+Each process owns one boto3 client: call ``init_s3`` at startup (FastAPI
+lifespan) and ``close_s3`` on shutdown, and use ``get_s3_client`` or
+``get_async_s3`` everywhere else. Building a client resolves credentials,
+loads the endpoint model and opens a new HTTP pool, which costs tens of
+milliseconds per call; boto3 clients are thread-safe, so one is shared.
+
+Presigned URLs handed to clients are signed by a second client configured
+for ``minio_public_url``, since the signature covers the host; signing makes
+no requests, so that client never opens a connection.
+
+``AsyncS3`` runs the shared client's calls on a thread pool as large as its
+connection pool, so async code never blocks the event loop and never queues
+for a connection inside botocore.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.core.config import settings
 
-MINIO_ENDPOINT_URL = os.getenv("MINIO_ENDPOINT_URL", "http://minio:9000")
-MINIO_ACCESS_KEY = os.getenv("MINIO_ROOT_USER", settings.model_config.get("MINIO_ROOT_USER", "minioadmin"))
-MINIO_SECRET_KEY = os.getenv("MINIO_ROOT_PASSWORD", settings.model_config.get("MINIO_ROOT_PASSWORD", "minioadmin"))
+_client: Optional[Any] = None
+_presign_client: Optional[Any] = None
+_async_s3: Optional["AsyncS3"] = None
+
+
+class AsyncS3:
+    """Awaitable view of a boto3 client: ``await s3.upload_part(...)``."""
+
+    def __init__(self, client: Any, max_workers: int) -> None:
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3")
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        async def call(**kwargs):
+            return await self.run(method, **kwargs)
+
+        return call
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class BucketCache:
+    """Buckets known to exist, so an upload is not preceded by a HEAD request."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, bucket: str) -> bool:
+        with self._lock:
+            expires = self._expires.get(bucket)
+            if expires is not None and expires > time.monotonic():
+                self.hits += 1
+                return True
+            self._expires.pop(bucket, None)
+            self.misses += 1
+            return False
+
+    def add(self, bucket: str) -> None:
+        with self._lock:
+            self._expires[bucket] = time.monotonic() + self.ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._expires), "hits": self.hits, "misses": self.misses}
+
 
+bucket_cache = BucketCache(settings.s3_bucket_cache_ttl_seconds)
 
-def get_s3_client():
+
+def _build_client(endpoint_url: str) -> Any:
     return boto3.client(
         "s3",
-        endpoint_url=MINIO_ENDPOINT_URL,
-        aws_access_key_id=MINIO_ACCESS_KEY,
-        aws_secret_access_key=MINIO_SECRET_KEY,
+        endpoint_url=endpoint_url,
+        aws_access_key_id=settings.minio_root_user,
+        aws_secret_access_key=settings.minio_root_password,
         region_name="us-east-1",
+        config=Config(
+            max_pool_connections=settings.s3_max_pool_connections,
+            connect_timeout=settings.s3_connect_timeout_seconds,
+            read_timeout=settings.s3_read_timeout_seconds,
+            retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+            signature_version="s3v4",
+        ),
     )
 
 
-def create_bucket_if_not_exists(bucket_name: str):
+def init_s3() -> Any:
+    """Create the process-wide S3 clients and the async wrapper (idempotent)."""
+    global _client, _presign_client, _async_s3
+    if _client is None:
+        _client = _build_client(settings.minio_endpoint_url)
+        _presign_client = _build_client(settings.minio_public_url) if settings.minio_public_url else _client
+        _async_s3 = AsyncS3(_client, max_workers=settings.s3_max_pool_connections)
+    return _client
+
+
+def get_s3_client() -> Any:
+    if _client is None:
+        raise RuntimeError("S3 is not initialised; call init_s3() at startup")
+    return _client
+
+
+def get_presign_client() -> Any:
+    """Client for presigned URLs that clients (not this service) will use."""
+    if _presign_client is None:
+        raise RuntimeError("S3 is not initialised; call init_s3() at startup")
+    return _presign_client
+
+
+def get_async_s3() -> AsyncS3:
+    if _async_s3 is None:
+        raise RuntimeError("S3 is not initialised; call init_s3() at startup")
+    return _async_s3
+
+
+def close_s3() -> None:
+    global _client, _presign_client, _async_s3
+    if _async_s3 is not None:
+        _async_s3.shutdown()
+        _async_s3 = None
+    if _presign_client is not None and _presign_client is not _client:
+        _presign_client.close()
+    _presign_client = None
+    if _client is not None:
+        _client.close()
+        _client = None
+    bucket_cache.clear()
+
+
+def _create_bucket(bucket_name: str) -> bool:
+    """HEAD the bucket and create it if missing; True once it is known to exist."""
     s3 = get_s3_client()
     try:
         s3.head_bucket(Bucket=bucket_name)
     except ClientError as e:
-        error_code = int(e.response["Error"]["Code"])
-        if error_code == 404:
-            s3.create_bucket(Bucket=bucket_name)
-        elif error_code == 403:
+        error_code = e.response["Error"]["Code"]
+        if error_code == "404":
+            try:
+                s3.create_bucket(Bucket=bucket_name)
+            except ClientError as e:
+                # Another worker created it first
+                if e.response["Error"]["Code"] not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                    raise
+        elif error_code == "403":
             # Forbidden, bucket may exist but not owned
             raise
-        # else: already exists or other error
+        else:
+            # Unknown state; try again on the next upload
+            return False
+    return True
+
+
+def create_bucket_if_not_exists(bucket_name: str):
+    if bucket_name not in bucket_cache and _create_bucket(bucket_name):
+        bucket_cache.add(bucket_name)
+
+
+async def ensure_bucket(bucket_name: str) -> None:
+    """``create_bucket_if_not_exists`` without a thread hop when the bucket is cached."""
+    if bucket_name not in bucket_cache and await get_async_s3().run(_create_bucket, bucket_name):
+        bucket_cache.add(bucket_name)
+
+
+def read_object(bucket_name: str, object_name: str) -> bytes:
+    return get_s3_client().get_object(Bucket=bucket_name, Key=object_name)["Body"].read()
 
 
 def upload_file(file_object, bucket_name: str, object_name: str):
@@ -39,7 +196,7 @@ def upload_file(file_object, bucket_name: str, object_name: str):
 
 
 def generate_presigned_url(bucket_name: str, object_name: str, expiration_seconds: int = 604800) -> str:
-    s3 = get_s3_client()
+    s3 = get_presign_client()
     try:
         url = s3.generate_presigned_url(
             "get_object",
@@ -0,0 +1,530 @@
+"""Streaming multipart/form-data uploads straight into S3 multipart uploads.
+
+``UploadFile`` makes Starlette spool the whole file to a temporary file before
+the endpoint runs, and boto3's ``upload_fileobj`` then reads it back on the
+event loop. Here the request body is parsed as it arrives: form fields are
+collected in memory (with a size cap), and file bytes are cut into parts of
+``part_size`` that are uploaded through ``AsyncS3`` (the shared client's
+thread pool) while the next part is being received.
+
+At most ``max_parallel`` parts are in flight per file; when they all are, the
+request body is not read further until one finishes. Memory per upload is thus
+bounded by about ``(max_parallel + 1) * part_size`` whatever the file size.
+"""
+
+import asyncio
+import logging
+import tarfile
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects parts below 5 MiB except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class InvalidMultipartBody(Exception):
+    """The request is not a well-formed multipart/form-data body."""
+
+
+class MultipartUploadWriter:
+    """Writes a stream of bytes to one S3 object as a multipart upload.
+
+    ``s3`` is an ``app.core.s3_client.AsyncS3``.
+    """
+
+    def __init__(
+        self, s3: Any, bucket: str, key: str, *, content_type: Optional[str], part_size: int, max_parallel: int
+    ) -> None:
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.size = 0
+        self._slots = asyncio.Semaphore(max_parallel)
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+        self._done: List[Dict[str, Any]] = []
+        self._completed = False
+
+    async def start(self) -> None:
+        extra = {"ContentType": self.content_type} if self.content_type else {}
+        res = await self.s3.create_multipart_upload(Bucket=self.bucket, Key=self.key, **extra)
+        self._upload_id = res["UploadId"]
+
+    @property
+    def upload_id(self) -> Optional[str]:
+        return self._upload_id
+
+    @property
+    def completed(self) -> bool:
+        return self._completed
+
+    def resume(self, upload_id: str, etags: Sequence[str]) -> None:
+        """Continue an upload started earlier, whose parts 1..n have these ETags."""
+        self._upload_id = upload_id
+        self._done = [{"PartNumber": number, "ETag": etag} for number, etag in enumerate(etags, 1)]
+
+    async def _upload_part(self, number: int, data: bytes) -> Dict[str, Any]:
+        try:
+            res = await self.s3.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=number,
+                Body=data,
+            )
+            return {"PartNumber": number, "ETag": res["ETag"]}
+        finally:
+            self._slots.release()
+
+    async def _send(self, data: bytes) -> None:
+        # Waits while max_parallel parts are in flight, which stops the caller reading the body
+        await self._slots.acquire()
+        for task in self._tasks:
+            if task.done() and task.exception() is not None:
+                self._slots.release()
+                raise task.exception()
+        number = len(self._done) + len(self._tasks) + 1
+        self._tasks.append(asyncio.create_task(self._upload_part(number, data)))
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            await self._send(part)
+
+    async def complete(self) -> int:
+        """Upload what is left, complete the object and return its size."""
+        if self._buffer or not (self._tasks or self._done):
+            await self._send(bytes(self._buffer))
+            self._buffer.clear()
+        parts = self._done + list(await asyncio.gather(*self._tasks))
+        await self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        self._completed = True
+        return self.size
+
+    async def flush(self) -> Tuple[List[str], bytes]:
+        """Wait for the parts in flight; the ETags of all parts and the bytes not in a part yet.
+
+        The upload stays open, so it can be continued later with ``resume``.
+        """
+        self._done += await asyncio.gather(*self._tasks)
+        self._tasks = []
+        rest = bytes(self._buffer)
+        self._buffer.clear()
+        return [part["ETag"] for part in self._done], rest
+
+    async def cancel(self) -> None:
+        """Stop the parts in flight without aborting the upload."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def abort(self) -> None:
+        """Drop the upload, or the object if it was already completed."""
+        await self.cancel()
+        if self._upload_id is None:
+            return
+        try:
+            if self._completed:
+                await self.s3.delete_object(Bucket=self.bucket, Key=self.key)
+            else:
+                await self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        except Exception as e:
+            # Leftover parts are removed by the bucket's lifecycle rule, if any
+            logger.warning(f"Could not abort upload of {self.key}: {e}")
+
+
+@dataclass
+class FilePart:
+    field_name: str
+    filename: Optional[str]
+    content_type: Optional[str]
+
+
+@dataclass
+class _Part:
+    headers: Dict[bytes, bytes] = field(default_factory=dict)
+    header_field: bytes = b""
+    header_value: bytes = b""
+
+
+class StreamingFormParser:
+    """Incremental multipart/form-data parser yielding fields and file chunks.
+
+    ``feed`` returns the events completed by a chunk of body: ``("field", (name,
+    value))``, ``("file", FilePart)`` when a file part starts, ``("data", bytes)``
+    for its content and ``("end", None)`` when it ends.
+    """
+
+    def __init__(self, content_type: str, *, max_field_size: int) -> None:
+        media_type, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise InvalidMultipartBody("Expected a multipart/form-data body with a boundary")
+        self.max_field_size = max_field_size
+        self._events: List[Tuple[str, Any]] = []
+        self._part = _Part()
+        self._field: Optional[Tuple[str, bytearray]] = None
+        self._in_file = False
+        self._ended = False
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_end": self._on_end,
+            },
+        )
+
+    def _on_part_begin(self) -> None:
+        self._part = _Part()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._part.header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._part.header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._part.headers[self._part.header_field.lower()] = self._part.header_value
+        self._part.header_field, self._part.header_value = b"", b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._part.headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        if b"filename" in options:
+            content_type = self._part.headers.get(b"content-type")
+            self._in_file = True
+            self._events.append(
+                (
+                    "file",
+                    FilePart(
+                        field_name=name,
+                        filename=options[b"filename"].decode("utf-8", "replace"),
+                        content_type=content_type.decode("latin-1") if content_type else None,
+                    ),
+                )
+            )
+        else:
+            self._field = (name, bytearray())
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._events.append(("data", data[start:end]))
+            return
+        value = self._field[1]
+        value += data[start:end]
+        if len(value) > self.max_field_size:
+            raise InvalidMultipartBody(f"Form field {self._field[0]!r} is too large")
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._events.append(("end", None))
+            self._in_file = False
+        elif self._field is not None:
+            name, value = self._field
+            self._events.append(("field", (name, value.decode("utf-8", "replace"))))
+            self._field = None
+
+    def _on_end(self) -> None:
+        self._ended = True
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Any]]:
+        try:
+            self._parser.write(chunk)
+        except InvalidMultipartBody:
+            raise
+        except Exception as e:
+            raise InvalidMultipartBody(str(e)) from e
+        events, self._events = self._events, []
+        return events
+
+    def finish(self) -> None:
+        if not self._ended:
+            raise InvalidMultipartBody("The multipart body ended before its closing boundary")
+
+
+async def stream_form(
+    body: AsyncIterator[bytes], content_type: str, *, max_field_size: int
+) -> AsyncIterator[Tuple[str, Any]]:
+    """``StreamingFormParser`` events for a whole request body, in order."""
+    parser = StreamingFormParser(content_type, max_field_size=max_field_size)
+    async for chunk in body:
+        for event in parser.feed(chunk):
+            yield event
+    parser.finish()
+
+
+@dataclass
+class UploadedObject:
+    key: str
+    filename: str
+    content_type: Optional[str]
+    size: int = 0
+
+
+class BatchUpload:
+    """Uploads a sequence of objects, several at a time.
+
+    Objects arrive one after another (``open``, ``write``..., ``close``), but
+    closing one does not wait for its upload: objects below ``part_size`` are
+    sent with a single PUT in the background, at most ``max_concurrent`` at a
+    time, and larger ones go through ``MultipartUploadWriter``.
+    """
+
+    def __init__(
+        self, s3: Any, bucket: str, *, part_size: int, max_parallel_parts: int, max_concurrent: int
+    ) -> None:
+        self.s3 = s3
+        self.bucket = bucket
+        self.part_size = part_size
+        self.max_parallel_parts = max_parallel_parts
+        self.objects: List[UploadedObject] = []
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._tasks: List[asyncio.Task] = []
+        self._current: Optional[UploadedObject] = None
+        self._buffer = bytearray()
+        self._writer: Optional[MultipartUploadWriter] = None
+
+    async def open(self, key: str, filename: str, content_type: Optional[str]) -> None:
+        self._current = UploadedObject(key=key, filename=filename, content_type=content_type)
+        self.objects.append(self._current)
+        self._buffer = bytearray()
+        self._writer = None
+
+    async def write(self, data: bytes) -> None:
+        self._current.size += len(data)
+        if self._writer is not None:
+            await self._writer.write(data)
+            return
+        self._buffer += data
+        if len(self._buffer) >= self.part_size:
+            self._writer = MultipartUploadWriter(
+                self.s3,
+                self.bucket,
+                self._current.key,
+                content_type=self._current.content_type,
+                part_size=self.part_size,
+                max_parallel=self.max_parallel_parts,
+            )
+            await self._writer.start()
+            await self._writer.write(bytes(self._buffer))
+            self._buffer = bytearray()
+
+    async def _put(self, obj: UploadedObject, body: bytes) -> None:
+        try:
+            extra = {"ContentType": obj.content_type} if obj.content_type else {}
+            await self.s3.put_object(Bucket=self.bucket, Key=obj.key, Body=body, **extra)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            await self._writer.complete()
+            self._writer = None
+        else:
+            await self._slots.acquire()
+            for task in self._tasks:
+                if task.done() and task.exception() is not None:
+                    self._slots.release()
+                    raise task.exception()
+            self._tasks.append(asyncio.create_task(self._put(self._current, bytes(self._buffer))))
+            self._buffer = bytearray()
+        self._current = None
+
+    async def finish(self) -> List[UploadedObject]:
+        """Wait for the background uploads; the objects in upload order."""
+        await asyncio.gather(*self._tasks)
+        return self.objects
+
+    async def abort(self) -> None:
+        """Drop every object of the batch, uploaded or not."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._writer is not None:
+            await self._writer.abort()
+        keys = [{"Key": obj.key} for obj in self.objects]
+        # DeleteObjects takes at most 1000 keys
+        for i in range(0, len(keys), 1000):
+            try:
+                await self.s3.delete_objects(Bucket=self.bucket, Delete={"Objects": keys[i : i + 1000], "Quiet": True})
+            except Exception as e:
+                logger.warning(f"Could not delete {len(keys[i : i + 1000])} objects of an aborted batch: {e}")
+
+
+class TarStream:
+    """Incremental tar (optionally gzip-compressed) reader.
+
+    ``feed`` yields ``("file", (name, size))`` when a regular member starts,
+    ``("data", bytes)`` for its content and ``("end", None)`` when it ends.
+    Directories, links and other member types are skipped; GNU long names and
+    pax ``path`` records are honoured.
+
+    Compressed input is inflated ``_INFLATE_STEP`` bytes at a time as the
+    events are consumed, so a small, highly compressed chunk never expands
+    into one large buffer; past ``max_size`` unpacked bytes the archive is
+    rejected.
+    """
+
+    def __init__(self, *, max_header_size: int, max_size: int) -> None:
+        self.max_header_size = max_header_size
+        self.max_size = max_size
+        self._size = 0
+        self._gunzip = None
+        self._sniffed = False
+        self._head = b""
+        self._pending = bytearray()
+        self._remaining = 0
+        self._padding = 0
+        # What the current member's data is: "file", "skip", "longname" or "pax"
+        self._member: Optional[str] = None
+        self._meta = bytearray()
+        self._next_name: Optional[str] = None
+        self._ended = False
+
+    def _decompress(self, chunk: bytes) -> Iterator[bytes]:
+        if not self._sniffed:
+            # Two bytes are enough to tell gzip from a plain tar
+            chunk, self._head = self._head + chunk, b""
+            if len(chunk) < 2:
+                self._head = chunk
+                return
+            self._sniffed = True
+            if chunk[:2] == b"\x1f\x8b":
+                self._gunzip = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        if self._gunzip is None:
+            yield chunk
+            return
+        while True:
+            try:
+                out = self._gunzip.decompress(chunk, _INFLATE_STEP)
+            except zlib.error as e:
+                raise InvalidMultipartBody(f"Invalid gzip data in archive: {e}") from e
+            chunk = self._gunzip.unconsumed_tail
+            if out:
+                yield out
+            # A full step may leave output inside zlib even with no input left
+            if not chunk and len(out) < _INFLATE_STEP:
+                return
+
+    def _header(self, block: bytes, events: List[Tuple[str, Any]]) -> None:
+        if block == _ZERO_BLOCK:
+            self._ended = True
+            return
+        try:
+            info = tarfile.TarInfo.frombuf(block, "utf-8", "surrogateescape")
+        except tarfile.HeaderError as e:
+            raise InvalidMultipartBody(f"Invalid tar header: {e}") from e
+        self._remaining = info.size
+        self._padding = -info.size % tarfile.BLOCKSIZE
+        if info.type in (tarfile.GNUTYPE_LONGNAME, tarfile.XHDTYPE):
+            if info.size > self.max_header_size:
+                raise InvalidMultipartBody("Tar extended header is too large")
+            self._member = "longname" if info.type == tarfile.GNUTYPE_LONGNAME else "pax"
+            self._meta = bytearray()
+        elif info.type in (tarfile.REGTYPE, tarfile.AREGTYPE, tarfile.CONTTYPE):
+            name = self._next_name or info.name
+            self._next_name = None
+            self._member = "file"
+            events.append(("file", (name, info.size)))
+        else:
+            self._next_name = None
+            self._member = "skip"
+        if not self._remaining:
+            self._member_done(events)
+
+    def _member_done(self, events: List[Tuple[str, Any]]) -> None:
+        if self._member == "file":
+            events.append(("end", None))
+        elif self._member == "longname":
+            self._next_name = bytes(self._meta).rstrip(b"\0").decode("utf-8", "surrogateescape")
+        elif self._member == "pax":
+            self._next_name = _pax_path(bytes(self._meta)) or self._next_name
+        self._member = None
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[str, Any]]:
+        for data in self._decompress(chunk):
+            self._size += len(data)
+            if self._size > self.max_size:
+                raise InvalidMultipartBody("The archive is too large")
+            yield from self._parse(memoryview(data))
+
+    def _parse(self, data: memoryview) -> List[Tuple[str, Any]]:
+        events: List[Tuple[str, Any]] = []
+        while data and not self._ended:
+            if self._member is not None:
+                take = data[: self._remaining]
+                data = data[len(take) :]
+                self._remaining -= len(take)
+                if self._member == "file":
+                    events.append(("data", bytes(take)))
+                elif self._member != "skip":
+                    self._meta += take
+                if not self._remaining:
+                    self._member_done(events)
+            elif self._padding:
+                skipped = min(self._padding, len(data))
+                data = data[skipped:]
+                self._padding -= skipped
+            else:
+                need = tarfile.BLOCKSIZE - len(self._pending)
+                self._pending += data[:need]
+                data = data[need:]
+                if len(self._pending) == tarfile.BLOCKSIZE:
+                    block, self._pending = bytes(self._pending), bytearray()
+                    self._header(block, events)
+        return events
+
+    def finish(self) -> None:
+        if not self._ended and (self._member is not None or self._pending):
+            raise InvalidMultipartBody("The archive ended in the middle of a member")
+
+
+_ZERO_BLOCK = bytes(tarfile.BLOCKSIZE)
+_INFLATE_STEP = 1024 * 1024
+
+
+def _pax_path(data: bytes) -> Optional[str]:
+    """The ``path`` record of a pax extended header, if any."""
+    path = None
+    pos = 0
+    while pos < len(data):
+        space = data.find(b" ", pos)
+        if space < 0:
+            break
+        try:
+            length = int(data[pos:space])
+        except ValueError:
+            raise InvalidMultipartBody("Invalid pax header in archive")
+        # A record is "<length> <key>=<value>\n", its length counting itself
+        if length <= space - pos or pos + length > len(data) or data[pos + length - 1] != 0x0A:
+            raise InvalidMultipartBody("Invalid pax header in archive")
+        key, _, value = data[space + 1 : pos + length - 1].partition(b"=")
+        if key == b"path":
+            path = value.decode("utf-8", "surrogateescape")
+        pos += length
+    return path
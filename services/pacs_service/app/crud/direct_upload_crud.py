@@ -0,0 +1,58 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pacs_models import DirectUpload
+
+
+async def create_direct_upload(
+    db: AsyncSession,
+    *,
+    upload_id: uuid.UUID,
+    created_by: Optional[str],
+    fields: Dict[str, str],
+    objects: List[dict],
+    ttl: timedelta,
+) -> DirectUpload:
+    now = datetime.now(timezone.utc)
+    upload = DirectUpload(
+        id=upload_id,
+        created_by=created_by,
+        fields=fields,
+        objects=objects,
+        created_at=now,
+        expires_at=now + ttl,
+    )
+    db.add(upload)
+    await db.commit()
+    return upload
+
+
+async def get_direct_upload(
+    db: AsyncSession, *, upload_id: uuid.UUID, for_update: bool = False
+) -> Optional[DirectUpload]:
+    """The upload, optionally locked; a locked row held by another request raises at once."""
+    stmt = select(DirectUpload).where(DirectUpload.id == upload_id)
+    if for_update:
+        stmt = stmt.with_for_update(nowait=True)
+    return await db.scalar(stmt)
+
+
+async def extend_direct_upload(db: AsyncSession, upload: DirectUpload, *, ttl: timedelta) -> DirectUpload:
+    upload.expires_at = datetime.now(timezone.utc) + ttl
+    await db.commit()
+    return upload
+
+
+async def list_expired_direct_uploads(db: AsyncSession, *, now: datetime, limit: int) -> List[DirectUpload]:
+    stmt = (
+        select(DirectUpload)
+        .where(DirectUpload.expires_at < now)
+        .order_by(DirectUpload.expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list((await db.scalars(stmt)).all())
@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.streaming_upload import UploadedObject
+from app.models.pacs_models import Image, Patient, Study
+
+
+async def create_study_with_images(
+    db: AsyncSession, *, fields: Dict[str, str], objects: List[UploadedObject]
+) -> Tuple[Patient, Study, List[uuid.UUID]]:
+    """Patient (found or created), study and one image row per object; the caller commits."""
+    # Find or create patient
+    result = await db.execute(select(Patient).where(Patient.national_id == fields["patient_national_id"]))
+    patient = result.scalar_one_or_none()
+    if not patient:
+        patient = Patient(
+            id=uuid.uuid4(),
+            full_name=fields["patient_full_name"],
+            national_id=fields["patient_national_id"],
+            phone_number=fields["patient_phone_number"],
+        )
+        db.add(patient)
+
+    # Create study
+    study = Study(
+        id=uuid.uuid4(),
+        patient_id=patient.id,
+        clinic_id=uuid.uuid4(),  # Placeholder, should come from context
+        description=fields["study_description"],
+        study_date=datetime.utcnow(),
+    )
+    db.add(study)
+    await db.flush()
+
+    # Create image records: one multi-row INSERT rather than a round trip per image
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "study_id": study.id,
+            "object_name": obj.key,
+            "file_format": (obj.content_type or "unknown")[:50],
+            "upload_timestamp": now,
+        }
+        for obj in objects
+    ]
+    await db.execute(insert(Image), rows)
+    return patient, study, [row["id"] for row in rows]
@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.pacs_models import ResumableUpload
+
+
+async def create_upload(
+    db: AsyncSession,
+    *,
+    created_by: Optional[str],
+    object_name: str,
+    filename: str,
+    content_type: Optional[str],
+    fields: Dict[str, str],
+    upload_length: int,
+    s3_upload_id: str,
+    ttl: timedelta,
+) -> ResumableUpload:
+    now = datetime.now(timezone.utc)
+    upload = ResumableUpload(
+        id=uuid.uuid4(),
+        created_by=created_by,
+        object_name=object_name,
+        filename=filename,
+        content_type=content_type,
+        fields=fields,
+        upload_length=upload_length,
+        upload_offset=0,
+        s3_upload_id=s3_upload_id,
+        part_etags=[],
+        tail_size=0,
+        created_at=now,
+        expires_at=now + ttl,
+    )
+    db.add(upload)
+    await db.commit()
+    return upload
+
+
+async def get_upload(db: AsyncSession, *, upload_id: uuid.UUID, for_update: bool = False) -> Optional[ResumableUpload]:
+    """The upload, optionally locked; a locked row held by another request raises at once."""
+    stmt = select(ResumableUpload).where(ResumableUpload.id == upload_id)
+    if for_update:
+        stmt = stmt.with_for_update(nowait=True)
+    return await db.scalar(stmt)
+
+
+async def delete_upload(db: AsyncSession, *, upload_id: uuid.UUID) -> None:
+    await db.execute(delete(ResumableUpload).where(ResumableUpload.id == upload_id))
+    await db.commit()
+
+
+async def list_expired_uploads(db: AsyncSession, *, now: datetime, limit: int) -> List[ResumableUpload]:
+    stmt = (
+        select(ResumableUpload)
+        .where(ResumableUpload.expires_at < now)
+        .order_by(ResumableUpload.expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list((await db.scalars(stmt)).all())
@@ -5,8 +5,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.s3_client import bucket_cache, close_s3, init_s3
+from app.api.deps import token_decoder
 from app.db.session import engine, Base
 from app.api.v1.endpoints.studies import router as studies_router
+from app.api.v1.endpoints.uploads import router as uploads_router
+from app.api.v1.endpoints.direct_uploads import router as direct_uploads_router
 
 
 @asynccontextmanager
@@ -14,8 +18,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    init_s3()
     yield
-    # Shutdown - nothing to do for now
+    # Shutdown
+    close_s3()
 
 
 def create_app() -> FastAPI:
@@ -40,12 +46,22 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Read by tus clients for resumable uploads
+        expose_headers=["Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires"],
     )
 
+    app.include_router(uploads_router, prefix="/api/v1/studies/uploads", tags=["uploads"])
+    app.include_router(direct_uploads_router, prefix="/api/v1/studies/direct-uploads", tags=["direct-uploads"])
     app.include_router(studies_router, prefix="/api/v1/studies", tags=["studies"])
 
     @app.get("/healthz")
     async def healthz():
-        return {"status": "ok", "service": "pacs", "environment": settings.environment}
+        return {
+            "status": "ok",
+            "service": "pacs",
+            "environment": settings.environment,
+            "jwt_cache": token_decoder.cache.stats(),
+            "s3_bucket_cache": bucket_cache.stats(),
+        }
 
     return app
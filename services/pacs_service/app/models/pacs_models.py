@@ -1,8 +1,9 @@
 import uuid
 from datetime import datetime
+from enum import StrEnum
 
-from sqlalchemy import String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, String, DateTime, Enum, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.session import Base
@@ -43,3 +44,55 @@ class Image(Base):
 
     study = relationship("Study", back_populates="images")
 
+
+class UploadStatus(StrEnum):
+    ACTIVE = "ACTIVE"
+    COMPLETED = "COMPLETED"  # the study and image rows exist; kept until it expires
+
+
+class ResumableUpload(Base):
+    """A resumable (tus) upload of one image, backed by an S3 multipart upload.
+
+    ``upload_offset`` bytes are stored: the parts listed in ``part_etags`` plus
+    ``tail_size`` bytes, too few for a part yet, kept in a temporary object.
+    """
+
+    __tablename__ = "resumable_uploads"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    object_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    content_type: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Study form fields, applied when the upload completes
+    fields: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    upload_length: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    upload_offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    s3_upload_id: Mapped[str] = mapped_column(Text, nullable=False)
+    part_etags: Mapped[list[str]] = mapped_column(ARRAY(String(128)), nullable=False, default=list)
+    tail_size: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    status: Mapped[UploadStatus] = mapped_column(Enum(UploadStatus), nullable=False, default=UploadStatus.ACTIVE)
+    study_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    image_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class DirectUpload(Base):
+    """Files a client sends straight to MinIO with presigned URLs, registered as one study.
+
+    ``objects`` lists ``{key, filename, content_type, size, upload_id, part_size}``
+    per file; ``upload_id`` and ``part_size`` are set for files uploaded in parts.
+    """
+
+    __tablename__ = "direct_uploads"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Study form fields, applied on completion
+    fields: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    objects: Mapped[list[dict]] = mapped_column(JSONB, nullable=False)
+    status: Mapped[UploadStatus] = mapped_column(Enum(UploadStatus), nullable=False, default=UploadStatus.ACTIVE)
+    study_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
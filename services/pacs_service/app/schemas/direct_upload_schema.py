@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class DirectUploadFile(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: Optional[str] = Field(default=None, max_length=255)
+    size: int = Field(gt=0, description="Exact size in bytes; checked on completion")
+
+
+class DirectUploadCreate(BaseModel):
+    patient_full_name: str = Field(min_length=1, max_length=255)
+    patient_national_id: str = Field(min_length=1, max_length=50)
+    patient_phone_number: str = Field(min_length=1, max_length=50)
+    study_description: str = Field(min_length=1, max_length=500)
+    files: List[DirectUploadFile] = Field(min_length=1)
+
+
+class PresignedPost(BaseModel):
+    url: str
+    fields: Dict[str, str] = Field(description="Form fields to send before the file")
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class PresignedMultipart(BaseModel):
+    upload_id: str
+    part_size: int = Field(description="Every part but the last has exactly this size")
+    parts: List[PresignedPart]
+
+
+class DirectUploadTarget(BaseModel):
+    filename: str
+    object_name: str
+    size: int
+    # Small files: either a form POST or a PUT of the whole body
+    post: Optional[PresignedPost] = None
+    put_url: Optional[str] = None
+    # Large files: PUT each part, then report the ETags on completion
+    multipart: Optional[PresignedMultipart] = None
+
+
+class DirectUploadPublic(BaseModel):
+    upload_id: uuid.UUID
+    expires_at: datetime = Field(description="When the unfinished upload and its objects are dropped")
+    urls_expire_at: datetime = Field(description="When the URLs stop working; request new ones before then")
+    files: List[DirectUploadTarget]
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str = Field(min_length=1, max_length=128)
+
+
+class DirectUploadComplete(BaseModel):
+    parts: Dict[str, List[CompletedPart]] = Field(
+        default_factory=dict, description="ETags per object_name, for files uploaded in parts"
+    )
+
+
+class DirectUploadImage(BaseModel):
+    image_id: uuid.UUID
+    object_name: str
+    filename: str
+    size: int
+
+
+class DirectUploadResult(BaseModel):
+    patient_id: uuid.UUID
+    study_id: uuid.UUID
+    images: List[DirectUploadImage]
@@ -0,0 +1,253 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncGenerator, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import s3_client
+from app.core.config import settings
+from app.db.session import Base, get_session
+from app.main import create_app
+
+
+@pytest.fixture()
+def anyio_backend() -> str:
+    """Force pytest-anyio to use asyncio backend only."""
+    return "asyncio"
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class FakeS3:
+    """In-memory stand-in for the boto3 client, covering the calls pacs_service makes.
+
+    ``fail`` maps a method name to an exception it raises from then on;
+    ``part_delay`` makes ``upload_part`` slow, to observe how many run at once.
+    """
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, bytes] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+        self.fail: Dict[str, Exception] = {}
+        self.part_delay = 0.0
+        self.parts_in_flight = 0
+        self.max_parts_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if name in self.fail:
+            raise self.fail[name]
+
+    def head_bucket(self, Bucket: str) -> dict:
+        self._call("head_bucket")
+        return {}
+
+    def create_bucket(self, Bucket: str) -> dict:
+        self._call("create_bucket")
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> dict:
+        self._call("put_object")
+        self.objects[Key] = bytes(Body)
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        self._call("get_object")
+        if Key not in self.objects:
+            raise _error("NoSuchKey", "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket: str, Key: str) -> dict:
+        self._call("head_object")
+        if Key not in self.objects:
+            raise _error("404", "HeadObject")
+        return {"ContentLength": len(self.objects[Key])}
+
+    def delete_object(self, Bucket: str, Key: str) -> dict:
+        self._call("delete_object")
+        self.objects.pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        self._call("delete_objects")
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+        return {}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._call("create_multipart_upload")
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"key": Key, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        self._call("upload_part")
+        with self._lock:
+            self.parts_in_flight += 1
+            self.max_parts_in_flight = max(self.max_parts_in_flight, self.parts_in_flight)
+        try:
+            time.sleep(self.part_delay)
+            upload = self.uploads.get(UploadId)
+            if upload is None:
+                raise _error("NoSuchUpload", "UploadPart")
+            etag = f'"{hashlib.md5(Body).hexdigest()}"'
+            upload["parts"][PartNumber] = (etag, bytes(Body))
+            return {"ETag": etag}
+        finally:
+            with self._lock:
+                self.parts_in_flight -= 1
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        self._call("complete_multipart_upload")
+        upload = self.uploads.get(UploadId)
+        if upload is None:
+            raise _error("NoSuchUpload", "CompleteMultipartUpload")
+        body = b""
+        for part in MultipartUpload["Parts"]:
+            stored = upload["parts"].get(part["PartNumber"])
+            if stored is None or stored[0] != part["ETag"]:
+                raise _error("InvalidPart", "CompleteMultipartUpload")
+            body += stored[1]
+        del self.uploads[UploadId]
+        self.objects[Key] = body
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        self._call("abort_multipart_upload")
+        if self.uploads.pop(UploadId, None) is None:
+            raise _error("NoSuchUpload", "AbortMultipartUpload")
+        return {}
+
+
+@pytest.fixture()
+def fake_s3() -> FakeS3:
+    return FakeS3()
+
+
+@pytest.fixture()
+def s3(fake_s3: FakeS3):
+    """``AsyncS3`` over ``fake_s3``, also installed as the process-wide client."""
+    async_s3 = s3_client.AsyncS3(fake_s3, max_workers=8)
+    s3_client._client, s3_client._async_s3 = fake_s3, async_s3
+    # Signing is local, so presigned URLs come from a real client that never connects
+    s3_client._presign_client = s3_client._build_client("https://s3.example.test")
+    try:
+        yield async_s3
+    finally:
+        async_s3.shutdown()
+        s3_client._client = s3_client._presign_client = s3_client._async_s3 = None
+        s3_client.bucket_cache.clear()
+
+
+def _build_test_database_url() -> str:
+    """Create a test database URL, allowing override via TEST_DATABASE_URL env var."""
+    override = os.getenv("TEST_DATABASE_URL")
+    if override:
+        return override
+
+    raw = settings.database_url
+    parts = urlsplit(raw)
+    db_name = parts.path.rsplit('/', 1)[-1]
+    if not db_name:
+        raise RuntimeError("DATABASE_URL must include a database name")
+    test_db_name = f"{db_name}_test"
+    new_path = parts.path.rsplit('/', 1)[0] + f"/{test_db_name}"
+    return urlunsplit((parts.scheme, parts.netloc, new_path, parts.query, parts.fragment))
+
+
+async def _ensure_database_exists(db_url: str) -> None:
+    """Create the target Postgres database if it is missing (no-op for other DBs)."""
+    parts = urlsplit(db_url)
+    if not parts.scheme.startswith("postgresql"):
+        return
+
+    target_db = parts.path.rsplit('/', 1)[-1]
+    admin_path = parts.path.rsplit('/', 1)[0] + "/postgres"
+    admin_url = urlunsplit((parts.scheme, parts.netloc, admin_path, parts.query, parts.fragment))
+
+    admin_engine = create_async_engine(admin_url, pool_pre_ping=True)
+    try:
+        async with admin_engine.connect() as conn:
+            exists = await conn.scalar(text("SELECT 1 FROM pg_database WHERE datname=:name"), {"name": target_db})
+            if not exists:
+                # CREATE DATABASE cannot run inside a transaction
+                await conn.exec_driver_sql("COMMIT")
+                await conn.exec_driver_sql(f'CREATE DATABASE "{target_db}"')
+    finally:
+        await admin_engine.dispose()
+
+
+@pytest.fixture()
+async def test_engine_and_sessionmaker() -> AsyncGenerator[tuple[AsyncEngine, async_sessionmaker[AsyncSession]], None]:
+    """Engine/sessionmaker on an isolated test database; tables are created and dropped per test."""
+    test_db_url = _build_test_database_url()
+    await _ensure_database_exists(test_db_url)
+
+    engine = create_async_engine(test_db_url, pool_pre_ping=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        yield engine, SessionLocal
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+@pytest.fixture()
+async def app_with_overrides(test_engine_and_sessionmaker) -> FastAPI:
+    """FastAPI app with DB dependency overridden to use the test session."""
+    _, SessionLocal = test_engine_and_sessionmaker
+    app = create_app()
+
+    async def override_get_session() -> AsyncGenerator[AsyncSession, None]:  # type: ignore[override]
+        async with SessionLocal() as session:  # type: ignore
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    return app
+
+
+@pytest.fixture()
+async def client(app_with_overrides: FastAPI, s3) -> AsyncGenerator[AsyncClient, None]:
+    # ASGITransport does not run the lifespan; the s3 fixture stands in for init_s3
+    async with AsyncClient(transport=ASGITransport(app=app_with_overrides), base_url="http://test") as ac:
+        yield ac
+
+
+def _auth_headers(subject: Optional[str] = None) -> dict:
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    claims = {"sub": subject or str(uuid.uuid4()), "exp": expire}
+    return {"Authorization": f"Bearer {jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)}"}
+
+
+@pytest.fixture()
+def auth_headers_for():
+    """Bearer token for a given user, signed like auth_service tokens."""
+    return _auth_headers
+
+
+@pytest.fixture()
+def auth_headers() -> dict:
+    return _auth_headers()
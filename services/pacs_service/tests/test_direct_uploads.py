@@ -0,0 +1,187 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.api.v1.endpoints.studies import BUCKET_NAME
+from app.core.config import settings
+from app.core.streaming_upload import MIN_PART_SIZE
+from app.models.pacs_models import DirectUpload
+
+
+pytestmark = pytest.mark.anyio
+
+URL = "/api/v1/studies/direct-uploads/"
+STUDY = {
+    "patient_full_name": "Sara Ahmadi",
+    "patient_national_id": "0012345678",
+    "patient_phone_number": "09120000000",
+    "study_description": "CT chest",
+}
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(settings, "upload_part_size_bytes", MIN_PART_SIZE)
+
+
+async def _create(client, headers, sizes: dict) -> dict:
+    files = [{"filename": name, "size": size, "content_type": "application/dicom"} for name, size in sizes.items()]
+    res = await client.post(URL, json={**STUDY, "files": files}, headers=headers)
+    assert res.status_code == 201, res.text
+    return res.json()
+
+
+def _upload_parts(fake_s3, target: dict, data: bytes) -> list:
+    """What a client does with the presigned part URLs; the ETags to report."""
+    multipart = target["multipart"]
+    size = multipart["part_size"]
+    etags = []
+    for part in multipart["parts"]:
+        number = part["part_number"]
+        res = fake_s3.upload_part(
+            Bucket=BUCKET_NAME,
+            Key=target["object_name"],
+            UploadId=multipart["upload_id"],
+            PartNumber=number,
+            Body=data[(number - 1) * size : number * size],
+        )
+        etags.append({"part_number": number, "etag": res["ETag"]})
+    return etags
+
+
+async def _set_expiry(test_engine_and_sessionmaker, upload_id: str, expires_at: datetime) -> None:
+    _, SessionLocal = test_engine_and_sessionmaker
+    async with SessionLocal() as db:
+        await db.execute(
+            update(DirectUpload).where(DirectUpload.id == uuid.UUID(upload_id)).values(expires_at=expires_at)
+        )
+        await db.commit()
+
+
+async def test_complete_registers_the_study_once(client, auth_headers, fake_s3):
+    small, large = os.urandom(100), os.urandom(MIN_PART_SIZE + 10)
+    upload = await _create(client, auth_headers, {"small.dcm": len(small), "large.dcm": len(large)})
+    small_target, large_target = upload["files"]
+    assert small_target["put_url"] and small_target["post"] and small_target["multipart"] is None
+    assert len(large_target["multipart"]["parts"]) == 2
+
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=small_target["object_name"], Body=small)
+    parts = {large_target["object_name"]: _upload_parts(fake_s3, large_target, large)}
+
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": parts}, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    result = res.json()
+    assert sorted((image["filename"], image["size"]) for image in result["images"]) == [
+        ("large.dcm", len(large)),
+        ("small.dcm", len(small)),
+    ]
+    assert fake_s3.objects[large_target["object_name"]] == large
+
+    # Calling again returns the same study without touching S3 again
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": {}}, headers=auth_headers)
+    assert res.status_code == 200
+    assert res.json()["study_id"] == result["study_id"]
+    assert sorted(i["image_id"] for i in res.json()["images"]) == sorted(i["image_id"] for i in result["images"])
+    assert fake_s3.calls["complete_multipart_upload"] == 1
+
+
+async def test_complete_requires_part_etags(client, auth_headers, fake_s3):
+    upload = await _create(client, auth_headers, {"large.dcm": MIN_PART_SIZE + 10})
+    [target] = upload["files"]
+    _upload_parts(fake_s3, target, os.urandom(MIN_PART_SIZE + 10))
+
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": {}}, headers=auth_headers)
+    assert res.status_code == 422
+    assert "large.dcm" in res.json()["detail"]
+
+    bad = {target["object_name"]: [{"part_number": 1, "etag": '"nope"'}, {"part_number": 2, "etag": '"nope"'}]}
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": bad}, headers=auth_headers)
+    assert res.status_code == 409
+
+
+async def test_complete_checks_sizes_and_can_be_retried(client, auth_headers, fake_s3):
+    upload = await _create(client, auth_headers, {"a.dcm": 100, "b.dcm": 50})
+    a, b = (target["object_name"] for target in upload["files"])
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=a, Body=bytes(100))
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=b, Body=bytes(49))
+
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": {}}, headers=auth_headers)
+    assert res.status_code == 409
+    assert "b.dcm" in res.json()["detail"] and "a.dcm" not in res.json()["detail"]
+
+    # The client sends the file again and retries
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=b, Body=bytes(50))
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": {}}, headers=auth_headers)
+    assert res.status_code == 200
+    assert len(res.json()["images"]) == 2
+
+
+async def test_uploads_are_private_to_their_creator(client, auth_headers, auth_headers_for):
+    upload = await _create(client, auth_headers, {"a.dcm": 100})
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": {}}, headers=auth_headers_for())
+    assert res.status_code == 404
+
+
+async def test_upload_outlives_its_urls(client, auth_headers):
+    upload = await _create(client, auth_headers, {"a.dcm": 100})
+    expires_at = datetime.fromisoformat(upload["expires_at"])
+    urls_expire_at = datetime.fromisoformat(upload["urls_expire_at"])
+    now = datetime.now(timezone.utc)
+
+    assert urls_expire_at - now <= timedelta(seconds=settings.direct_upload_url_ttl_seconds)
+    assert expires_at - now > timedelta(hours=settings.direct_upload_session_ttl_hours) - timedelta(minutes=1)
+
+
+async def test_completed_upload_answers_after_it_expires(client, auth_headers, fake_s3, test_engine_and_sessionmaker):
+    upload = await _create(client, auth_headers, {"a.dcm": 100})
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=upload["files"][0]["object_name"], Body=bytes(100))
+    url = f"{URL}{upload['upload_id']}/complete"
+    study_id = (await client.post(url, json={"parts": {}}, headers=auth_headers)).json()["study_id"]
+
+    await _set_expiry(test_engine_and_sessionmaker, upload["upload_id"], datetime.now(timezone.utc) - timedelta(minutes=1))
+    res = await client.post(url, json={"parts": {}}, headers=auth_headers)
+    assert res.status_code == 200
+    assert res.json()["study_id"] == study_id
+
+
+async def test_unfinished_upload_expires(client, auth_headers, test_engine_and_sessionmaker):
+    upload = await _create(client, auth_headers, {"a.dcm": 100})
+    await _set_expiry(test_engine_and_sessionmaker, upload["upload_id"], datetime.now(timezone.utc) - timedelta(minutes=1))
+
+    for path in ("complete", "urls"):
+        res = await client.post(f"{URL}{upload['upload_id']}/{path}", json={"parts": {}}, headers=auth_headers)
+        assert res.status_code == 410
+
+
+async def test_new_urls_cover_the_files_not_uploaded_yet(client, auth_headers, fake_s3, test_engine_and_sessionmaker):
+    large = os.urandom(MIN_PART_SIZE + 10)
+    upload = await _create(client, auth_headers, {"a.dcm": 100, "b.dcm": 50, "large.dcm": len(large)})
+    a, b, large_target = upload["files"]
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=a["object_name"], Body=bytes(100))
+    # b was cut short, and only the first part of the large file made it before the URLs ran out
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=b["object_name"], Body=bytes(20))
+    first_part = _upload_parts(fake_s3, large_target, large)[:1]
+    soon = datetime.now(timezone.utc) + timedelta(minutes=5)
+    await _set_expiry(test_engine_and_sessionmaker, upload["upload_id"], soon)
+
+    res = await client.post(f"{URL}{upload['upload_id']}/urls", headers=auth_headers)
+    assert res.status_code == 200, res.text
+    renewed = res.json()
+    assert [target["filename"] for target in renewed["files"]] == ["b.dcm", "large.dcm"]
+    assert renewed["files"][0]["put_url"]
+    assert renewed["files"][1]["multipart"]["upload_id"] == large_target["multipart"]["upload_id"]
+    assert renewed["files"][1]["multipart"]["part_size"] == large_target["multipart"]["part_size"]
+    assert datetime.fromisoformat(renewed["expires_at"]) > soon + timedelta(hours=1)
+
+    fake_s3.put_object(Bucket=BUCKET_NAME, Key=b["object_name"], Body=bytes(50))
+    second_part = _upload_parts(fake_s3, renewed["files"][1], large)[1:]
+    parts = {large_target["object_name"]: first_part + second_part}
+    res = await client.post(f"{URL}{upload['upload_id']}/complete", json={"parts": parts}, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    assert fake_s3.objects[large_target["object_name"]] == large
+
+    res = await client.post(f"{URL}{upload['upload_id']}/urls", headers=auth_headers)
+    assert res.status_code == 409
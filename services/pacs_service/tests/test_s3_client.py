@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core import s3_client
+from app.core.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = "pacs-images"
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    """Replaces the cache's clock (only its module's); advance with ``clock.now += seconds``."""
+    fake = SimpleNamespace(now=1000.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(s3_client, "time", fake)
+    return fake
+
+
+@pytest.fixture()
+def cache(monkeypatch, clock):
+    cache = s3_client.BucketCache(ttl=60)
+    monkeypatch.setattr(s3_client, "bucket_cache", cache)
+    return cache
+
+
+class Closable:
+    def __init__(self, endpoint_url: str) -> None:
+        self.endpoint_url = endpoint_url
+        self.closed = 0
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+@pytest.fixture()
+def built(monkeypatch):
+    """Clients built by init_s3, in order; none of them connects anywhere."""
+    clients = []
+
+    def build(endpoint_url: str) -> Closable:
+        clients.append(Closable(endpoint_url))
+        return clients[-1]
+
+    monkeypatch.setattr(s3_client, "_build_client", build)
+    yield clients
+    s3_client.close_s3()
+
+
+def test_bucket_cache_expires_entries(clock):
+    cache = s3_client.BucketCache(ttl=60)
+    assert BUCKET not in cache
+    cache.add(BUCKET)
+    clock.now += 59
+    assert BUCKET in cache
+    clock.now += 1
+    assert BUCKET not in cache
+    # An expired entry is dropped, not kept around
+    assert cache.stats() == {"size": 0, "hits": 1, "misses": 2}
+
+
+async def test_ensure_bucket_heads_the_bucket_once_per_ttl(s3, fake_s3, cache, clock):
+    for _ in range(3):
+        await s3_client.ensure_bucket(BUCKET)
+    assert fake_s3.calls["head_bucket"] == 1
+    assert cache.stats()["hits"] == 2
+
+    clock.now += 60
+    await s3_client.ensure_bucket(BUCKET)
+    assert fake_s3.calls["head_bucket"] == 2
+    assert fake_s3.calls["create_bucket"] == 0
+
+
+@pytest.mark.parametrize("code", ["BucketAlreadyOwnedByYou", "BucketAlreadyExists"])
+async def test_bucket_created_by_another_worker_counts_as_existing(s3, fake_s3, cache, code):
+    fake_s3.fail["head_bucket"] = _error("404", "HeadBucket")
+    fake_s3.fail["create_bucket"] = _error(code, "CreateBucket")
+    await s3_client.ensure_bucket(BUCKET)
+    assert fake_s3.calls["create_bucket"] == 1
+
+    await s3_client.ensure_bucket(BUCKET)
+    assert fake_s3.calls["head_bucket"] == 1
+
+
+async def test_bucket_errors_are_not_cached(s3, fake_s3, cache):
+    fake_s3.fail["head_bucket"] = _error("403", "HeadBucket")
+    with pytest.raises(ClientError):
+        await s3_client.ensure_bucket(BUCKET)
+
+    # An unknown answer is retried on the next upload rather than raised
+    fake_s3.fail["head_bucket"] = _error("500", "HeadBucket")
+    await s3_client.ensure_bucket(BUCKET)
+    await s3_client.ensure_bucket(BUCKET)
+    assert fake_s3.calls["head_bucket"] == 3
+    assert cache.stats()["size"] == 0
+
+
+def test_init_s3_is_idempotent(built, monkeypatch):
+    monkeypatch.setattr(settings, "minio_public_url", "")
+    client = s3_client.init_s3()
+    async_s3 = s3_client.get_async_s3()
+
+    assert s3_client.init_s3() is client
+    assert s3_client.get_async_s3() is async_s3
+    assert len(built) == 1
+    # Without a public URL, presigning uses the same client
+    assert s3_client.get_presign_client() is client
+
+
+def test_close_s3_closes_the_presign_client_only_when_separate(built, monkeypatch):
+    monkeypatch.setattr(settings, "minio_public_url", "")
+    s3_client.init_s3()
+    s3_client.close_s3()
+    [shared] = built
+    assert shared.closed == 1
+    with pytest.raises(RuntimeError):
+        s3_client.get_presign_client()
+
+    monkeypatch.setattr(settings, "minio_public_url", "https://s3.example.test")
+    s3_client.init_s3()
+    assert s3_client.get_presign_client().endpoint_url == "https://s3.example.test"
+    s3_client.close_s3()
+    assert [client.closed for client in built[1:]] == [1, 1]
+    with pytest.raises(RuntimeError):
+        s3_client.get_s3_client()
@@ -0,0 +1,293 @@
+import gzip
+import io
+import os
+import tarfile
+
+import pytest
+
+from app.core.streaming_upload import (
+    MIN_PART_SIZE,
+    BatchUpload,
+    FilePart,
+    InvalidMultipartBody,
+    MultipartUploadWriter,
+    StreamingFormParser,
+    TarStream,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = "test-bucket"
+BOUNDARY = "----yakhteh-test"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+PART = MIN_PART_SIZE
+
+
+def _form(fields: dict, files: list) -> bytes:
+    """A multipart/form-data body; ``files`` holds ``(field, filename, content_type, data)``."""
+    out = io.BytesIO()
+    for name, value in fields.items():
+        out.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, content_type, data in files:
+        out.write(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+        )
+        out.write(data + b"\r\n")
+    out.write(f"--{BOUNDARY}--\r\n".encode())
+    return out.getvalue()
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _parse(body: bytes, chunk_size: int, max_field_size: int = 1024) -> list:
+    parser = StreamingFormParser(CONTENT_TYPE, max_field_size=max_field_size)
+    events = [event for chunk in _chunks(body, chunk_size) for event in parser.feed(chunk)]
+    parser.finish()
+    return events
+
+
+def test_form_parser_yields_fields_and_file_chunks():
+    body = _form({"patient_full_name": "Sara Ahmadi", "study_description": "CT"}, [("image_file", "a.dcm", "application/dicom", b"\x00DICM" * 500)])
+
+    # Byte by byte and all at once give the same result
+    for chunk_size in (1, 7, len(body)):
+        events = _parse(body, chunk_size)
+        fields = [value for kind, value in events if kind == "field"]
+        assert fields == [("patient_full_name", "Sara Ahmadi"), ("study_description", "CT")]
+        [file_part] = [value for kind, value in events if kind == "file"]
+        assert file_part == FilePart(field_name="image_file", filename="a.dcm", content_type="application/dicom")
+        assert b"".join(value for kind, value in events if kind == "data") == b"\x00DICM" * 500
+        assert [kind for kind, _ in events][-1] == "end"
+
+
+def test_form_parser_rejects_bad_bodies():
+    with pytest.raises(InvalidMultipartBody):
+        StreamingFormParser("application/json", max_field_size=1024)
+    with pytest.raises(InvalidMultipartBody):
+        StreamingFormParser("multipart/form-data", max_field_size=1024)
+
+    # Form fields are held in memory, so they are capped
+    with pytest.raises(InvalidMultipartBody, match="too large"):
+        _parse(_form({"study_description": "x" * 2000}, []), 100)
+
+    body = _form({"study_description": "CT"}, [("image_file", "a.dcm", "application/dicom", b"data")])
+    with pytest.raises(InvalidMultipartBody, match="closing boundary"):
+        _parse(body[:-20], 64)
+
+
+async def test_writer_uploads_parts_and_completes(s3, fake_s3):
+    data = os.urandom(2 * PART + 12345)
+    writer = MultipartUploadWriter(s3, BUCKET, "obj", content_type="application/dicom", part_size=PART, max_parallel=2)
+    await writer.start()
+    for chunk in _chunks(data, 1_000_003):
+        await writer.write(chunk)
+
+    assert await writer.complete() == len(data)
+    assert fake_s3.objects["obj"] == data
+    assert fake_s3.calls["upload_part"] == 3
+    assert fake_s3.uploads == {}
+
+
+async def test_writer_rejects_parts_below_the_s3_minimum(s3):
+    with pytest.raises(ValueError):
+        MultipartUploadWriter(s3, BUCKET, "obj", content_type=None, part_size=PART - 1, max_parallel=2)
+
+
+async def test_empty_file_becomes_an_empty_object(s3, fake_s3):
+    writer = MultipartUploadWriter(s3, BUCKET, "empty", content_type=None, part_size=PART, max_parallel=2)
+    await writer.start()
+    assert await writer.complete() == 0
+    assert fake_s3.objects["empty"] == b""
+
+
+async def test_writer_applies_back_pressure(s3, fake_s3):
+    fake_s3.part_delay = 0.05
+    writer = MultipartUploadWriter(s3, BUCKET, "obj", content_type=None, part_size=PART, max_parallel=2)
+    await writer.start()
+    chunk = bytes(PART)
+    for _ in range(6):
+        await writer.write(chunk)
+        # A write returns once its part is handed over, with at most max_parallel in flight
+        assert len([t for t in writer._tasks if not t.done()]) <= 2
+    await writer.complete()
+
+    assert fake_s3.max_parts_in_flight == 2
+    assert len(fake_s3.objects["obj"]) == 6 * PART
+
+
+async def test_failed_part_surfaces_on_a_later_write(s3, fake_s3):
+    writer = MultipartUploadWriter(s3, BUCKET, "obj", content_type=None, part_size=PART, max_parallel=1)
+    await writer.start()
+    fake_s3.fail["upload_part"] = RuntimeError("MinIO is down")
+    await writer.write(bytes(PART))
+    with pytest.raises(RuntimeError, match="MinIO is down"):
+        await writer.write(bytes(PART))
+
+    await writer.abort()
+    assert fake_s3.uploads == {}
+
+
+async def test_abort_drops_the_upload_or_the_completed_object(s3, fake_s3):
+    writer = MultipartUploadWriter(s3, BUCKET, "open", content_type=None, part_size=PART, max_parallel=2)
+    await writer.start()
+    await writer.write(bytes(PART + 1))
+    await writer.abort()
+    assert fake_s3.uploads == {}
+    assert "open" not in fake_s3.objects
+
+    writer = MultipartUploadWriter(s3, BUCKET, "done", content_type=None, part_size=PART, max_parallel=2)
+    await writer.start()
+    await writer.write(b"abc")
+    await writer.complete()
+    await writer.abort()
+    assert "done" not in fake_s3.objects
+
+
+async def test_flushed_upload_can_be_resumed_by_another_writer(s3, fake_s3):
+    data = os.urandom(2 * PART + 100)
+    first = MultipartUploadWriter(s3, BUCKET, "obj", content_type=None, part_size=PART, max_parallel=2)
+    await first.start()
+    await first.write(data[: PART + 50])
+    etags, rest = await first.flush()
+    assert len(etags) == 1
+    assert rest == data[PART : PART + 50]
+
+    second = MultipartUploadWriter(s3, BUCKET, "obj", content_type=None, part_size=PART, max_parallel=2)
+    second.resume(first.upload_id, etags)
+    await second.write(rest)
+    await second.write(data[PART + 50 :])
+    await second.complete()
+    assert fake_s3.objects["obj"] == data
+
+
+async def test_batch_puts_small_objects_and_streams_large_ones(s3, fake_s3):
+    batch = BatchUpload(s3, BUCKET, part_size=PART, max_parallel_parts=2, max_concurrent=2)
+    contents = {"a": b"small", "big": os.urandom(PART + 10), "b": b"", "c": b"x" * 1000}
+    for key, data in contents.items():
+        await batch.open(key, f"{key}.dcm", "application/dicom")
+        for chunk in _chunks(data, 700_001):
+            await batch.write(chunk)
+        await batch.close()
+    objects = await batch.finish()
+
+    assert [(obj.key, obj.size) for obj in objects] == [(key, len(data)) for key, data in contents.items()]
+    assert {key: fake_s3.objects[key] for key in contents} == contents
+    assert fake_s3.calls["put_object"] == 3
+    assert fake_s3.calls["create_multipart_upload"] == 1
+
+
+async def test_batch_abort_deletes_every_object(s3, fake_s3):
+    batch = BatchUpload(s3, BUCKET, part_size=PART, max_parallel_parts=2, max_concurrent=2)
+    for key in ("a", "b"):
+        await batch.open(key, key, None)
+        await batch.write(b"data")
+        await batch.close()
+    await batch.finish()
+    await batch.open("big", "big", None)
+    await batch.write(bytes(PART + 1))
+
+    await batch.abort()
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+
+
+async def test_batch_put_failure_surfaces_on_a_later_close(s3, fake_s3):
+    fake_s3.fail["put_object"] = RuntimeError("MinIO is down")
+    batch = BatchUpload(s3, BUCKET, part_size=PART, max_parallel_parts=2, max_concurrent=1)
+    await batch.open("a", "a", None)
+    await batch.close()
+    await batch.open("b", "b", None)
+    with pytest.raises(RuntimeError, match="MinIO is down"):
+        await batch.close()
+
+
+def _tarball(members: list, *, compress: bool, format: int = tarfile.GNU_FORMAT) -> bytes:
+    """A tar archive of ``(name, data)`` members; ``data`` None makes a directory."""
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode="w:gz" if compress else "w", format=format) as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            if data is None:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            else:
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    return out.getvalue()
+
+
+def _read_tar(archive: bytes, chunk_size: int) -> dict:
+    stream = TarStream(max_header_size=64 * 1024, max_size=1024 * 1024)
+    files, current = {}, None
+    for chunk in _chunks(archive, chunk_size):
+        for kind, value in stream.feed(chunk):
+            if kind == "file":
+                current = value[0]
+                files[current] = b""
+            elif kind == "data":
+                files[current] += value
+    stream.finish()
+    return files
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("format", [tarfile.GNU_FORMAT, tarfile.PAX_FORMAT])
+def test_tar_stream_reads_members_incrementally(compress, format):
+    long_name = "series/" + "x" * 150 + "/slice.dcm"
+    members = [
+        ("series", None),
+        ("series/slice001.dcm", os.urandom(1000)),
+        ("series/empty.dcm", b""),
+        (long_name, os.urandom(513)),
+        ("series/عکس.dcm", b"persian name"),
+    ]
+    archive = _tarball(members, compress=compress, format=format)
+
+    for chunk_size in (1, 511, 10_000):
+        files = _read_tar(archive, chunk_size)
+        assert files == {name: data for name, data in members if data is not None}
+
+
+def test_tar_stream_rejects_truncated_archives():
+    archive = _tarball([("a.dcm", os.urandom(2000))], compress=False)
+    stream = TarStream(max_header_size=1024, max_size=1024 * 1024)
+    list(stream.feed(archive[:1500]))
+    with pytest.raises(InvalidMultipartBody):
+        stream.finish()
+
+
+@pytest.mark.parametrize("records", [b"0 path=a\n", b"3 path=a\n", b"99 path=a\n", b"x path=a\n"])
+def test_tar_stream_rejects_malformed_pax_records(records):
+    # A zero length once made the record loop spin forever
+    info = tarfile.TarInfo("PaxHeaders/a.dcm")
+    info.type = tarfile.XHDTYPE
+    info.size = len(records)
+    block = info.tobuf(tarfile.USTAR_FORMAT)
+    archive = block + records + bytes(-len(records) % tarfile.BLOCKSIZE)
+
+    stream = TarStream(max_header_size=1024, max_size=1024 * 1024)
+    with pytest.raises(InvalidMultipartBody, match="pax"):
+        list(stream.feed(archive))
+
+
+def test_tar_stream_inflates_in_bounded_steps():
+    size = 64 * 1024 * 1024
+    archive = gzip.compress(_tarball([("zeros.dcm", bytes(size))], compress=False))
+    assert len(archive) < 200 * 1024
+
+    stream = TarStream(max_header_size=1024, max_size=2 * size)
+    total = 0
+    for kind, value in stream.feed(archive):
+        if kind == "data":
+            assert len(value) <= 1024 * 1024
+            total += len(value)
+    stream.finish()
+    assert total == size
+
+    stream = TarStream(max_header_size=1024, max_size=size // 2)
+    with pytest.raises(InvalidMultipartBody, match="too large"):
+        list(stream.feed(archive))
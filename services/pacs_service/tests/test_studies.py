@@ -0,0 +1,191 @@
+import io
+import os
+import tarfile
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints import studies
+from app.core.config import settings
+from app.core.streaming_upload import MIN_PART_SIZE
+from app.models.pacs_models import Image
+
+
+pytestmark = pytest.mark.anyio
+
+URL = "/api/v1/studies/"
+FIELDS = {
+    "patient_full_name": "Sara Ahmadi",
+    "patient_national_id": "0012345678",
+    "patient_phone_number": "09120000000",
+    "study_description": "CT chest",
+}
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(settings, "upload_part_size_bytes", MIN_PART_SIZE)
+
+
+@pytest.fixture()
+def commits():
+    """How many transactions were committed while the test ran."""
+    count = []
+
+    def on_commit(session):
+        count.append(session)
+
+    event.listen(Session, "after_commit", on_commit)
+    try:
+        yield count
+    finally:
+        event.remove(Session, "after_commit", on_commit)
+
+
+def _tarball(members: dict) -> bytes:
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode="w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return out.getvalue()
+
+
+def _series_files():
+    """Two plain files and an archive whose first member spans two parts."""
+    contents = {
+        "a.dcm": os.urandom(1000),
+        "b.dcm": os.urandom(MIN_PART_SIZE + 10),
+        "series/big.dcm": os.urandom(MIN_PART_SIZE + 100),
+        "series/small.dcm": os.urandom(2000),
+    }
+    archive = _tarball({name: contents[name] for name in ("series/big.dcm", "series/small.dcm")})
+    files = [
+        ("image_files", ("a.dcm", contents["a.dcm"], "application/dicom")),
+        ("image_files", ("series.tar.gz", archive, "application/gzip")),
+        ("image_files", ("b.dcm", contents["b.dcm"], "application/dicom")),
+    ]
+    return files, contents
+
+
+async def _image_count(test_engine_and_sessionmaker) -> int:
+    _, SessionLocal = test_engine_and_sessionmaker
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(Image))
+
+
+async def test_study_image_is_streamed_and_registered(
+    client, auth_headers, fake_s3, commits, test_engine_and_sessionmaker
+):
+    data = os.urandom(MIN_PART_SIZE + 10)
+    files = {"image_file": ("scan.dcm", data, "application/dicom")}
+    res = await client.post(URL, data=FIELDS, files=files, headers=auth_headers)
+    assert res.status_code == 201, res.text
+    body = res.json()
+    assert body["object_name"].endswith("_scan.dcm")
+    assert fake_s3.objects == {body["object_name"]: data}
+    assert fake_s3.calls["upload_part"] == 2
+    assert len(commits) == 1
+    assert await _image_count(test_engine_and_sessionmaker) == 1
+
+
+async def test_study_form_must_hold_the_fields_and_one_image(client, auth_headers, fake_s3):
+    image = ("scan.dcm", b"data", "application/dicom")
+    missing = {name: value for name, value in FIELDS.items() if name != "patient_national_id"}
+    res = await client.post(URL, data=missing, files={"image_file": image}, headers=auth_headers)
+    assert res.status_code == 422
+    assert "patient_national_id" in res.json()["detail"]
+
+    # Every field, but no image
+    body = "".join(f'--x\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n' for k, v in FIELDS.items())
+    res = await client.post(
+        URL, content=f"{body}--x--\r\n", headers={**auth_headers, "Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert res.status_code == 422
+    assert "image_file" in res.json()["detail"]
+
+    two = [("image_file", image), ("image_file", image)]
+    res = await client.post(URL, data=FIELDS, files=two, headers=auth_headers)
+    assert res.status_code == 422
+    res = await client.post(URL, data=FIELDS, files={"other": image}, headers=auth_headers)
+    assert res.status_code == 422
+    # Whatever was stored before the form was rejected is dropped
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+
+
+async def test_malformed_study_form_is_a_bad_request(client, auth_headers, fake_s3):
+    res = await client.post(URL, content=b"{}", headers={**auth_headers, "Content-Type": "application/json"})
+    assert res.status_code == 400
+
+    # Cut off before the closing boundary, after the image started
+    body = (
+        b'--x\r\nContent-Disposition: form-data; name="image_file"; filename="scan.dcm"\r\n'
+        b"Content-Type: application/dicom\r\n\r\n" + os.urandom(1000)
+    )
+    res = await client.post(
+        URL, content=body, headers={**auth_headers, "Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert res.status_code == 400
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+
+
+async def test_study_failure_after_upload_deletes_the_object(
+    client, auth_headers, fake_s3, monkeypatch, test_engine_and_sessionmaker
+):
+    async def failing_create(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(studies, "create_study_with_images", failing_create)
+    files = {"image_file": ("scan.dcm", os.urandom(MIN_PART_SIZE + 10), "application/dicom")}
+    with pytest.raises(RuntimeError, match="database is down"):
+        await client.post(URL, data=FIELDS, files=files, headers=auth_headers)
+
+    assert fake_s3.calls["complete_multipart_upload"] == 1
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+    assert await _image_count(test_engine_and_sessionmaker) == 0
+
+
+async def test_series_stores_files_and_archive_members_in_one_commit(
+    client, auth_headers, fake_s3, commits, test_engine_and_sessionmaker
+):
+    files, contents = _series_files()
+    res = await client.post(f"{URL}series", data=FIELDS, files=files, headers=auth_headers)
+    assert res.status_code == 201, res.text
+    images = res.json()["images"]
+
+    # Archive members are stored in their place in the form, under the name they have in it
+    assert [(image["filename"], image["size"]) for image in images] == [
+        ("a.dcm", 1000),
+        ("series/big.dcm", MIN_PART_SIZE + 100),
+        ("series/small.dcm", 2000),
+        ("b.dcm", MIN_PART_SIZE + 10),
+    ]
+    assert {image["filename"]: fake_s3.objects[image["object_name"]] for image in images} == contents
+    assert images[1]["object_name"].endswith("_big.dcm")
+    assert fake_s3.calls["create_multipart_upload"] == 2
+    assert fake_s3.uploads == {}
+
+    assert len(commits) == 1
+    assert await _image_count(test_engine_and_sessionmaker) == 4
+
+
+async def test_series_failure_after_upload_deletes_every_object(
+    client, auth_headers, fake_s3, monkeypatch, test_engine_and_sessionmaker
+):
+    async def failing_create(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(studies, "create_study_with_images", failing_create)
+    files, _ = _series_files()
+    with pytest.raises(RuntimeError, match="database is down"):
+        await client.post(f"{URL}series", data=FIELDS, files=files, headers=auth_headers)
+
+    assert fake_s3.calls["put_object"] == 2 and fake_s3.calls["complete_multipart_upload"] == 2
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+    assert await _image_count(test_engine_and_sessionmaker) == 0
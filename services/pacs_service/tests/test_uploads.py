@@ -0,0 +1,117 @@
+import base64
+import os
+
+import pytest
+
+from app.api.v1.endpoints import uploads
+from app.core.config import settings
+from app.core.streaming_upload import MIN_PART_SIZE
+
+
+pytestmark = pytest.mark.anyio
+
+URL = "/api/v1/studies/uploads/"
+FIELDS = {
+    "patient_full_name": "Sara Ahmadi",
+    "patient_national_id": "0012345678",
+    "patient_phone_number": "09120000000",
+    "study_description": "CT chest",
+    "filename": "scan.dcm",
+}
+
+
+@pytest.fixture(autouse=True)
+def small_parts(monkeypatch):
+    monkeypatch.setattr(settings, "upload_part_size_bytes", MIN_PART_SIZE)
+
+
+def _metadata(fields: dict) -> str:
+    return ",".join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in fields.items())
+
+
+async def _create(client, headers, length: int) -> str:
+    res = await client.post(URL, headers={**headers, "Upload-Length": str(length), "Upload-Metadata": _metadata(FIELDS)})
+    assert res.status_code == 201, res.text
+    assert res.headers["Upload-Offset"] == "0"
+    return res.headers["Location"]
+
+
+async def _patch(client, headers, location: str, offset: int, data: bytes):
+    return await client.patch(
+        location,
+        content=data,
+        headers={**headers, "Upload-Offset": str(offset), "Content-Type": uploads.TUS_CONTENT_TYPE},
+    )
+
+
+async def test_upload_in_chunks_creates_the_study(client, auth_headers, fake_s3):
+    data = os.urandom(MIN_PART_SIZE + 1000)
+    location = await _create(client, auth_headers, len(data))
+
+    # Short of a part: the bytes wait in a tail object
+    res = await _patch(client, auth_headers, location, 0, data[:1000])
+    assert res.status_code == 204
+    assert res.headers["Upload-Offset"] == "1000"
+    assert [key for key in fake_s3.objects if key.endswith(".partial")]
+
+    res = await client.head(location, headers=auth_headers)
+    assert res.headers["Upload-Offset"] == "1000"
+
+    res = await _patch(client, auth_headers, location, 1000, data[1000:])
+    assert res.status_code == 204
+    assert res.headers["Upload-Offset"] == str(len(data))
+
+    body = (await client.get(location, headers=auth_headers)).json()
+    assert body["status"] == "COMPLETED"
+    assert body["study_id"] and body["image_id"]
+    assert fake_s3.objects == {body["object_name"]: data}
+    assert fake_s3.uploads == {}
+
+    # A client that missed the response may send its last chunk again
+    res = await _patch(client, auth_headers, location, len(data), b"")
+    assert res.status_code == 204
+
+
+async def test_offset_and_length_are_enforced(client, auth_headers):
+    location = await _create(client, auth_headers, 10)
+
+    res = await _patch(client, auth_headers, location, 5, b"abc")
+    assert res.status_code == 409
+    assert res.headers["Upload-Offset"] == "0"
+
+    res = await _patch(client, auth_headers, location, 0, b"x" * 11)
+    assert res.status_code == 413
+    assert (await client.head(location, headers=auth_headers)).headers["Upload-Offset"] == "0"
+
+
+async def test_uploads_are_private_to_their_creator(client, auth_headers, auth_headers_for):
+    location = await _create(client, auth_headers, 10)
+    assert (await client.head(location, headers=auth_headers_for())).status_code == 404
+
+
+async def test_terminate_drops_the_multipart_upload(client, auth_headers, fake_s3):
+    location = await _create(client, auth_headers, 10)
+    await _patch(client, auth_headers, location, 0, b"abc")
+
+    res = await client.delete(location, headers=auth_headers)
+    assert res.status_code == 204
+    assert fake_s3.uploads == {}
+    assert fake_s3.objects == {}
+    assert (await client.head(location, headers=auth_headers)).status_code == 404
+
+
+async def test_failure_after_completion_drops_the_object_and_the_upload(client, auth_headers, fake_s3, monkeypatch):
+    async def failing_create(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(uploads, "create_study_with_images", failing_create)
+    location = await _create(client, auth_headers, 10)
+    await _patch(client, auth_headers, location, 0, b"abc")
+
+    res = await _patch(client, auth_headers, location, 3, b"defghij")
+    assert res.status_code == 500
+    assert fake_s3.calls["complete_multipart_upload"] == 1
+    # Nothing left behind: no object, no tail, and no row that retries would trip over
+    assert fake_s3.objects == {}
+    assert fake_s3.uploads == {}
+    assert (await client.head(location, headers=auth_headers)).status_code == 404
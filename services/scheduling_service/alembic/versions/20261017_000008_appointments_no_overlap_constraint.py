@@ -0,0 +1,55 @@
+"""prevent overlapping appointments with an exclusion constraint
+
+Revision ID: 20261017_000008
+Revises: 20250921_000004
+Create Date: 2026-10-17 00:00:08.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '20261017_000008'
+down_revision: Union[str, None] = '20250921_000004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # btree_gist provides the GiST "=" operator on uuid
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+    # Fails if the table already holds overlapping active appointments; those have
+    # to be cancelled or moved before upgrading.
+    if 'appointments' in existing_tables:
+        exists = bind.execute(
+            sa.text("SELECT 1 FROM pg_constraint WHERE conname = 'ex_appointments_doctor_overlap'")
+        ).scalar()
+        if not exists:
+            op.execute(
+                """
+                ALTER TABLE appointments
+                ADD CONSTRAINT ex_appointments_doctor_overlap
+                EXCLUDE USING gist (doctor_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)
+                WHERE (status <> 'CANCELLED')
+                """
+            )
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # The btree_gist extension is left installed; other objects may use it
+    if 'appointments' in existing_tables:
+        try:
+            op.drop_constraint('ex_appointments_doctor_overlap', 'appointments')
+        except Exception:
+            pass  # Constraint might not exist
@@ -0,0 +1,83 @@
+"""composite time-range indexes on appointments
+
+Revision ID: 20261017_000009
+Revises: 20261017_000008
+Create Date: 2026-10-17 00:00:09.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '20261017_000009'
+down_revision: Union[str, None] = '20261017_000008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointments' in existing_tables:
+        existing_indexes = [ix['name'] for ix in inspector.get_indexes('appointments')]
+
+        # Busy-interval and overlap lookups for one doctor (index-only scans)
+        if 'ix_appointments_doctor_id_start_time_active' not in existing_indexes:
+            op.create_index(
+                'ix_appointments_doctor_id_start_time_active',
+                'appointments',
+                ['doctor_id', 'start_time'],
+                postgresql_include=['end_time'],
+                postgresql_where=sa.text("status <> 'CANCELLED'"),
+            )
+
+        # Listings by doctor, whatever their status filter; the index above is partial
+        if 'ix_appointments_doctor_id_start_time_id' not in existing_indexes:
+            op.create_index(
+                'ix_appointments_doctor_id_start_time_id',
+                'appointments',
+                ['doctor_id', 'start_time', 'id'],
+            )
+
+        # Clinic calendar views over a time window
+        if 'ix_appointments_clinic_id_start_time' not in existing_indexes:
+            op.create_index(
+                'ix_appointments_clinic_id_start_time',
+                'appointments',
+                ['clinic_id', 'start_time'],
+                postgresql_include=['end_time', 'doctor_id', 'status'],
+            )
+
+        # Leading columns of the non-partial indexes above; keeping them only slows down writes
+        for name in ('ix_appointments_doctor_id', 'ix_appointments_clinic_id'):
+            if name in existing_indexes:
+                op.drop_index(name, table_name='appointments')
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointments' in existing_tables:
+        existing_indexes = [ix['name'] for ix in inspector.get_indexes('appointments')]
+        if 'ix_appointments_doctor_id' not in existing_indexes:
+            op.create_index('ix_appointments_doctor_id', 'appointments', ['doctor_id'])
+        if 'ix_appointments_clinic_id' not in existing_indexes:
+            op.create_index('ix_appointments_clinic_id', 'appointments', ['clinic_id'])
+        try:
+            op.drop_index('ix_appointments_doctor_id_start_time_id', table_name='appointments')
+        except Exception:
+            pass  # Index might not exist
+        try:
+            op.drop_index('ix_appointments_clinic_id_start_time', table_name='appointments')
+        except Exception:
+            pass  # Index might not exist
+        try:
+            op.drop_index('ix_appointments_doctor_id_start_time_active', table_name='appointments')
+        except Exception:
+            pass  # Index might not exist
@@ -0,0 +1,100 @@
+"""create appointment series and series exceptions tables
+
+Revision ID: 20261017_000010
+Revises: 20261017_000009
+Create Date: 2026-10-17 00:00:10.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000010'
+down_revision: Union[str, None] = '20261017_000009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create enum type if it doesn't exist
+    series_frequency_enum = postgresql.ENUM('DAILY', 'WEEKLY', name='seriesfrequency', create_type=False)
+    series_frequency_enum.create(op.get_bind(), checkfirst=True)
+
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # One row per recurring appointment; occurrences are computed, not stored
+    if 'appointment_series' not in existing_tables:
+        op.create_table(
+            'appointment_series',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('patient_name', sa.String(length=255), nullable=False),
+            sa.Column('patient_contact_details', sa.String(length=255), nullable=False),
+            sa.Column('doctor_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('clinic_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('starts_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('duration_minutes', sa.Integer(), nullable=False),
+            sa.Column('frequency', series_frequency_enum, nullable=False),
+            sa.Column('interval', sa.Integer(), nullable=False, server_default='1'),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('ends_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        )
+        op.create_index(
+            'ix_appointment_series_doctor_id_starts_at',
+            'appointment_series',
+            ['doctor_id', 'starts_at'],
+            postgresql_include=['ends_at'],
+        )
+        op.create_index('ix_appointment_series_clinic_id', 'appointment_series', ['clinic_id'])
+
+    # Cancelled or moved occurrences, the only ones that get a row
+    if 'appointment_series_exceptions' not in existing_tables:
+        op.create_table(
+            'appointment_series_exceptions',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column(
+                'series_id',
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey('appointment_series.id', ondelete='CASCADE'),
+                nullable=False,
+            ),
+            sa.Column('occurrence_start', sa.DateTime(timezone=True), nullable=False),
+            sa.Column(
+                'appointment_id',
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey('appointments.id', ondelete='SET NULL'),
+                nullable=True,
+            ),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.UniqueConstraint('series_id', 'occurrence_start', name='uq_appointment_series_exceptions_occurrence'),
+        )
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointment_series_exceptions' in existing_tables:
+        op.drop_table('appointment_series_exceptions')
+
+    if 'appointment_series' in existing_tables:
+        try:
+            op.drop_index('ix_appointment_series_clinic_id', table_name='appointment_series')
+        except Exception:
+            pass  # Index might not exist
+        try:
+            op.drop_index('ix_appointment_series_doctor_id_starts_at', table_name='appointment_series')
+        except Exception:
+            pass  # Index might not exist
+        op.drop_table('appointment_series')
+
+    # Drop enum type if it exists
+    series_frequency_enum = postgresql.ENUM(name='seriesfrequency')
+    series_frequency_enum.drop(op.get_bind(), checkfirst=True)
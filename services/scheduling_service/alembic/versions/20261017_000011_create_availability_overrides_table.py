@@ -0,0 +1,60 @@
+"""create availability overrides table
+
+Revision ID: 20261017_000011
+Revises: 20261017_000010
+Create Date: 2026-10-17 00:00:11.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000011'
+down_revision: Union[str, None] = '20261017_000010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create enum type if it doesn't exist
+    override_kind_enum = postgresql.ENUM('CLOSED', 'EXTRA', name='overridekind', create_type=False)
+    override_kind_enum.create(op.get_bind(), checkfirst=True)
+
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # One row per doctor and date that differs from the weekly rules
+    if 'availability_overrides' not in existing_tables:
+        op.create_table(
+            'availability_overrides',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('doctor_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('kind', override_kind_enum, nullable=False),
+            sa.Column('start_time', sa.Time(timezone=False), nullable=True),
+            sa.Column('end_time', sa.Time(timezone=False), nullable=True),
+            sa.Column('reason', sa.String(length=255), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        )
+        op.create_index('ix_availability_overrides_doctor_id_day', 'availability_overrides', ['doctor_id', 'day'])
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'availability_overrides' in existing_tables:
+        try:
+            op.drop_index('ix_availability_overrides_doctor_id_day', table_name='availability_overrides')
+        except Exception:
+            pass  # Index might not exist
+        op.drop_table('availability_overrides')
+
+    # Drop enum type if it exists
+    override_kind_enum = postgresql.ENUM(name='overridekind')
+    override_kind_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,56 @@
+"""add clinic settings table and series time zone
+
+Revision ID: 20261017_000012
+Revises: 20261017_000011
+Create Date: 2026-10-17 00:00:12.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '20261017_000012'
+down_revision: Union[str, None] = '20261017_000011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    # Clinics without a row use settings.default_timezone
+    if 'clinic_settings' not in existing_tables:
+        op.create_table(
+            'clinic_settings',
+            sa.Column('clinic_id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+            sa.Column('timezone', sa.String(length=64), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        )
+
+    # Existing series keep repeating every exact 24h/7d, which is UTC wall-clock time
+    series_columns = [c['name'] for c in inspector.get_columns('appointment_series')]
+    if 'timezone' not in series_columns:
+        op.add_column(
+            'appointment_series',
+            sa.Column('timezone', sa.String(length=64), nullable=False, server_default='UTC'),
+        )
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointment_series' in existing_tables:
+        try:
+            op.drop_column('appointment_series', 'timezone')
+        except Exception:
+            pass  # Column might not exist
+
+    if 'clinic_settings' in existing_tables:
+        op.drop_table('clinic_settings')
@@ -0,0 +1,96 @@
+"""keyset listing indexes on appointments
+
+Revision ID: 20261017_000015
+Revises: 20261017_000012
+Create Date: 2026-10-17 00:00:15.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '20261017_000015'
+down_revision: Union[str, None] = '20261017_000012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointments' in existing_tables:
+        existing_indexes = [ix['name'] for ix in inspector.get_indexes('appointments')]
+
+        # Unfiltered listings, in their (start_time, id) keyset order
+        if 'ix_appointments_start_time_id' not in existing_indexes:
+            op.create_index('ix_appointments_start_time_id', 'appointments', ['start_time', 'id'])
+
+        # Clinic calendar views and clinic listings; id breaks start_time ties without a sort
+        if 'ix_appointments_clinic_id_start_time_id' not in existing_indexes:
+            op.create_index(
+                'ix_appointments_clinic_id_start_time_id',
+                'appointments',
+                ['clinic_id', 'start_time', 'id'],
+                postgresql_include=['end_time', 'doctor_id', 'status'],
+            )
+        if 'ix_appointments_clinic_id_start_time' in existing_indexes:
+            op.drop_index('ix_appointments_clinic_id_start_time', table_name='appointments')
+
+        # Also serves listings of a doctor's active appointments, so id joins its key
+        active = 'ix_appointments_doctor_id_start_time_active'
+        if active in existing_indexes:
+            op.drop_index(active, table_name='appointments')
+        op.create_index(
+            active,
+            'appointments',
+            ['doctor_id', 'start_time', 'id'],
+            postgresql_include=['end_time'],
+            postgresql_where=sa.text("status <> 'CANCELLED'"),
+        )
+
+        # A doctor works in one clinic; without this Postgres multiplies the two filters'
+        # selectivities and plans doctor-and-clinic listings for a handful of rows
+        op.execute(
+            "CREATE STATISTICS IF NOT EXISTS st_appointments_doctor_clinic (dependencies) "
+            "ON doctor_id, clinic_id FROM appointments"
+        )
+        op.execute("ANALYZE appointments")
+
+
+def downgrade() -> None:
+    # Get connection and check for existing tables
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_tables = inspector.get_table_names()
+
+    if 'appointments' in existing_tables:
+        op.execute("DROP STATISTICS IF EXISTS st_appointments_doctor_clinic")
+        existing_indexes = [ix['name'] for ix in inspector.get_indexes('appointments')]
+        active = 'ix_appointments_doctor_id_start_time_active'
+        if active in existing_indexes:
+            op.drop_index(active, table_name='appointments')
+        op.create_index(
+            active,
+            'appointments',
+            ['doctor_id', 'start_time'],
+            postgresql_include=['end_time'],
+            postgresql_where=sa.text("status <> 'CANCELLED'"),
+        )
+        if 'ix_appointments_clinic_id_start_time' not in existing_indexes:
+            op.create_index(
+                'ix_appointments_clinic_id_start_time',
+                'appointments',
+                ['clinic_id', 'start_time'],
+                postgresql_include=['end_time', 'doctor_id', 'status'],
+            )
+        try:
+            op.drop_index('ix_appointments_clinic_id_start_time_id', table_name='appointments')
+        except Exception:
+            pass  # Index might not exist
+        try:
+            op.drop_index('ix_appointments_start_time_id', table_name='appointments')
+        except Exception:
+            pass  # Index might not exist
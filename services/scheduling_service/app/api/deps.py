@@ -1,20 +1,43 @@
+import uuid
+from typing import Any, Callable
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from jose.exceptions import ExpiredSignatureError, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.jwt_cache import build_current_user_dependency, decoder_from_settings
 
 from app.core.config import settings
+from app.core.timezones import ZoneTable, clinic_timezones, zone_table
+from app.crud.clinic_settings_crud import get_timezone_name
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+token_decoder = decoder_from_settings(settings)
+
+get_current_user_payload = build_current_user_dependency(token_decoder, oauth2_scheme)
+
+# Roles of auth_service users, carried in the token's ``role`` claim
+CLINIC_ADMIN = "clinic_admin"
+
+
+def require_role(*roles: str) -> Callable[..., Any]:
+    """Dependency admitting only tokens whose ``role`` claim is one of ``roles``."""
+
+    async def check_role(token_payload: dict = Depends(get_current_user_payload)) -> dict:
+        if token_payload.get("role") not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this role")
+        return token_payload
+
+    return check_role
+
+# Booking conflicts reported by the appointment and series endpoints
+OUTSIDE_WORKING_HOURS = "The requested time slot is outside the doctor's working hours."
+ALREADY_BOOKED = "The requested time slot is already booked."
 
-def get_current_user_payload(token: str = Depends(oauth2_scheme)) -> dict:
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
-    except ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+async def clinic_zone(db: AsyncSession, clinic_id: uuid.UUID) -> ZoneTable:
+    """Conversions for the clinic's time zone, which its doctors' hours are in."""
+    tz = await clinic_timezones.get(clinic_id, lambda: get_timezone_name(db, clinic_id=clinic_id))
+    return zone_table(tz)
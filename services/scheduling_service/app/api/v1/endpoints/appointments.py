@@ -1,21 +1,56 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+import json
+import uuid
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user_payload
+from app.api.deps import ALREADY_BOOKED, OUTSIDE_WORKING_HOURS, clinic_zone, get_current_user_payload
 from app.db.session import get_session
-from app.schemas.appointment_schema import AppointmentCreate, AppointmentPublic
-from app.crud.appointment_crud import create_appointment
+from app.core.availability_cache import availability_cache
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.timezones import ZoneTable, clinic_timezones, zone_table
+from app.schemas.appointment_schema import (
+    AppointmentBulkCreate,
+    AppointmentBulkItemResult,
+    AppointmentBulkResult,
+    AppointmentCreate,
+    AppointmentPage,
+    AppointmentPublic,
+)
+from app.crud.appointment_crud import (
+    SlotAlreadyBooked,
+    create_appointment,
+    create_appointments,
+    find_conflicting,
+    list_appointments,
+)
+from app.crud.availability_crud import load_availability, load_availability_for_doctors
+from app.crud.clinic_settings_crud import get_timezone_names
+from app.crud.series_crud import list_series_busy_intervals, lock_doctor_calendars
+from app.core.slots import find_overlaps, merge_intervals
 from app.models.appointment_model import Appointment, AppointmentStatus
-from app.models.availability_model import DoctorAvailability
 
 router = APIRouter()
 
+# Bulk inserts re-check conflicts this many times when bookings race with them
+BULK_INSERT_ATTEMPTS = 3
+
+
+def _localize(item: AppointmentCreate, zone: ZoneTable) -> AppointmentCreate:
+    """``item`` with UTC times; naive times are wall-clock times at the clinic."""
+    return item.model_copy(update={"start_time": zone.as_utc(item.start_time), "end_time": zone.as_utc(item.end_time)})
 
-def _map_py_weekday_to_spec(d: datetime) -> int:
-    # Python: Monday=0..Sunday=6; Spec: Sunday=0..Saturday=6
-    return (d.weekday() + 1) % 7
+
+def _time_range_error(item: AppointmentCreate, zone: ZoneTable) -> Optional[str]:
+    if item.start_time >= item.end_time:
+        return "start_time must be earlier than end_time"
+    if zone.local_date(item.start_time) != zone.local_date(item.end_time):
+        return "Appointments must start and end on the same day"
+    return None
 
 
 @router.post("/", response_model=AppointmentPublic, status_code=status.HTTP_201_CREATED)
@@ -24,49 +59,200 @@ async def create(
     db: AsyncSession = Depends(get_session),
     token_payload: dict = Depends(get_current_user_payload),
 ):
-    # Basic sanity
+    # Basic sanity, on the clinic's calendar
+    zone = await clinic_zone(db, payload.clinic_id)
+    payload = _localize(payload, zone)
     if payload.start_time >= payload.end_time:
         raise HTTPException(status_code=400, detail="start_time must be earlier than end_time")
-    if payload.start_time.date() != payload.end_time.date():
+    if zone.local_date(payload.start_time) != zone.local_date(payload.end_time):
         raise HTTPException(status_code=409, detail="Appointments must start and end on the same day")
 
-    # Availability check
-    dow = _map_py_weekday_to_spec(payload.start_time)
-    start_t = payload.start_time.time()
-    end_t = payload.end_time.time()
-
-    res = await db.execute(
-        select(DoctorAvailability).where(
-            and_(
-                DoctorAvailability.doctor_id == payload.doctor_id,
-                DoctorAvailability.day_of_week == dow,
-            )
+    # Availability check against the compiled rules and overrides (no query unless the cache is cold)
+    compiled = await availability_cache.get(
+        payload.doctor_id, lambda: load_availability(db, doctor_id=payload.doctor_id)
+    )
+    if not compiled.covers(zone.to_local(payload.start_time), zone.to_local(payload.end_time)):
+        raise HTTPException(
+            status_code=409,
+            detail=OUTSIDE_WORKING_HOURS,
         )
+
+    # Series occurrences are not rows; check them under the doctor's calendar lock
+    await lock_doctor_calendars(db, [payload.doctor_id])
+    series_busy = await list_series_busy_intervals(
+        db, doctor_ids=[payload.doctor_id], start=payload.start_time, end=payload.end_time
     )
-    rules = list(res.scalars().all())
+    if series_busy:
+        raise HTTPException(status_code=409, detail=ALREADY_BOOKED)
 
-    within_any_rule = any((start_t >= r.start_time and end_t <= r.end_time) for r in rules)
-    if not within_any_rule:
+    # Overlaps with other appointments are rejected by the ex_appointments_doctor_overlap
+    # exclusion constraint, which also holds when two bookings race
+    try:
+        return await create_appointment(db, payload)
+    except SlotAlreadyBooked:
         raise HTTPException(
             status_code=409,
-            detail="The requested time slot is outside the doctor's working hours.",
+            detail=ALREADY_BOOKED,
         )
 
-    # Conflict check (exclude CANCELLED)
-    overlap_q = select(Appointment).where(
-        and_(
-            Appointment.doctor_id == payload.doctor_id,
-            Appointment.status != AppointmentStatus.CANCELLED,
-            Appointment.start_time < payload.end_time,
-            Appointment.end_time > payload.start_time,
+
+def _batch_overlaps(items: Sequence[AppointmentCreate], indexes: Sequence[int]) -> Dict[int, str]:
+    """Reject items that overlap an earlier-starting item of the same doctor in the batch.
+
+    One sort by (doctor, start) and a sweep that compares each item with the last
+    item kept for that doctor.
+    """
+    rejected: Dict[int, str] = {}
+    order = sorted(indexes, key=lambda i: (items[i].doctor_id, items[i].start_time, i))
+    kept: Optional[int] = None
+    for i in order:
+        if (
+            kept is not None
+            and items[i].doctor_id == items[kept].doctor_id
+            and items[i].start_time < items[kept].end_time
+        ):
+            rejected[i] = f"Overlaps item {kept} of this batch."
+        else:
+            kept = i
+    return rejected
+
+
+async def _series_conflicts(db: AsyncSession, items: Sequence[AppointmentCreate], indexes: List[int]) -> Set[int]:
+    """Items overlapping a series occurrence, from one series lookup over the batch's time span."""
+    if not indexes:
+        return set()
+    series_busy = await list_series_busy_intervals(
+        db,
+        doctor_ids={items[i].doctor_id for i in indexes},
+        start=min(items[i].start_time for i in indexes),
+        end=max(items[i].end_time for i in indexes),
+    )
+    conflicting: Set[int] = set()
+    for doctor_id, busy in series_busy.items():
+        mine = sorted(
+            (i for i in indexes if items[i].doctor_id == doctor_id), key=lambda i: items[i].start_time
         )
+        intervals = [(items[i].start_time, items[i].end_time) for i in mine]
+        conflicting.update(mine[position] for position in find_overlaps(intervals, merge_intervals(busy)))
+    return conflicting
+
+
+@router.post("/bulk", response_model=AppointmentBulkResult, status_code=status.HTTP_200_OK)
+async def create_bulk(
+    payload: AppointmentBulkCreate,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Book many appointments at once; every item is created or rejected on its own.
+
+    Items go through the same checks as ``POST /``, but set-based: availability
+    for all doctors comes from one (cached) query, overlaps with existing bookings
+    from one query, overlaps within the batch from a sort, and the accepted items
+    are inserted with one multi-row INSERT.
+    """
+    timezones = await clinic_timezones.get_many(
+        {item.clinic_id for item in payload.items}, lambda missing: get_timezone_names(db, clinic_ids=missing)
+    )
+    zones = {clinic_id: zone_table(tz) for clinic_id, tz in timezones.items()}
+    items = [_localize(item, zones[item.clinic_id]) for item in payload.items]
+    rejected: Dict[int, str] = {}
+    for i, item in enumerate(items):
+        error = _time_range_error(item, zones[item.clinic_id])
+        if error is not None:
+            rejected[i] = error
+
+    doctor_ids = {item.doctor_id for i, item in enumerate(items) if i not in rejected}
+    compiled = await availability_cache.get_many(
+        doctor_ids, lambda missing: load_availability_for_doctors(db, doctor_ids=missing)
     )
-    conflicts = (await db.execute(overlap_q)).scalars().first()
-    if conflicts:
+    for i, item in enumerate(items):
+        if i in rejected:
+            continue
+        zone = zones[item.clinic_id]
+        if not compiled[item.doctor_id].covers(zone.to_local(item.start_time), zone.to_local(item.end_time)):
+            rejected[i] = OUTSIDE_WORKING_HOURS
+
+    # Cancelled appointments never conflict, neither in the database nor in the batch
+    for _ in range(BULK_INSERT_ATTEMPTS):
+        active = [
+            i for i, item in enumerate(items) if i not in rejected and item.status != AppointmentStatus.CANCELLED
+        ]
+        await lock_doctor_calendars(db, {items[i].doctor_id for i in active})
+        conflicting = await find_conflicting(
+            db, ((i, items[i].doctor_id, items[i].start_time, items[i].end_time) for i in active)
+        )
+        conflicting |= await _series_conflicts(db, items, active)
+        for i in conflicting:
+            rejected[i] = ALREADY_BOOKED
+        batch_rejected = _batch_overlaps(items, [i for i in active if i not in conflicting])
+
+        accepted = [i for i in range(len(items)) if i not in rejected and i not in batch_rejected]
+        try:
+            created = await create_appointments(db, [items[i] for i in accepted]) if accepted else []
+        except SlotAlreadyBooked:
+            # Someone booked one of these slots after the conflict query; look again
+            continue
+        rejected.update(batch_rejected)
+        break
+    else:
         raise HTTPException(
             status_code=409,
-            detail="The requested time slot is already booked.",
+            detail="Conflicting bookings kept arriving while inserting the batch; please retry.",
+        )
+
+    created_by_index = dict(zip(accepted, created))
+    results = [
+        AppointmentBulkItemResult(index=i, status="rejected", detail=rejected[i])
+        if i in rejected
+        else AppointmentBulkItemResult(
+            index=i, status="created", appointment=AppointmentPublic.model_validate(created_by_index[i])
         )
+        for i in range(len(items))
+    ]
+    return AppointmentBulkResult(created=len(created), rejected=len(rejected), results=results)
+
+
+def _encode_page(items: List[Appointment], next_cursor: Optional[str]) -> Iterator[bytes]:
+    # Serialize item by item rather than validating and rendering one big response model
+    yield b'{"items":['
+    for i, item in enumerate(items):
+        if i:
+            yield b","
+        yield AppointmentPublic.model_validate(item).model_dump_json().encode()
+    yield b'],"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
 
-    # Passed checks -> create
-    return await create_appointment(db, payload)
+
+@router.get("/", response_model=AppointmentPage, status_code=status.HTTP_200_OK)
+async def list_(
+    doctor_id: Optional[uuid.UUID] = None,
+    clinic_id: Optional[uuid.UUID] = None,
+    status_: Optional[AppointmentStatus] = Query(default=None, alias="status"),
+    from_: Optional[datetime] = Query(default=None, alias="from", description="Earliest start_time (inclusive)"),
+    to: Optional[datetime] = Query(default=None, description="Latest start_time (exclusive)"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=settings.appointments_page_size, ge=1, le=settings.appointments_max_page_size),
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Appointments ordered by start time, paginated with keyset cursors."""
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # One extra row tells whether there is a next page
+    rows = await list_appointments(
+        db,
+        doctor_id=doctor_id,
+        clinic_id=clinic_id,
+        status=status_,
+        start_from=from_,
+        start_to=to,
+        after=after,
+        limit=limit + 1,
+    )
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].start_time, items[-1].id) if len(rows) > limit else None
+    return StreamingResponse(_encode_page(items, next_cursor), media_type="application/json")
@@ -1,43 +1,231 @@
 import uuid
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user_payload
+from app.api.deps import CLINIC_ADMIN, get_current_user_payload, require_role
 from app.db.session import get_session
-from app.schemas.availability_schema import AvailabilitySetRequest, DoctorAvailabilityPublic
-from app.crud.availability_crud import replace_doctor_availability, get_doctor_availability
+from app.schemas.availability_schema import (
+    MAX_OVERRIDE_DAYS,
+    AvailabilityOverridePublic,
+    AvailabilityPatchRequest,
+    AvailabilityRule,
+    AvailabilitySetRequest,
+    ClinicTimezonePublic,
+    ClinicTimezoneUpdate,
+    DoctorAvailabilityPublic,
+    FreeSlot,
+    OverrideCreate,
+)
+from app.crud.availability_crud import (
+    AvailabilityRuleNotFound,
+    OverlappingRules,
+    create_overrides,
+    delete_override,
+    get_doctor_availability,
+    list_overrides,
+    load_availability,
+    overrides_for_days,
+    patch_doctor_availability,
+    replace_doctor_availability,
+)
+from app.crud.appointment_crud import list_busy_intervals
+from app.crud.clinic_settings_crud import get_timezone_name, set_timezone_name
+from app.crud.series_crud import list_series_busy_intervals
+from app.core.availability_cache import availability_cache
+from app.core.jalali import to_jalali
+from app.core.slots import find_free_slots_in_windows
+from app.core.timezones import clinic_timezones, zone_table
 
 router = APIRouter()
 
+MAX_SLOT_SEARCH_RANGE = timedelta(days=366)
 
-def _validate_rules(req: AvailabilitySetRequest) -> None:
-    for r in req.rules:
+
+def _validate_rules(rules: List[AvailabilityRule]) -> None:
+    for r in rules:
         if r.start_time >= r.end_time:
             raise HTTPException(status_code=400, detail="start_time must be earlier than end_time")
         if r.day_of_week < 0 or r.day_of_week > 6:
             raise HTTPException(status_code=400, detail="day_of_week must be in 0..6")
 
 
+def _doctor_id_from_token(token_payload: dict) -> uuid.UUID:
+    # Only allow doctor to set their own availability
+    sub = token_payload.get("sub")
+    try:
+        return uuid.UUID(str(sub))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+
+
+def _overlap_error(e: OverlappingRules) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Availability rules overlap on day_of_week {e.day_of_week}")
+
+
 @router.post("/", response_model=List[DoctorAvailabilityPublic], status_code=status.HTTP_200_OK)
 async def set_my_availability(
     payload: AvailabilitySetRequest,
     db: AsyncSession = Depends(get_session),
     token_payload: dict = Depends(get_current_user_payload),
 ):
-    _validate_rules(payload)
-    # Only allow doctor to set their own availability
-    sub = token_payload.get("sub")
+    _validate_rules(payload.rules)
+    doctor_id = _doctor_id_from_token(token_payload)
+
     try:
-        doctor_id = uuid.UUID(str(sub))
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
+        entities = await replace_doctor_availability(db, doctor_id=doctor_id, rules=payload.rules)
+    except OverlappingRules as e:
+        raise _overlap_error(e)
+    # After the commit, so no replica can reload the old rules once notified
+    await availability_cache.invalidate(doctor_id)
+    return entities
+
+
+@router.patch("/", response_model=List[DoctorAvailabilityPublic], status_code=status.HTTP_200_OK)
+async def update_my_availability(
+    payload: AvailabilityPatchRequest,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Add, change or remove individual rules; returns the resulting rules."""
+    _validate_rules(payload.add)
+    doctor_id = _doctor_id_from_token(token_payload)
+
+    try:
+        entities = await patch_doctor_availability(
+            db, doctor_id=doctor_id, add=payload.add, update_rules=payload.update, remove=payload.remove
+        )
+    except AvailabilityRuleNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Availability rules not found: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OverlappingRules as e:
+        raise _overlap_error(e)
+    await availability_cache.invalidate(doctor_id)
+    return entities
+
 
-    entities = await replace_doctor_availability(db, doctor_id=doctor_id, rules=payload.rules)
+@router.post("/overrides", response_model=List[AvailabilityOverridePublic], status_code=status.HTTP_201_CREATED)
+async def add_my_override(
+    payload: OverrideCreate,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Close (part of) some dates or add extra hours on them; one override per date of the range."""
+    doctor_id = _doctor_id_from_token(token_payload)
+    entities = await create_overrides(db, doctor_id=doctor_id, payload=payload)
+    days = {e.day for e in entities}
+    # Only the touched dates are recompiled, here and on the other replicas
+    await availability_cache.update_days(doctor_id, await overrides_for_days(db, doctor_id=doctor_id, days=days))
     return entities
 
 
+@router.delete("/overrides/{override_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_my_override(
+    override_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    doctor_id = _doctor_id_from_token(token_payload)
+    day = await delete_override(db, doctor_id=doctor_id, override_id=override_id)
+    if day is None:
+        raise HTTPException(status_code=404, detail="Availability override not found")
+    await availability_cache.update_days(doctor_id, await overrides_for_days(db, doctor_id=doctor_id, days=[day]))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/doctors/{doctor_id}", response_model=List[DoctorAvailabilityPublic], status_code=status.HTTP_200_OK)
 async def get_availability(doctor_id: uuid.UUID, db: AsyncSession = Depends(get_session)):
     return await get_doctor_availability(db, doctor_id=doctor_id)
 
+
+@router.get(
+    "/doctors/{doctor_id}/overrides", response_model=List[AvailabilityOverridePublic], status_code=status.HTTP_200_OK
+)
+async def get_overrides(
+    doctor_id: uuid.UUID,
+    from_: date = Query(alias="from"),
+    to: date = Query(),
+    db: AsyncSession = Depends(get_session),
+):
+    """The doctor's overrides dated from ``from`` to ``to``, both inclusive."""
+    if from_ > to:
+        raise HTTPException(status_code=400, detail="from must not be later than to")
+    if (to - from_).days >= MAX_OVERRIDE_DAYS:
+        raise HTTPException(status_code=400, detail=f"The range cannot exceed {MAX_OVERRIDE_DAYS} days")
+    return await list_overrides(db, doctor_id=doctor_id, start=from_, end=to)
+
+
+@router.get("/clinics/{clinic_id}/timezone", response_model=ClinicTimezonePublic, status_code=status.HTTP_200_OK)
+async def get_clinic_timezone(clinic_id: uuid.UUID, db: AsyncSession = Depends(get_session)):
+    tz = await clinic_timezones.get(clinic_id, lambda: get_timezone_name(db, clinic_id=clinic_id))
+    return ClinicTimezonePublic(clinic_id=clinic_id, timezone=str(tz))
+
+
+@router.put("/clinics/{clinic_id}/timezone", response_model=ClinicTimezonePublic, status_code=status.HTTP_200_OK)
+async def set_clinic_timezone(
+    clinic_id: uuid.UUID,
+    payload: ClinicTimezoneUpdate,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(require_role(CLINIC_ADMIN)),
+):
+    """Set the zone the clinic's working hours are in; clinic admins only.
+
+    It moves every doctor's working hours in the clinic, so it is not left to
+    any authenticated user. Existing appointments keep their instants and
+    existing series keep their zone.
+    """
+    entity = await set_timezone_name(db, clinic_id=clinic_id, name=payload.timezone)
+    clinic_timezones.set_local(clinic_id, entity.timezone)
+    return ClinicTimezonePublic(clinic_id=clinic_id, timezone=entity.timezone)
+
+
+@router.get("/doctors/{doctor_id}/slots", response_model=List[FreeSlot], status_code=status.HTTP_200_OK)
+async def get_free_slots(
+    doctor_id: uuid.UUID,
+    from_: datetime = Query(alias="from"),
+    to: datetime = Query(),
+    duration: int = Query(default=30, ge=5, le=720, description="Slot length in minutes"),
+    clinic_id: Optional[uuid.UUID] = Query(default=None, description="Read working hours in this clinic's time zone"),
+    db: AsyncSession = Depends(get_session),
+):
+    """Bookable slots in ``[from, to)``.
+
+    Working hours are read in the clinic's time zone when ``clinic_id`` is given
+    (naive ``from`` and ``to`` are then clinic-local), otherwise in the UTC
+    offset of ``from`` (UTC if it has none). Slots are returned in that zone.
+    """
+    if clinic_id is not None:
+        tz = await clinic_timezones.get(clinic_id, lambda: get_timezone_name(db, clinic_id=clinic_id))
+    else:
+        tz = from_.tzinfo or timezone.utc
+    zone = zone_table(tz)
+    start, end = zone.as_utc(from_), zone.as_utc(to)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be earlier than to")
+    if end - start > MAX_SLOT_SEARCH_RANGE:
+        raise HTTPException(status_code=400, detail="The search range cannot exceed 366 days")
+
+    # Rules and overrides come from the compiled cache; busy intervals are queried once for the whole range
+    compiled = await availability_cache.get(doctor_id, lambda: load_availability(db, doctor_id=doctor_id))
+    busy = await list_busy_intervals(db, doctor_id=doctor_id, start=start, end=end)
+    series_busy = await list_series_busy_intervals(db, doctor_ids=[doctor_id], start=start, end=end)
+    busy += series_busy.get(doctor_id, [])
+
+    slots = find_free_slots_in_windows(
+        compiled.day_windows,
+        busy,
+        start,
+        end,
+        timedelta(minutes=duration),
+        tz,
+    )
+    return [
+        FreeSlot(
+            start_time=slot_start.astimezone(tz),
+            end_time=slot_end.astimezone(tz),
+            jalali_date=str(to_jalali(zone.local_date(slot_start))),
+        )
+        for slot_start, slot_end in slots
+    ]
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Sequence
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user_payload
+from app.db.session import get_session
+from app.core.availability_cache import availability_cache
+from app.core.calendar import CalendarDay, build_days, utilization
+from app.core.jalali import parse_jalali, to_jalali, week_days, weekday_name
+from app.core.slots import Interval
+from app.core.timezones import ZoneTable, clinic_timezones, zone_by_name, zone_table
+from app.crud.appointment_crud import list_booked_blocks
+from app.crud.availability_crud import load_availability
+from app.crud.clinic_settings_crud import get_timezone_name
+from app.crud.series_crud import list_series_busy_intervals
+from app.schemas.calendar_schema import CalendarBlock, CalendarDayPublic, DoctorWeekCalendar
+
+router = APIRouter()
+
+
+def _parse_week(value: str) -> date:
+    try:
+        return parse_jalali(value) if "/" in value else date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="week must be a YYYY-MM-DD or Jalali YYYY/MM/DD date")
+
+
+def _etag(
+    tz: str, days: Sequence[date], windows: Sequence[Sequence], appointments: str, series: Sequence[Interval]
+) -> str:
+    """Strong ETag over everything the calendar is built from, computed before building it."""
+    state = {
+        "tz": tz,
+        "week": days[0].isoformat(),
+        "working": [[[start.isoformat(), end.isoformat()] for start, end in w] for w in windows],
+        "appointments": appointments,
+        "series": [[start.isoformat(), end.isoformat()] for start, end in series],
+    }
+    return '"' + hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def _blocks(intervals: List[Interval], zone: ZoneTable) -> List[CalendarBlock]:
+    return [CalendarBlock(start_time=start.astimezone(zone.tz), end_time=end.astimezone(zone.tz)) for start, end in intervals]
+
+
+def _day_public(day: CalendarDay, zone: ZoneTable) -> CalendarDayPublic:
+    return CalendarDayPublic(
+        date=day.day,
+        jalali_date=str(to_jalali(day.day)),
+        weekday=weekday_name(day.day),
+        working=_blocks(day.working, zone),
+        booked=_blocks(day.booked, zone),
+        free=_blocks(day.free, zone),
+        working_minutes=day.working_minutes,
+        booked_minutes=day.booked_minutes,
+        free_minutes=day.free_minutes,
+        utilization=day.utilization,
+    )
+
+
+@router.get(
+    "/doctors/{doctor_id}",
+    response_model=DoctorWeekCalendar,
+    status_code=status.HTTP_200_OK,
+    responses={304: {"description": "The week did not change since the ETag given in If-None-Match"}},
+)
+async def get_doctor_week(
+    doctor_id: uuid.UUID,
+    response: Response,
+    week: Optional[str] = Query(default=None, description="Any date of the week, Gregorian or Jalali; default today"),
+    clinic_id: Optional[uuid.UUID] = Query(default=None, description="Show the week in this clinic's time zone"),
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Working, booked and free blocks of a doctor's week (Saturday to Friday) with utilization.
+
+    Appointments are merged into booked blocks by one window-function query; working
+    hours come from the compiled availability cache and series occurrences are
+    expanded for the week. Send the returned ETag back in If-None-Match to get a
+    304 while nothing in the week changed.
+    """
+    if clinic_id is not None:
+        tz = await clinic_timezones.get(clinic_id, lambda: get_timezone_name(db, clinic_id=clinic_id))
+    else:
+        tz = zone_by_name(clinic_timezones.default)
+    zone = zone_table(tz)
+    anchor = _parse_week(week) if week is not None else zone.local_date(datetime.now(tz))
+    days = week_days(anchor)
+    start, end = zone.day_start(days[0]), zone.day_start(days[-1] + timedelta(days=1))
+
+    compiled = await availability_cache.get(doctor_id, lambda: load_availability(db, doctor_id=doctor_id))
+    blocks, fingerprint = await list_booked_blocks(db, doctor_id=doctor_id, start=start, end=end)
+    series_busy = (await list_series_busy_intervals(db, doctor_ids=[doctor_id], start=start, end=end)).get(
+        doctor_id, []
+    )
+
+    windows = [compiled.day_windows(day) for day in days]
+    etag = _etag(str(tz), days, windows, fingerprint, series_busy)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    booked = [(block_start, block_end) for block_start, block_end, _ in blocks] + series_busy
+    calendar_days = build_days(days, zone, lambda day: windows[(day - days[0]).days], booked)
+    working_minutes = sum(day.working_minutes for day in calendar_days)
+    free_minutes = sum(day.free_minutes for day in calendar_days)
+    return DoctorWeekCalendar(
+        doctor_id=doctor_id,
+        timezone=str(tz),
+        week_start=days[0],
+        jalali_week_start=str(to_jalali(days[0])),
+        days=[_day_public(day, zone) for day in calendar_days],
+        working_minutes=working_minutes,
+        booked_minutes=sum(day.booked_minutes for day in calendar_days),
+        free_minutes=free_minutes,
+        utilization=utilization(working_minutes, free_minutes),
+    )
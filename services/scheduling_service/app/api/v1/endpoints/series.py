@@ -0,0 +1,261 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import ALREADY_BOOKED, OUTSIDE_WORKING_HOURS, clinic_zone, get_current_user_payload
+from app.db.session import get_session
+from app.core.availability_cache import availability_cache
+from app.core.config import settings
+from app.core.recurrence import Recurrence, count_until, step_of
+from app.core.timezones import ZoneTable, zone_by_name, zone_table
+from app.core.slots import find_overlaps, merge_intervals
+from app.crud.appointment_crud import SlotAlreadyBooked, list_busy_intervals
+from app.crud.availability_crud import load_availability
+from app.crud.series_crud import (
+    OccurrenceAlreadyChanged,
+    cancel_occurrence,
+    create_series,
+    delete_series,
+    expand,
+    get_series,
+    list_exception_starts,
+    list_occurrences,
+    list_series_busy_intervals,
+    lock_doctor_calendars,
+    move_occurrence,
+)
+from app.models.series_model import AppointmentSeries
+from app.schemas.appointment_schema import AppointmentPublic
+from app.schemas.series_schema import (
+    AppointmentSeriesCreate,
+    AppointmentSeriesPublic,
+    OccurrenceMove,
+    SeriesConflict,
+    SeriesConflictResponse,
+    SeriesOccurrence,
+)
+
+router = APIRouter()
+
+MAX_OCCURRENCE_RANGE = timedelta(days=366)
+
+
+def _check_time_range(zone: ZoneTable, start_time: datetime, end_time: datetime) -> None:
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start_time must be earlier than end_time")
+    if zone.local_date(start_time) != zone.local_date(end_time):
+        raise HTTPException(status_code=409, detail="Appointments must start and end on the same day")
+
+
+async def _get_series_or_404(db: AsyncSession, series_id: uuid.UUID) -> AppointmentSeries:
+    series = await get_series(db, series_id)
+    if series is None:
+        raise HTTPException(status_code=404, detail="Appointment series not found")
+    return series
+
+
+def _occurrence_start(series: AppointmentSeries, index: int) -> datetime:
+    if not 0 <= index < series.count:
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    return series.recurrence.start_of(index)
+
+
+@router.post(
+    "/",
+    response_model=AppointmentSeriesPublic,
+    status_code=status.HTTP_201_CREATED,
+    responses={409: {"model": SeriesConflictResponse}},
+)
+async def create(
+    payload: AppointmentSeriesCreate,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Book a recurring appointment.
+
+    Every occurrence is checked against working hours and against existing
+    appointments and series with one range query each; the series is created
+    only if all of them are free.
+    """
+    # Occurrences repeat in the clinic's wall-clock time
+    zone = await clinic_zone(db, payload.clinic_id)
+    starts_at, first_end = zone.as_utc(payload.start_time), zone.as_utc(payload.end_time)
+    _check_time_range(zone, starts_at, first_end)
+    step = step_of(payload.frequency, payload.interval)
+    if payload.count is not None:
+        count = payload.count
+    else:
+        count = count_until(zone.to_local(starts_at), step, zone.to_local(zone.as_utc(payload.until)))
+    if count < 1:
+        raise HTTPException(status_code=400, detail="until must not be earlier than start_time")
+    if count > settings.series_max_occurrences:
+        raise HTTPException(
+            status_code=400, detail=f"A series cannot have more than {settings.series_max_occurrences} occurrences"
+        )
+    recurrence = Recurrence(starts_at=starts_at, duration=first_end - starts_at, step=step, count=count, tz=zone.tz)
+    occurrences = list(recurrence.between(recurrence.starts_at, recurrence.ends_at))
+
+    conflicts: List[SeriesConflict] = []
+    compiled = await availability_cache.get(
+        payload.doctor_id, lambda: load_availability(db, doctor_id=payload.doctor_id)
+    )
+    for index, occurrence_start, occurrence_end in occurrences:
+        if not compiled.covers(zone.to_local(occurrence_start), zone.to_local(occurrence_end)):
+            conflicts.append(SeriesConflict(index=index, start_time=occurrence_start, detail=OUTSIDE_WORKING_HOURS))
+
+    await lock_doctor_calendars(db, [payload.doctor_id])
+    busy = await list_busy_intervals(
+        db, doctor_id=payload.doctor_id, start=recurrence.starts_at, end=recurrence.ends_at
+    )
+    series_busy = await list_series_busy_intervals(
+        db, doctor_ids=[payload.doctor_id], start=recurrence.starts_at, end=recurrence.ends_at
+    )
+    booked = merge_intervals(busy + series_busy.get(payload.doctor_id, []))
+    for position in find_overlaps([(start, end) for _, start, end in occurrences], booked):
+        index, occurrence_start, _ = occurrences[position]
+        conflicts.append(SeriesConflict(index=index, start_time=occurrence_start, detail=ALREADY_BOOKED))
+
+    if conflicts:
+        await db.rollback()
+        conflicts.sort(key=lambda c: c.index)
+        body = SeriesConflictResponse(detail="Some occurrences cannot be booked.", conflicts=conflicts)
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT, content=body.model_dump(mode="json"))
+    return await create_series(db, payload, recurrence)
+
+
+@router.get("/occurrences", response_model=List[SeriesOccurrence], status_code=status.HTTP_200_OK)
+async def list_doctor_occurrences(
+    doctor_id: uuid.UUID,
+    from_: datetime = Query(alias="from"),
+    to: datetime = Query(),
+    clinic_id: Optional[uuid.UUID] = Query(default=None, description="Read naive from/to in this clinic's time zone"),
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Occurrences of all the doctor's series overlapping ``[from, to)``, expanded on the fly.
+
+    Naive ``from`` and ``to`` are wall-clock times in the clinic's time zone when
+    ``clinic_id`` is given, otherwise in the default clinic time zone.
+    """
+    if clinic_id is not None:
+        zone = await clinic_zone(db, clinic_id)
+    else:
+        zone = zone_table(zone_by_name(settings.default_timezone))
+    start, end = zone.as_utc(from_), zone.as_utc(to)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be earlier than to")
+    if end - start > MAX_OCCURRENCE_RANGE:
+        raise HTTPException(status_code=400, detail="The range cannot exceed 366 days")
+    occurrences = await list_occurrences(db, doctor_ids=[doctor_id], start=start, end=end)
+    return [
+        SeriesOccurrence(series_id=s.id, index=index, start_time=occurrence_start, end_time=occurrence_end)
+        for s, index, occurrence_start, occurrence_end in occurrences
+    ]
+
+
+@router.get("/{series_id}", response_model=AppointmentSeriesPublic, status_code=status.HTTP_200_OK)
+async def get(
+    series_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    return await _get_series_or_404(db, series_id)
+
+
+@router.delete("/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete(
+    series_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Cancel the whole series; appointments of moved occurrences are kept."""
+    series = await _get_series_or_404(db, series_id)
+    await delete_series(db, series)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{series_id}/occurrences", response_model=List[SeriesOccurrence], status_code=status.HTTP_200_OK)
+async def list_series_occurrences(
+    series_id: uuid.UUID,
+    from_: Optional[datetime] = Query(default=None, alias="from"),
+    to: Optional[datetime] = Query(default=None),
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Remaining occurrences of the series in ``[from, to)`` (the whole series by default).
+
+    Naive ``from`` and ``to`` are wall-clock times in the series' time zone.
+    """
+    series = await _get_series_or_404(db, series_id)
+    zone = zone_table(zone_by_name(series.timezone))
+    start = zone.as_utc(from_) if from_ is not None else series.starts_at
+    end = zone.as_utc(to) if to is not None else series.ends_at
+    skipped = await list_exception_starts(db, series_ids=[series.id], start=start, end=end)
+    return [
+        SeriesOccurrence(series_id=series.id, index=index, start_time=occurrence_start, end_time=occurrence_end)
+        for _, index, occurrence_start, occurrence_end in expand([series], skipped, start, end)
+    ]
+
+
+@router.delete("/{series_id}/occurrences/{index}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel(
+    series_id: uuid.UUID,
+    index: int,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Cancel one occurrence; only this exception is stored."""
+    series = await _get_series_or_404(db, series_id)
+    try:
+        await cancel_occurrence(db, series, _occurrence_start(series, index))
+    except OccurrenceAlreadyChanged:
+        raise HTTPException(status_code=409, detail="The occurrence was already cancelled or moved.")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/{series_id}/occurrences/{index}/move", response_model=AppointmentPublic, status_code=status.HTTP_201_CREATED
+)
+async def move(
+    series_id: uuid.UUID,
+    index: int,
+    payload: OccurrenceMove,
+    db: AsyncSession = Depends(get_session),
+    token_payload: dict = Depends(get_current_user_payload),
+):
+    """Move one occurrence; it becomes a regular appointment at the new time."""
+    series = await _get_series_or_404(db, series_id)
+    occurrence_start = _occurrence_start(series, index)
+    zone = await clinic_zone(db, series.clinic_id)
+    start_time, end_time = zone.as_utc(payload.start_time), zone.as_utc(payload.end_time)
+    _check_time_range(zone, start_time, end_time)
+
+    compiled = await availability_cache.get(
+        series.doctor_id, lambda: load_availability(db, doctor_id=series.doctor_id)
+    )
+    if not compiled.covers(zone.to_local(start_time), zone.to_local(end_time)):
+        raise HTTPException(status_code=409, detail=OUTSIDE_WORKING_HOURS)
+
+    # The occurrence being moved must not block its own new time
+    await lock_doctor_calendars(db, [series.doctor_id])
+    series_busy = await list_series_busy_intervals(
+        db,
+        doctor_ids=[series.doctor_id],
+        start=start_time,
+        end=end_time,
+        also_skip=[(series.id, occurrence_start)],
+    )
+    if series_busy:
+        raise HTTPException(status_code=409, detail=ALREADY_BOOKED)
+    try:
+        return await move_occurrence(
+            db, series, occurrence_start, start_time=start_time, end_time=end_time
+        )
+    except SlotAlreadyBooked:
+        raise HTTPException(status_code=409, detail=ALREADY_BOOKED)
+    except OccurrenceAlreadyChanged:
+        raise HTTPException(status_code=409, detail="The occurrence was already cancelled or moved.")
@@ -0,0 +1,327 @@
+"""Per-doctor compiled availability, cached in process.
+
+Weekly rules and date overrides only change through the availability
+endpoints, so each replica keeps a compiled copy per doctor: the weekly rules
+merged into non-overlapping windows per weekday, and for a rolling window of
+days (``window_days`` from yesterday) the effective working hours with the
+overrides applied, flattened into one sorted array so that "does this
+appointment fit" is one bisect. Days outside that window are computed on demand.
+
+Writers call ``AvailabilityCache.invalidate`` after changing weekly rules, which
+drops the local entry and publishes the doctor ID on ``CHANNEL``; every replica
+runs ``listen`` and drops its own copy when a message arrives. Override changes
+go through ``update_days`` instead: the new overrides of the touched dates are
+published, and replicas rebuild only those days of the entry they hold.
+
+Pub/sub is fire-and-forget, so the listener also clears everything whenever it
+(re)subscribes, and entries expire after ``ttl`` seconds to bound staleness
+while Redis is unreachable.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dtime
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+
+from shared.messaging import get_redis
+
+from app.core.config import settings
+from app.core.slots import WeeklyWindows, merge_intervals, spec_day_of_week, subtract_busy, weekly_windows
+from app.models.availability_model import OverrideKind
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "yakhteh:availability:invalidate"
+
+Rule = Tuple[int, dtime, dtime]
+# (kind, start_time, end_time); the times are None for a whole-day closure
+Override = Tuple[OverrideKind, Optional[dtime], Optional[dtime]]
+Overrides = Mapping[date, Sequence[Override]]
+Availability = Tuple[Iterable[Rule], Overrides]
+
+
+def window_start_today() -> date:
+    # Yesterday in UTC is today or earlier in every UTC offset
+    return datetime.now(timezone.utc).date() - timedelta(days=1)
+
+
+def apply_overrides(windows: Sequence[Tuple[dtime, dtime]], overrides: Sequence[Override]) -> List[Tuple[dtime, dtime]]:
+    """Working windows of one date: the weekly windows minus closures, plus extra hours."""
+    if not overrides:
+        return list(windows)
+    if any(kind == OverrideKind.CLOSED and start is None for kind, start, _ in overrides):
+        remaining: List[Tuple[dtime, dtime]] = []
+    else:
+        closed = merge_intervals((start, end) for kind, start, end in overrides if kind == OverrideKind.CLOSED)
+        remaining = list(subtract_busy(windows, closed))
+    extra = [(start, end) for kind, start, end in overrides if kind == OverrideKind.EXTRA]
+    return merge_intervals(remaining + extra)
+
+
+class CompiledAvailability:
+    """A doctor's weekly rules and date overrides, compiled for bisect lookups.
+
+    Times are wall-clock: a booking is checked in the UTC offset it was made in.
+    """
+
+    __slots__ = ("weekly", "overrides", "window_start", "window_end", "_starts", "_ends")
+
+    def __init__(self, weekly: WeeklyWindows, overrides: Overrides, window_start: date, window_days: int) -> None:
+        self.weekly = weekly
+        self.overrides: Dict[date, Sequence[Override]] = {day: o for day, o in overrides.items() if o}
+        self.window_start = window_start
+        self.window_end = window_start + timedelta(days=window_days)
+        # Effective windows of every day in [window_start, window_end), in order
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        day = window_start
+        while day < self.window_end:
+            for start, end in self.day_windows(day):
+                self._starts.append(datetime.combine(day, start))
+                self._ends.append(datetime.combine(day, end))
+            day += timedelta(days=1)
+
+    @classmethod
+    def from_rules(
+        cls,
+        rules: Iterable[Rule],
+        overrides: Overrides = {},
+        *,
+        window_start: Optional[date] = None,
+        window_days: int = 0,
+    ) -> "CompiledAvailability":
+        return cls(weekly_windows(rules), overrides, window_start or window_start_today(), window_days)
+
+    def day_windows(self, day: date) -> List[Tuple[dtime, dtime]]:
+        """Effective working windows of ``day``."""
+        return apply_overrides(self.weekly.get(spec_day_of_week(day), ()), self.overrides.get(day, ()))
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Whether ``[start, end]`` lies inside one working window (in ``start``'s own offset)."""
+        start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+        if self.window_start <= start.date() < self.window_end:
+            # Last window starting at or before ``start``; windows do not overlap
+            i = bisect_right(self._starts, start) - 1
+            return i >= 0 and end <= self._ends[i]
+        if start.date() != end.date():
+            return False
+        return any(s <= start.time() and end.time() <= e for s, e in self.day_windows(start.date()))
+
+    def with_days(self, changes: Overrides) -> "CompiledAvailability":
+        """A copy with the overrides of the given dates replaced; only those days are recomputed."""
+        new = object.__new__(CompiledAvailability)
+        new.weekly = self.weekly
+        new.overrides = {day: o for day, o in {**self.overrides, **changes}.items() if o}
+        new.window_start, new.window_end = self.window_start, self.window_end
+        new._starts, new._ends = list(self._starts), list(self._ends)
+        for day in changes:
+            if not self.window_start <= day < self.window_end:
+                continue
+            lo = bisect_left(new._starts, datetime.combine(day, dtime.min))
+            hi = bisect_left(new._starts, datetime.combine(day + timedelta(days=1), dtime.min))
+            windows = new.day_windows(day)
+            new._starts[lo:hi] = [datetime.combine(day, start) for start, _ in windows]
+            new._ends[lo:hi] = [datetime.combine(day, end) for _, end in windows]
+        return new
+
+
+def _encode_days(doctor_id: uuid.UUID, changes: Overrides) -> str:
+    return json.dumps(
+        {
+            "doctor_id": str(doctor_id),
+            "days": {
+                day.isoformat(): [
+                    [str(kind), start and start.isoformat(), end and end.isoformat()] for kind, start, end in overrides
+                ]
+                for day, overrides in changes.items()
+            },
+        }
+    )
+
+
+def _decode_days(data: Dict[str, Any]) -> Tuple[uuid.UUID, Dict[date, List[Override]]]:
+    changes = {
+        date.fromisoformat(day): [
+            (OverrideKind(kind), start and dtime.fromisoformat(start), end and dtime.fromisoformat(end))
+            for kind, start, end in overrides
+        ]
+        for day, overrides in data["days"].items()
+    }
+    return uuid.UUID(data["doctor_id"]), changes
+
+
+class AvailabilityCache:
+    """Size-bounded LRU of ``CompiledAvailability`` keyed by doctor ID."""
+
+    def __init__(self, *, maxsize: int, ttl: float, window_days: int, retry_after: float = 5.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.window_days = window_days
+        self.retry_after = retry_after
+        self._entries: "OrderedDict[uuid.UUID, Tuple[CompiledAvailability, float]]" = OrderedDict()
+        # Bumped on every change so a load that raced with one is not stored
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.day_updates = 0
+        self.publish_errors = 0
+
+    def _compile(self, availability: Availability) -> CompiledAvailability:
+        rules, overrides = availability
+        return CompiledAvailability.from_rules(rules, overrides, window_days=self.window_days)
+
+    def _get_local(self, doctor_id: uuid.UUID) -> Optional[CompiledAvailability]:
+        entry = self._entries.get(doctor_id)
+        if entry is None:
+            return None
+        compiled, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[doctor_id]
+            return None
+        self._entries.move_to_end(doctor_id)
+        return compiled
+
+    def _put_local(self, doctor_id: uuid.UUID, compiled: CompiledAvailability) -> None:
+        self._entries[doctor_id] = (compiled, time.monotonic() + self.ttl)
+        self._entries.move_to_end(doctor_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get(self, doctor_id: uuid.UUID, loader: Callable[[], Awaitable[Availability]]) -> CompiledAvailability:
+        compiled = self._get_local(doctor_id)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        version = self._version
+        compiled = self._compile(await loader())
+        if version == self._version:
+            self._put_local(doctor_id, compiled)
+        return compiled
+
+    async def get_many(
+        self,
+        doctor_ids: Collection[uuid.UUID],
+        loader: Callable[[List[uuid.UUID]], Awaitable[Mapping[uuid.UUID, Availability]]],
+    ) -> Dict[uuid.UUID, CompiledAvailability]:
+        """``get`` for several doctors; ``loader`` is called once with all the misses."""
+        found: Dict[uuid.UUID, CompiledAvailability] = {}
+        missing: List[uuid.UUID] = []
+        for doctor_id in doctor_ids:
+            compiled = self._get_local(doctor_id)
+            if compiled is None:
+                missing.append(doctor_id)
+            else:
+                found[doctor_id] = compiled
+        self.hits += len(found)
+        if not missing:
+            return found
+
+        self.misses += len(missing)
+        version = self._version
+        loaded = await loader(missing)
+        store = version == self._version
+        for doctor_id in missing:
+            compiled = self._compile(loaded.get(doctor_id, ((), {})))
+            found[doctor_id] = compiled
+            if store:
+                self._put_local(doctor_id, compiled)
+        return found
+
+    def invalidate_local(self, doctor_id: uuid.UUID) -> None:
+        self._version += 1
+        self.invalidations += 1
+        self._entries.pop(doctor_id, None)
+
+    def update_days_local(self, doctor_id: uuid.UUID, changes: Overrides) -> None:
+        self._version += 1
+        self.day_updates += 1
+        entry = self._entries.get(doctor_id)
+        if entry is not None:
+            compiled, expires_at = entry
+            self._entries[doctor_id] = (compiled.with_days(changes), expires_at)
+
+    async def _publish(self, doctor_id: uuid.UUID, message: str) -> None:
+        try:
+            await get_redis().publish(CHANNEL, message)
+        except (RuntimeError, RedisError, OSError) as e:
+            # Other replicas catch up when their entry expires
+            self.publish_errors += 1
+            logger.warning(f"Could not publish availability change for {doctor_id}: {e}")
+
+    async def invalidate(self, doctor_id: uuid.UUID) -> None:
+        """Drop ``doctor_id`` here and tell the other replicas to do the same."""
+        self.invalidate_local(doctor_id)
+        await self._publish(doctor_id, str(doctor_id))
+
+    async def update_days(self, doctor_id: uuid.UUID, changes: Overrides) -> None:
+        """Replace the overrides of some dates here and on the other replicas.
+
+        ``changes`` must hold every override of each date (empty for none left).
+        """
+        self.update_days_local(doctor_id, changes)
+        await self._publish(doctor_id, _encode_days(doctor_id, changes))
+
+    def _apply_message(self, data: str) -> None:
+        if data.startswith("{"):
+            doctor_id, changes = _decode_days(json.loads(data))
+            self.update_days_local(doctor_id, changes)
+        else:
+            self.invalidate_local(uuid.UUID(data))
+
+    def clear(self) -> None:
+        self._version += 1
+        self._entries.clear()
+
+    async def listen(self) -> None:
+        """Apply changes published by any replica; runs until cancelled."""
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub()
+                await pubsub.subscribe(CHANNEL)
+                # Anything published while we were not subscribed is lost
+                self.clear()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self._apply_message(message["data"])
+                    except (TypeError, ValueError, KeyError, AttributeError):
+                        logger.warning(f"Ignoring malformed availability change: {message['data']!r}")
+            except (RedisError, OSError) as e:
+                logger.warning(f"Availability change listener lost Redis, retrying in {self.retry_after}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except (RedisError, OSError):
+                        pass
+            await asyncio.sleep(self.retry_after)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "day_updates": self.day_updates,
+            "publish_errors": self.publish_errors,
+        }
+
+
+availability_cache = AvailabilityCache(
+    maxsize=settings.availability_cache_size,
+    ttl=settings.availability_cache_ttl_seconds,
+    window_days=settings.availability_window_days,
+)
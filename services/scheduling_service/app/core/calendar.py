@@ -0,0 +1,72 @@
+"""Doctor week calendar: working, booked and free blocks per local day.
+
+Pure functions over what the calendar endpoint loads (compiled availability,
+merged booked blocks), so the aggregate can be tested without a database.
+Blocks are UTC instants; days and weeks follow the clinic's time zone and the
+Jalali week (Saturday to Friday).
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Sequence, Tuple
+
+from app.core.slots import DayWindows, Interval, merge_intervals, subtract_busy
+from app.core.timezones import ZoneTable
+
+
+def _minutes(intervals: Iterable[Interval]) -> int:
+    return int(sum((end - start for start, end in intervals), timedelta()) / timedelta(minutes=1))
+
+
+def _clip(intervals: Sequence[Interval], start: datetime, end: datetime) -> List[Interval]:
+    return [(max(s, start), min(e, end)) for s, e in intervals if s < end and e > start]
+
+
+def utilization(working_minutes: int, free_minutes: int) -> float:
+    """Share of working time that is booked, in percent."""
+    if not working_minutes:
+        return 0.0
+    return round(100 * (working_minutes - free_minutes) / working_minutes, 1)
+
+
+@dataclass
+class CalendarDay:
+    day: date
+    working: List[Interval] = field(default_factory=list)
+    booked: List[Interval] = field(default_factory=list)
+    free: List[Interval] = field(default_factory=list)
+
+    @property
+    def working_minutes(self) -> int:
+        return _minutes(self.working)
+
+    @property
+    def booked_minutes(self) -> int:
+        return _minutes(self.booked)
+
+    @property
+    def free_minutes(self) -> int:
+        return _minutes(self.free)
+
+    @property
+    def utilization(self) -> float:
+        return utilization(self.working_minutes, self.free_minutes)
+
+
+def build_days(
+    days: Sequence[date], zone: ZoneTable, windows: DayWindows, booked: Iterable[Interval]
+) -> List[CalendarDay]:
+    """One ``CalendarDay`` per local date; ``booked`` may be unsorted and overlapping."""
+    booked = merge_intervals(booked)
+    result: List[CalendarDay] = []
+    for day in days:
+        day_start, day_end = zone.day_bounds(day)
+        working: List[Tuple[datetime, datetime]] = [
+            (zone.to_utc(datetime.combine(day, start)), zone.to_utc(datetime.combine(day, end)))
+            for start, end in windows(day)
+        ]
+        day_booked = _clip(booked, day_start, day_end)
+        result.append(
+            CalendarDay(day=day, working=working, booked=day_booked, free=list(subtract_busy(working, day_booked)))
+        )
+    return result
@@ -11,7 +11,35 @@ class Settings(BaseSettings):
     # JWT validation for protected endpoints
     secret_key: str = "change_me_in_prod"
     algorithm: str = "HS256"
-    
+
+    # Local JWT verification cache (see shared.jwt_cache)
+    jwt_cache_size: int = 10000
+    jwt_negative_cache_ttl_seconds: int = 30
+
+    # Redis (availability invalidation pub/sub)
+    redis_url: str = "redis://redis_cache:6379/0"
+
+    # Compiled availability cache (see app.core.availability_cache)
+    availability_cache_size: int = 10000
+    availability_cache_ttl_seconds: int = 300
+    # Days from yesterday with effective hours (rules plus overrides) precomputed per doctor
+    availability_window_days: int = 90
+
+    # Zone for clinics that did not set one; rules and overrides are wall-clock times in it
+    default_timezone: str = "Asia/Tehran"
+    clinic_timezone_cache_size: int = 10000
+    clinic_timezone_cache_ttl_seconds: int = 60
+
+    # GET /api/v1/appointments page size
+    appointments_page_size: int = 50
+    appointments_max_page_size: int = 200
+
+    # POST /api/v1/appointments/bulk
+    appointments_bulk_max_items: int = 5000
+
+    # Longest allowed appointment series (occurrences)
+    series_max_occurrences: int = 260
+
     my_domain: str = "localhost"  # Domain for CORS and routing
 
 
@@ -0,0 +1,138 @@
+"""Jalali (Solar Hijri) calendar conversions for clinic-facing views.
+
+Dates are stored and computed as Gregorian ``date`` objects; this module only
+converts them for display and for week boundaries, since the Iranian week runs
+from Saturday (Shanbeh) to Friday (Jomeh). Leap years follow the arithmetic
+break-year table used by jalaali-js (Borkowski), which matches the official
+calendar for 1 to 3177 AP.
+"""
+
+from datetime import date, timedelta
+from typing import List, NamedTuple, Tuple
+
+# Years at which the 33/29-year leap pattern shifts
+_BREAKS = (
+    -61, 9, 38, 199, 426, 686, 756, 818, 1111, 1181, 1210,
+    1635, 2060, 2097, 2192, 2262, 2324, 2394, 2456, 3178,
+)
+
+MONTH_NAMES = (
+    "Farvardin", "Ordibehesht", "Khordad", "Tir", "Mordad", "Shahrivar",
+    "Mehr", "Aban", "Azar", "Dey", "Bahman", "Esfand",
+)
+# Persian names in Python weekday order (Monday=0)
+WEEKDAY_NAMES = ("Doshanbeh", "Seshanbeh", "Chaharshanbeh", "Panjshanbeh", "Jomeh", "Shanbeh", "Yekshanbeh")
+
+
+class JalaliDate(NamedTuple):
+    year: int
+    month: int
+    day: int
+
+    def __str__(self) -> str:
+        return f"{self.year:04d}/{self.month:02d}/{self.day:02d}"
+
+
+def _div(a: int, b: int) -> int:
+    # Truncating division, as in the reference algorithm
+    return -(-a // b) if (a < 0) != (b < 0) else a // b
+
+
+def _mod(a: int, b: int) -> int:
+    return a - _div(a, b) * b
+
+
+def _jal_cal(jy: int) -> Tuple[int, int, int]:
+    """``(leap, gregorian year, March day of 1 Farvardin)`` for Jalali year ``jy``.
+
+    ``leap`` is the position in the 4-year cycle; 0 means ``jy`` is a leap year.
+    """
+    if not _BREAKS[0] <= jy < _BREAKS[-1]:
+        raise ValueError(f"Jalali year out of range: {jy}")
+    gy = jy + 621
+    leap_j = -14
+    jp = _BREAKS[0]
+    jump = 0
+    for jm in _BREAKS[1:]:
+        jump = jm - jp
+        if jy < jm:
+            break
+        leap_j += _div(jump, 33) * 8 + _div(_mod(jump, 33), 4)
+        jp = jm
+    n = jy - jp
+    leap_j += _div(n, 33) * 8 + _div(_mod(n, 33) + 3, 4)
+    if _mod(jump, 33) == 4 and jump - n == 4:
+        leap_j += 1
+    leap_g = _div(gy, 4) - _div((_div(gy, 100) + 1) * 3, 4) - 150
+    march = 20 + leap_j - leap_g
+    if jump - n < 6:
+        n = n - jump + _div(jump + 4, 33) * 33
+    leap = _mod(_mod(n + 1, 33) - 1, 4)
+    if leap == -1:
+        leap = 4
+    return leap, gy, march
+
+
+def is_leap(jy: int) -> bool:
+    return _jal_cal(jy)[0] == 0
+
+
+def month_length(jy: int, jm: int) -> int:
+    if not 1 <= jm <= 12:
+        raise ValueError(f"Jalali month out of range: {jm}")
+    if jm <= 6:
+        return 31
+    if jm <= 11:
+        return 30
+    return 30 if is_leap(jy) else 29
+
+
+def _nowruz(jy: int) -> date:
+    """Gregorian date of 1 Farvardin ``jy``."""
+    _, gy, march = _jal_cal(jy)
+    return date(gy, 3, 1) + timedelta(days=march - 1)
+
+
+def from_jalali(jy: int, jm: int, jd: int) -> date:
+    if not 1 <= jd <= month_length(jy, jm):
+        raise ValueError(f"Jalali day out of range: {jy}/{jm}/{jd}")
+    # Months 1-6 have 31 days, 7-11 have 30
+    day_of_year = (jm - 1) * 31 - max(0, jm - 7) + jd - 1
+    return _nowruz(jy) + timedelta(days=day_of_year)
+
+
+def to_jalali(d: date) -> JalaliDate:
+    jy = d.year - 621
+    nowruz = _nowruz(jy)
+    if d < nowruz:
+        jy -= 1
+        nowruz = _nowruz(jy)
+    day_of_year = (d - nowruz).days
+    if day_of_year < 186:
+        return JalaliDate(jy, day_of_year // 31 + 1, day_of_year % 31 + 1)
+    day_of_year -= 186
+    return JalaliDate(jy, day_of_year // 30 + 7, day_of_year % 30 + 1)
+
+
+def parse_jalali(value: str) -> date:
+    """Gregorian date of a ``YYYY/MM/DD`` (or ``YYYY-MM-DD``) Jalali date."""
+    parts = value.replace("-", "/").split("/")
+    if len(parts) != 3:
+        raise ValueError(f"Invalid Jalali date: {value}")
+    jy, jm, jd = (int(p) for p in parts)
+    return from_jalali(jy, jm, jd)
+
+
+def week_start(d: date) -> date:
+    """The Saturday starting ``d``'s Jalali week."""
+    return d - timedelta(days=(d.weekday() - 5) % 7)
+
+
+def week_days(d: date) -> List[date]:
+    """Saturday to Friday of ``d``'s Jalali week."""
+    first = week_start(d)
+    return [first + timedelta(days=i) for i in range(7)]
+
+
+def weekday_name(d: date) -> str:
+    return WEEKDAY_NAMES[d.weekday()]
@@ -0,0 +1,27 @@
+"""Opaque keyset cursors for ``(start_time, id)``-ordered listings."""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+Cursor = Tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(start_time: datetime, item_id: uuid.UUID) -> str:
+    raw = json.dumps([start_time.isoformat(), str(item_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ``ValueError`` for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start_time, item_id = json.loads(raw)
+        parsed = datetime.fromisoformat(start_time)
+        if parsed.tzinfo is None:
+            raise ValueError("cursor timestamp has no timezone")
+        return parsed, uuid.UUID(item_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,79 @@
+"""Recurring appointment series (a subset of iCalendar RRULE).
+
+A series is stored once as its first occurrence, a frequency (``DAILY`` or
+``WEEKLY``), an ``INTERVAL``, a ``COUNT`` and the clinic's time zone; occurrence
+``k`` starts at ``starts_at + k * step`` in wall-clock time, so a weekly 09:00
+appointment stays at 09:00 across DST changes. Occurrences are never stored:
+they are computed for the window being looked at, jumping straight to the first
+one in the window, so the cost follows the size of the window rather than the
+length of the series.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from enum import StrEnum
+from typing import Iterator, Tuple
+
+from app.core.timezones import ZoneTable, zone_table
+
+Interval = Tuple[datetime, datetime]
+
+
+class SeriesFrequency(StrEnum):
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+
+
+_PERIOD = {SeriesFrequency.DAILY: timedelta(days=1), SeriesFrequency.WEEKLY: timedelta(weeks=1)}
+
+
+def step_of(frequency: SeriesFrequency, interval: int) -> timedelta:
+    return _PERIOD[frequency] * interval
+
+
+def count_until(starts_at: datetime, step: timedelta, until: datetime) -> int:
+    """Number of occurrences starting at or before ``until`` (RRULE ``UNTIL`` is inclusive)."""
+    if until < starts_at:
+        return 0
+    return (until - starts_at) // step + 1
+
+
+def format_rrule(frequency: SeriesFrequency, interval: int, count: int) -> str:
+    return f"FREQ={frequency};INTERVAL={interval};COUNT={count}"
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    starts_at: datetime
+    duration: timedelta
+    step: timedelta
+    count: int
+    tz: tzinfo = timezone.utc
+
+    @property
+    def _zone(self) -> ZoneTable:
+        return zone_table(self.tz)
+
+    @property
+    def _local_start(self) -> datetime:
+        return self._zone.to_local(self.starts_at)
+
+    @property
+    def ends_at(self) -> datetime:
+        """End of the last occurrence."""
+        return self.start_of(self.count - 1) + self.duration
+
+    def start_of(self, index: int) -> datetime:
+        return self._zone.to_utc(self._local_start + index * self.step)
+
+    def between(self, start: datetime, end: datetime) -> Iterator[Tuple[int, datetime, datetime]]:
+        """``(index, start, end)`` of the occurrences overlapping ``[start, end)``, in order."""
+        zone, local_start = self._zone, self._local_start
+        # Index bounds in wall-clock time, widened by a day for offset changes
+        first = max(0, (zone.to_local(start) - self.duration - local_start - timedelta(days=1)) // self.step + 1)
+        stop = min(self.count, -((local_start - zone.to_local(end) - timedelta(days=1)) // self.step))
+        for index in range(first, stop):
+            occurrence_start = zone.to_utc(local_start + index * self.step)
+            occurrence_end = occurrence_start + self.duration
+            if occurrence_start < end and occurrence_end > start:
+                yield index, occurrence_start, occurrence_end
@@ -0,0 +1,137 @@
+"""Free-slot computation for doctor calendars.
+
+Weekly availability rules are expanded over the requested range, booked
+intervals are subtracted from them in a single forward sweep over both sorted
+lists, and what remains is cut into fixed-length slots. Everything here is pure
+so it can be benchmarked and tested without a database.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+from app.core.timezones import zone_table
+
+T = TypeVar("T", datetime, time)
+Interval = Tuple[datetime, datetime]
+WeeklyWindows = Dict[int, List[Tuple[time, time]]]
+# Working windows of a given (wall-clock) date
+DayWindows = Callable[[date], Sequence[Tuple[time, time]]]
+
+
+def spec_day_of_week(d: date) -> int:
+    # Python: Monday=0..Sunday=6; Spec: Sunday=0..Saturday=6
+    return (d.weekday() + 1) % 7
+
+
+def merge_intervals(intervals: Iterable[Tuple[T, T]]) -> List[Tuple[T, T]]:
+    """Sort intervals and merge the ones that overlap or touch."""
+    merged: List[Tuple[T, T]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def weekly_windows(rules: Iterable[Tuple[int, time, time]]) -> WeeklyWindows:
+    """Group ``(day_of_week, start, end)`` rules by day, merging overlapping rules."""
+    by_day: Dict[int, List[Tuple[time, time]]] = {}
+    for day_of_week, start, end in rules:
+        by_day.setdefault(day_of_week, []).append((start, end))
+    return {day: merge_intervals(windows) for day, windows in by_day.items()}
+
+
+def weekly_day_windows(windows: WeeklyWindows) -> DayWindows:
+    return lambda day: windows.get(spec_day_of_week(day), ())
+
+
+def expand_availability(windows: DayWindows, start: datetime, end: datetime, tz: tzinfo) -> Iterator[Interval]:
+    """Yield the working intervals in ``[start, end)`` in order, clipped to the range.
+
+    Window times are wall-clock times in ``tz``; the intervals are UTC instants,
+    so a window spanning a DST transition has its real length.
+    """
+    zone = zone_table(tz)
+    start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+    day = zone.local_date(start)
+    last_day = zone.local_date(end)
+    while day <= last_day:
+        for window_start, window_end in windows(day):
+            interval_start = max(zone.to_utc(datetime.combine(day, window_start)), start)
+            interval_end = min(zone.to_utc(datetime.combine(day, window_end)), end)
+            if interval_start < interval_end:
+                yield interval_start, interval_end
+        day += timedelta(days=1)
+
+
+def subtract_busy(free: Iterable[Interval], busy: Sequence[Interval]) -> Iterator[Interval]:
+    """Remove ``busy`` from ``free``; both must be sorted and non-overlapping.
+
+    The busy pointer only moves forward, so the whole pass is O(len(free) + len(busy)).
+    """
+    i = 0
+    for free_start, free_end in free:
+        cursor = free_start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < free_end:
+            busy_start, busy_end = busy[j]
+            if busy_start > cursor:
+                yield cursor, busy_start
+            cursor = max(cursor, busy_end)
+            if cursor >= free_end:
+                break
+            j += 1
+        if cursor < free_end:
+            yield cursor, free_end
+
+
+def find_overlaps(intervals: Sequence[Interval], busy: Sequence[Interval]) -> Iterator[int]:
+    """Positions of ``intervals`` that overlap ``busy``.
+
+    ``intervals`` must be sorted by start and ``busy`` sorted and merged; one
+    forward pass over both.
+    """
+    j = 0
+    for i, (start, end) in enumerate(intervals):
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        if j < len(busy) and busy[j][0] < end:
+            yield i
+
+
+def cut_slots(free: Iterable[Interval], duration: timedelta) -> Iterator[Interval]:
+    """Cut each free interval into back-to-back slots of ``duration``; remainders are dropped."""
+    for free_start, free_end in free:
+        slot_start = free_start
+        while slot_start + duration <= free_end:
+            yield slot_start, slot_start + duration
+            slot_start += duration
+
+
+def find_free_slots(
+    rules: Iterable[Tuple[int, time, time]],
+    busy: Iterable[Interval],
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    tz: tzinfo,
+) -> List[Interval]:
+    return find_free_slots_in_windows(weekly_day_windows(weekly_windows(rules)), busy, start, end, duration, tz)
+
+
+def find_free_slots_in_windows(
+    windows: DayWindows,
+    busy: Iterable[Interval],
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    tz: tzinfo,
+) -> List[Interval]:
+    """``find_free_slots`` for working windows given per date."""
+    available = expand_availability(windows, start, end, tz)
+    free = subtract_busy(available, merge_intervals(busy))
+    return list(cut_slots(free, duration))
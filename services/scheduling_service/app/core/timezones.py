@@ -0,0 +1,187 @@
+"""Clinic time zones and precomputed local day boundaries.
+
+Availability rules and overrides are wall-clock times in the clinic's time zone
+(``settings.default_timezone`` unless the clinic set its own), while
+appointments are stored as UTC instants, so every booking check and slot
+search converts between the two.
+
+``ZoneTable`` does that conversion from a table built once per zone: the UTC
+instant each local day starts and the UTC offset at that moment, for a few
+years around today. For a day without an offset change, converting either way
+is a bisect (or an index) plus one addition; only days containing a transition,
+and dates outside the table, go through ``zoneinfo``.
+
+Wall-clock times that do not exist (skipped by a DST transition) are moved
+forward by the length of the gap, and ambiguous ones (repeated when clocks go
+back) resolve to their first occurrence, as with ``fold=0`` in PEP 495.
+"""
+
+import time as _time
+import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Awaitable, Callable, Collection, Dict, List, Mapping, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.config import settings
+
+# Years before and after the current one covered by each ZoneTable
+TABLE_YEARS_BEHIND = 1
+TABLE_YEARS_AHEAD = 2
+
+
+@lru_cache(maxsize=None)
+def zone_by_name(name: str) -> tzinfo:
+    """The IANA zone ``name``; raises ``ValueError`` if it is unknown."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown time zone: {name}") from e
+
+
+def _to_utc(local: datetime, tz: tzinfo) -> datetime:
+    # fold=0: gaps shift forward, repeated times take the first occurrence
+    return local.replace(tzinfo=tz, fold=0).astimezone(timezone.utc)
+
+
+class ZoneTable:
+    """UTC <-> wall-clock conversions for ``tz`` with precomputed day boundaries."""
+
+    __slots__ = ("tz", "first_day", "_midnights", "_offsets", "_uniform")
+
+    def __init__(self, tz: tzinfo, first_day: date, days: int) -> None:
+        self.tz = tz
+        self.first_day = first_day
+        # Local midnight of every day in [first_day, first_day + days], as a UTC instant
+        self._midnights: List[datetime] = []
+        self._offsets: List[timedelta] = []
+        for i in range(days + 1):
+            midnight = _to_utc(datetime.combine(first_day + timedelta(days=i), time.min), tz)
+            self._midnights.append(midnight)
+            self._offsets.append(midnight.astimezone(tz).utcoffset())
+        # Day i keeps one offset throughout (no transition inside it). Equal offsets at
+        # both midnights are not enough when clocks jump at midnight itself: the day then
+        # starts at 01:00, and its skipped first hour needs zoneinfo like any other gap
+        self._uniform = [
+            self._offsets[i] == self._offsets[i + 1]
+            and self._midnights[i].astimezone(tz).replace(tzinfo=None)
+            == datetime.combine(first_day + timedelta(days=i), time.min)
+            for i in range(days)
+        ]
+
+    def _day_index(self, day: date) -> Optional[int]:
+        i = (day - self.first_day).days
+        return i if 0 <= i < len(self._uniform) else None
+
+    def day_start(self, day: date) -> datetime:
+        """UTC instant the local ``day`` starts."""
+        i = self._day_index(day)
+        if i is None:
+            return _to_utc(datetime.combine(day, time.min), self.tz)
+        return self._midnights[i]
+
+    def day_bounds(self, day: date) -> Tuple[datetime, datetime]:
+        """``[start, end)`` of the local ``day`` as UTC instants (23 or 25 hours long around DST)."""
+        return self.day_start(day), self.day_start(day + timedelta(days=1))
+
+    def to_local(self, instant: datetime) -> datetime:
+        """Naive wall-clock time of an aware ``instant``."""
+        i = bisect_right(self._midnights, instant) - 1
+        if 0 <= i < len(self._uniform) and self._uniform[i]:
+            return (instant + self._offsets[i]).replace(tzinfo=None)
+        return instant.astimezone(self.tz).replace(tzinfo=None)
+
+    def local_date(self, instant: datetime) -> date:
+        return self.to_local(instant).date()
+
+    def to_utc(self, local: datetime) -> datetime:
+        """UTC instant of a naive wall-clock time."""
+        i = self._day_index(local.date())
+        if i is not None and self._uniform[i]:
+            return (local - self._offsets[i]).replace(tzinfo=timezone.utc)
+        return _to_utc(local, self.tz)
+
+    def as_utc(self, dt: datetime) -> datetime:
+        """``dt`` as a UTC instant; naive values are wall-clock times in this zone."""
+        if dt.tzinfo is None:
+            return self.to_utc(dt)
+        return dt.astimezone(timezone.utc)
+
+    def shift_wall(self, instant: datetime, delta: timedelta) -> datetime:
+        """``instant`` moved by ``delta`` of wall-clock time (09:00 plus a day is 09:00 across DST)."""
+        return self.to_utc(self.to_local(instant) + delta)
+
+
+@lru_cache(maxsize=128)
+def zone_table(tz: tzinfo) -> ZoneTable:
+    """The shared ``ZoneTable`` of ``tz``, built on first use."""
+    this_year = date.today().year
+    first_day = date(this_year - TABLE_YEARS_BEHIND, 1, 1)
+    last_day = date(this_year + TABLE_YEARS_AHEAD, 12, 31)
+    return ZoneTable(tz, first_day, (last_day - first_day).days + 1)
+
+
+class ClinicTimezones:
+    """Clinic ID -> time zone, cached in process.
+
+    Time zones change rarely and only through ``set_clinic_timezone``; other
+    replicas pick a change up when their entry expires after ``ttl`` seconds.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float, default: str) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.default = default
+        self._entries: "OrderedDict[uuid.UUID, Tuple[tzinfo, float]]" = OrderedDict()
+
+    def _get_local(self, clinic_id: uuid.UUID) -> Optional[tzinfo]:
+        entry = self._entries.get(clinic_id)
+        if entry is None or entry[1] <= _time.monotonic():
+            return None
+        return entry[0]
+
+    def set_local(self, clinic_id: uuid.UUID, name: Optional[str]) -> tzinfo:
+        tz = zone_by_name(name or self.default)
+        self._entries[clinic_id] = (tz, _time.monotonic() + self.ttl)
+        self._entries.move_to_end(clinic_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return tz
+
+    async def get(self, clinic_id: uuid.UUID, loader: Callable[[], Awaitable[Optional[str]]]) -> tzinfo:
+        tz = self._get_local(clinic_id)
+        if tz is None:
+            tz = self.set_local(clinic_id, await loader())
+        return tz
+
+    async def get_many(
+        self,
+        clinic_ids: Collection[uuid.UUID],
+        loader: Callable[[List[uuid.UUID]], Awaitable[Mapping[uuid.UUID, str]]],
+    ) -> Dict[uuid.UUID, tzinfo]:
+        """``get`` for several clinics; ``loader`` is called once with all the misses."""
+        found: Dict[uuid.UUID, tzinfo] = {}
+        missing: List[uuid.UUID] = []
+        for clinic_id in clinic_ids:
+            tz = self._get_local(clinic_id)
+            if tz is None:
+                missing.append(clinic_id)
+            else:
+                found[clinic_id] = tz
+        if missing:
+            loaded = await loader(missing)
+            for clinic_id in missing:
+                found[clinic_id] = self.set_local(clinic_id, loaded.get(clinic_id))
+        return found
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+clinic_timezones = ClinicTimezones(
+    maxsize=settings.clinic_timezone_cache_size,
+    ttl=settings.clinic_timezone_cache_ttl_seconds,
+    default=settings.default_timezone,
+)
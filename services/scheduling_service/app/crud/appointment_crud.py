@@ -1,9 +1,29 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import DateTime, Integer, Select, bindparam, case, column, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.appointment_model import Appointment
+from app.models.appointment_model import Appointment, AppointmentStatus
 from app.schemas.appointment_schema import AppointmentCreate
 
 
+OVERLAP_CONSTRAINT = "ex_appointments_doctor_overlap"
+# Appointments start and end on the same day, which bounds how early an overlapping one can start
+MAX_APPOINTMENT_LENGTH = timedelta(days=1)
+
+
+class SlotAlreadyBooked(Exception):
+    """The appointment overlaps another non-cancelled appointment of the same doctor."""
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    return OVERLAP_CONSTRAINT in str(exc.orig)
+
+
 async def create_appointment(db: AsyncSession, payload: AppointmentCreate) -> Appointment:
     appt = Appointment(
         patient_name=payload.patient_name,
@@ -16,7 +36,214 @@ async def create_appointment(db: AsyncSession, payload: AppointmentCreate) -> Ap
         notes=payload.notes,
     )
     db.add(appt)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise SlotAlreadyBooked() from e
+        raise
     await db.refresh(appt)
     return appt
 
+
+async def create_appointments(db: AsyncSession, payloads: Sequence[AppointmentCreate]) -> List[Appointment]:
+    """Insert all ``payloads`` in one multi-row INSERT ... RETURNING and commit.
+
+    Nothing is inserted if any of them overlaps an existing appointment.
+    """
+    # insertmanyvalues batches this into multi-row VALUES; rows come back in input order
+    stmt = insert(Appointment).returning(Appointment, sort_by_parameter_order=True)
+    try:
+        res = await db.scalars(stmt, [p.model_dump() for p in payloads])
+        created = list(res.all())
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise SlotAlreadyBooked() from e
+        raise
+    return created
+
+
+async def find_conflicting(
+    db: AsyncSession, candidates: Iterable[Tuple[int, uuid.UUID, datetime, datetime]]
+) -> Set[int]:
+    """Keys of the ``(key, doctor_id, start_time, end_time)`` candidates that overlap a booked appointment.
+
+    All candidates are checked in one query: they are passed as arrays, unnested
+    into rows and joined to the appointments through the active-overlap index.
+    """
+    keys, doctor_ids, starts, ends = [], [], [], []
+    for key, doctor_id, start, end in candidates:
+        keys.append(key)
+        doctor_ids.append(doctor_id)
+        starts.append(start)
+        ends.append(end)
+    if not keys:
+        return set()
+
+    c = (
+        func.unnest(
+            bindparam("keys", keys, type_=ARRAY(Integer)),
+            bindparam("doctor_ids", doctor_ids, type_=ARRAY(UUID(as_uuid=True))),
+            bindparam("starts", starts, type_=ARRAY(DateTime(timezone=True))),
+            bindparam("ends", ends, type_=ARRAY(DateTime(timezone=True))),
+        )
+        .table_valued(
+            column("key", Integer),
+            column("doctor_id", UUID(as_uuid=True)),
+            column("start_time", DateTime(timezone=True)),
+            column("end_time", DateTime(timezone=True)),
+        )
+        .render_derived(name="c")
+    )
+    stmt = (
+        select(c.c.key)
+        .distinct()
+        .join(
+            Appointment,
+            (Appointment.doctor_id == c.c.doctor_id)
+            & (Appointment.status != AppointmentStatus.CANCELLED)
+            & (Appointment.start_time < c.c.end_time)
+            & (Appointment.start_time > c.c.start_time - MAX_APPOINTMENT_LENGTH)
+            & (Appointment.end_time > c.c.start_time),
+        )
+    )
+    res = await db.execute(stmt)
+    return set(res.scalars().all())
+
+
+def busy_intervals_query(doctor_id: uuid.UUID, start: datetime, end: datetime) -> Select:
+    # Matches ix_appointments_doctor_id_start_time_active, so Postgres can use an index-only scan
+    return (
+        select(Appointment.start_time, Appointment.end_time)
+        .where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status != AppointmentStatus.CANCELLED,
+            Appointment.start_time < end,
+            Appointment.start_time > start - MAX_APPOINTMENT_LENGTH,
+            Appointment.end_time > start,
+        )
+        .order_by(Appointment.start_time)
+    )
+
+
+async def list_busy_intervals(
+    db: AsyncSession, *, doctor_id: uuid.UUID, start: datetime, end: datetime
+) -> List[Tuple[datetime, datetime]]:
+    """``(start_time, end_time)`` of the doctor's non-cancelled appointments overlapping the range, by start."""
+    res = await db.execute(busy_intervals_query(doctor_id, start, end))
+    return [(row.start_time, row.end_time) for row in res]
+
+
+async def list_booked_blocks(
+    db: AsyncSession, *, doctor_id: uuid.UUID, start: datetime, end: datetime
+) -> Tuple[List[Tuple[datetime, datetime, int]], str]:
+    """The doctor's non-cancelled appointments overlapping the range, merged into blocks, in one query.
+
+    Returns ``(start, end, appointments)`` per block, by start, and a fingerprint
+    of the appointments the blocks were built from; it changes whenever one of
+    them is added, moved or cancelled. Blocks come from window functions over the
+    busy-interval index (gaps and islands): a row starts a new block when it
+    begins after every earlier row has ended, and the running count of such rows
+    numbers the blocks.
+    """
+    busy = busy_intervals_query(doctor_id, start, end).order_by(None).add_columns(Appointment.id).subquery()
+    order = (busy.c.start_time, busy.c.end_time)
+    rows = select(
+        busy.c.start_time,
+        busy.c.end_time,
+        case(
+            (busy.c.start_time <= func.max(busy.c.end_time).over(order_by=order, rows=(None, -1)), 0), else_=1
+        ).label("starts_block"),
+        func.count().over().label("appointments"),
+        func.sum(
+            func.hashtextextended(
+                func.concat_ws(
+                    ":",
+                    busy.c.id,
+                    func.extract("epoch", busy.c.start_time),
+                    func.extract("epoch", busy.c.end_time),
+                ),
+                0,
+            )
+        )
+        .over()
+        .label("checksum"),
+    ).subquery()
+    numbered = select(
+        rows,
+        func.sum(rows.c.starts_block).over(order_by=(rows.c.start_time, rows.c.end_time), rows=(None, 0)).label("block"),
+    ).subquery()
+    res = await db.execute(
+        select(
+            func.min(numbered.c.start_time).label("start_time"),
+            func.max(numbered.c.end_time).label("end_time"),
+            func.count().label("appointments"),
+            func.max(numbered.c.appointments).label("total"),
+            func.max(numbered.c.checksum).label("checksum"),
+        )
+        .group_by(numbered.c.block)
+        .order_by(numbered.c.block)
+    )
+    blocks, fingerprint = [], "0:0"
+    for row in res:
+        blocks.append((row.start_time, row.end_time, row.appointments))
+        fingerprint = f"{row.total}:{row.checksum}"
+    return blocks, fingerprint
+
+
+def list_appointments_query(
+    *,
+    doctor_id: Optional[uuid.UUID] = None,
+    clinic_id: Optional[uuid.UUID] = None,
+    status: Optional[AppointmentStatus] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+    limit: int,
+) -> Select:
+    stmt = select(Appointment)
+    if doctor_id is not None:
+        stmt = stmt.where(Appointment.doctor_id == doctor_id)
+    if clinic_id is not None:
+        stmt = stmt.where(Appointment.clinic_id == clinic_id)
+    if status is not None:
+        stmt = stmt.where(Appointment.status == status)
+    if start_from is not None:
+        stmt = stmt.where(Appointment.start_time >= start_from)
+    if start_to is not None:
+        stmt = stmt.where(Appointment.start_time < start_to)
+    if after is not None:
+        stmt = stmt.where(tuple_(Appointment.start_time, Appointment.id) > tuple_(*after))
+    return stmt.order_by(Appointment.start_time, Appointment.id).limit(limit)
+
+
+async def list_appointments(
+    db: AsyncSession,
+    *,
+    doctor_id: Optional[uuid.UUID] = None,
+    clinic_id: Optional[uuid.UUID] = None,
+    status: Optional[AppointmentStatus] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    after: Optional[Tuple[datetime, uuid.UUID]] = None,
+    limit: int,
+) -> List[Appointment]:
+    """Appointments ordered by ``(start_time, id)``, starting right after the ``after`` key.
+
+    Seeks instead of OFFSET, so the cost of a page does not grow with how far the
+    caller has paged.
+    """
+    stmt = list_appointments_query(
+        doctor_id=doctor_id,
+        clinic_id=clinic_id,
+        status=status,
+        start_from=start_from,
+        start_to=start_to,
+        after=after,
+        limit=limit,
+    )
+    res = await db.execute(stmt)
+    return list(res.scalars().all())
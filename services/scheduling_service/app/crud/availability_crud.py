@@ -1,35 +1,169 @@
 import uuid
-from typing import Iterable, List
-from sqlalchemy import delete, select
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Integer, Time, any_, bindparam, column, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.availability_model import DoctorAvailability
-from app.schemas.availability_schema import AvailabilityRule
+from app.core.availability_cache import Availability, Override, Rule, window_start_today
+from app.crud.series_crud import lock_doctor_calendars
+from app.models.availability_model import AvailabilityOverride, DoctorAvailability
+from app.schemas.availability_schema import AvailabilityRule, AvailabilityRuleUpdate, OverrideCreate
+
+
+class AvailabilityRuleNotFound(Exception):
+    """Some rule IDs do not belong to the doctor."""
+
+    def __init__(self, rule_ids: Sequence[uuid.UUID]) -> None:
+        super().__init__(", ".join(str(rule_id) for rule_id in rule_ids))
+        self.rule_ids = list(rule_ids)
+
+
+class OverlappingRules(Exception):
+    """Two rules of the same weekday overlap."""
+
+    def __init__(self, day_of_week: int) -> None:
+        super().__init__(f"day_of_week {day_of_week}")
+        self.day_of_week = day_of_week
+
+
+def check_no_overlaps(rules: Iterable[Rule]) -> None:
+    """Raise ``OverlappingRules`` unless the rules of each weekday are disjoint (touching is fine)."""
+    previous_day, previous_end = None, None
+    for day_of_week, start, end in sorted(rules):
+        if day_of_week == previous_day and start < previous_end:
+            raise OverlappingRules(day_of_week)
+        if day_of_week != previous_day or end > previous_end:
+            previous_day, previous_end = day_of_week, end
+
+
+async def _insert_rules(
+    db: AsyncSession, doctor_id: uuid.UUID, rules: Sequence[AvailabilityRule]
+) -> List[DoctorAvailability]:
+    if not rules:
+        return []
+    # One INSERT ... RETURNING for all rules instead of a refresh per row
+    res = await db.scalars(
+        insert(DoctorAvailability).returning(DoctorAvailability, sort_by_parameter_order=True),
+        [
+            {"doctor_id": doctor_id, "day_of_week": int(r.day_of_week), "start_time": r.start_time, "end_time": r.end_time}
+            for r in rules
+        ],
+    )
+    return list(res.all())
 
 
 async def replace_doctor_availability(
     db: AsyncSession, *, doctor_id: uuid.UUID, rules: Iterable[AvailabilityRule]
 ) -> List[DoctorAvailability]:
+    rules = list(rules)
+    check_no_overlaps((r.day_of_week, r.start_time, r.end_time) for r in rules)
+    await lock_doctor_calendars(db, [doctor_id])
+
     # Delete existing rules for doctor
     await db.execute(delete(DoctorAvailability).where(DoctorAvailability.doctor_id == doctor_id))
 
     # Insert new rules
-    created: list[DoctorAvailability] = []
-    for r in rules:
-        created.append(
-            DoctorAvailability(
-                doctor_id=doctor_id,
-                day_of_week=int(r.day_of_week),
-                start_time=r.start_time,
-                end_time=r.end_time,
+    created = await _insert_rules(db, doctor_id, rules)
+    await db.commit()
+    return created
+
+
+async def patch_doctor_availability(
+    db: AsyncSession,
+    *,
+    doctor_id: uuid.UUID,
+    add: Sequence[AvailabilityRule] = (),
+    update_rules: Sequence[AvailabilityRuleUpdate] = (),
+    remove: Sequence[uuid.UUID] = (),
+) -> List[DoctorAvailability]:
+    """Apply a rule diff and return the doctor's resulting rules, ordered by day and start.
+
+    The diff is applied to the current rules in memory and validated first, then
+    written with at most one DELETE, one UPDATE and one INSERT ... RETURNING.
+    Raises ``AvailabilityRuleNotFound`` for unknown IDs, ``ValueError`` for a rule
+    updated twice or both updated and removed, or an updated rule that no longer
+    starts before it ends, and ``OverlappingRules``.
+    """
+    updated = [u.id for u in update_rules]
+    if len(set(updated)) != len(updated):
+        raise ValueError("A rule can only be updated once per request")
+    conflicting = set(updated) & set(remove)
+    if conflicting:
+        raise ValueError(f"Rules cannot be both updated and removed: {', '.join(sorted(map(str, conflicting)))}")
+
+    # Two concurrent diffs could each pass validation and overlap once both are applied
+    await lock_doctor_calendars(db, [doctor_id])
+    res = await db.execute(
+        select(
+            DoctorAvailability.id,
+            DoctorAvailability.day_of_week,
+            DoctorAvailability.start_time,
+            DoctorAvailability.end_time,
+        ).where(DoctorAvailability.doctor_id == doctor_id)
+    )
+    current: Dict[uuid.UUID, Rule] = {row.id: (row.day_of_week, row.start_time, row.end_time) for row in res}
+
+    missing = [rule_id for rule_id in [*remove, *(u.id for u in update_rules)] if rule_id not in current]
+    if missing:
+        raise AvailabilityRuleNotFound(missing)
+
+    final = dict(current)
+    for rule_id in remove:
+        final.pop(rule_id, None)
+    changed: Dict[uuid.UUID, Rule] = {}
+    for u in update_rules:
+        day_of_week, start, end = final[u.id]
+        changed[u.id] = (
+            u.day_of_week if u.day_of_week is not None else day_of_week,
+            u.start_time if u.start_time is not None else start,
+            u.end_time if u.end_time is not None else end,
+        )
+    if any(start >= end for _, start, end in changed.values()):
+        raise ValueError("start_time must be earlier than end_time")
+    final.update(changed)
+    check_no_overlaps([*final.values(), *((r.day_of_week, r.start_time, r.end_time) for r in add)])
+
+    if remove:
+        await db.execute(
+            delete(DoctorAvailability).where(
+                DoctorAvailability.id == any_(bindparam("remove_ids", list(remove), type_=ARRAY(UUID(as_uuid=True))))
+            )
+        )
+    if changed:
+        ids, days, starts, ends = zip(*((rule_id, *rule) for rule_id, rule in changed.items()))
+        u = (
+            func.unnest(
+                bindparam("ids", list(ids), type_=ARRAY(UUID(as_uuid=True))),
+                bindparam("days", list(days), type_=ARRAY(Integer)),
+                bindparam("starts", list(starts), type_=ARRAY(Time())),
+                bindparam("ends", list(ends), type_=ARRAY(Time())),
+            )
+            .table_valued(
+                column("id", UUID(as_uuid=True)),
+                column("day_of_week", Integer),
+                column("start_time", Time()),
+                column("end_time", Time()),
             )
+            .render_derived(name="u")
         )
-    db.add_all(created)
+        await db.execute(
+            update(DoctorAvailability)
+            .where(DoctorAvailability.id == u.c.id)
+            .values(day_of_week=u.c.day_of_week, start_time=u.c.start_time, end_time=u.c.end_time)
+            .execution_options(synchronize_session=False)
+        )
+    created = await _insert_rules(db, doctor_id, add)
     await db.commit()
-    # refresh for completeness
-    for ent in created:
-        await db.refresh(ent)
-    return created
+
+    rules = [
+        DoctorAvailability(id=rule_id, doctor_id=doctor_id, day_of_week=day, start_time=start, end_time=end)
+        for rule_id, (day, start, end) in final.items()
+    ]
+    rules.extend(created)
+    rules.sort(key=lambda r: (r.day_of_week, r.start_time))
+    return rules
 
 
 async def get_doctor_availability(db: AsyncSession, *, doctor_id: uuid.UUID) -> List[DoctorAvailability]:
@@ -40,3 +174,118 @@ async def get_doctor_availability(db: AsyncSession, *, doctor_id: uuid.UUID) ->
     )
     return list(res.scalars().all())
 
+
+async def _load_overrides(
+    db: AsyncSession, doctor_ids: List[uuid.UUID], days: Optional[Iterable[date]] = None
+) -> Dict[uuid.UUID, Dict[date, List[Override]]]:
+    """Overrides per doctor and date, from ``window_start_today()`` on unless ``days`` is given."""
+    overrides: Dict[uuid.UUID, Dict[date, List[Override]]] = {doctor_id: {} for doctor_id in doctor_ids}
+    q = select(
+        AvailabilityOverride.doctor_id,
+        AvailabilityOverride.day,
+        AvailabilityOverride.kind,
+        AvailabilityOverride.start_time,
+        AvailabilityOverride.end_time,
+    ).where(AvailabilityOverride.doctor_id.in_(doctor_ids))
+    if days is None:
+        q = q.where(AvailabilityOverride.day >= window_start_today())
+    else:
+        q = q.where(AvailabilityOverride.day.in_(list(days)))
+    res = await db.execute(q)
+    for doctor_id, day, kind, start_time, end_time in res.all():
+        overrides[doctor_id].setdefault(day, []).append((kind, start_time, end_time))
+    return overrides
+
+
+async def load_availability(db: AsyncSession, *, doctor_id: uuid.UUID) -> Availability:
+    """Weekly rules and upcoming overrides for compiling a doctor's availability."""
+    res = await db.execute(
+        select(DoctorAvailability.day_of_week, DoctorAvailability.start_time, DoctorAvailability.end_time).where(
+            DoctorAvailability.doctor_id == doctor_id
+        )
+    )
+    rules = [tuple(row) for row in res.all()]
+    overrides = await _load_overrides(db, [doctor_id])
+    return rules, overrides[doctor_id]
+
+
+async def load_availability_for_doctors(
+    db: AsyncSession, *, doctor_ids: Iterable[uuid.UUID]
+) -> Dict[uuid.UUID, Availability]:
+    """``load_availability`` for many doctors in two queries; doctors without rules get ``([], {})``."""
+    rules: Dict[uuid.UUID, List[Rule]] = {doctor_id: [] for doctor_id in doctor_ids}
+    if not rules:
+        return {}
+    res = await db.execute(
+        select(
+            DoctorAvailability.doctor_id,
+            DoctorAvailability.day_of_week,
+            DoctorAvailability.start_time,
+            DoctorAvailability.end_time,
+        ).where(DoctorAvailability.doctor_id.in_(list(rules)))
+    )
+    for doctor_id, day_of_week, start_time, end_time in res.all():
+        rules[doctor_id].append((day_of_week, start_time, end_time))
+    overrides = await _load_overrides(db, list(rules))
+    return {doctor_id: (rules[doctor_id], overrides[doctor_id]) for doctor_id in rules}
+
+
+async def overrides_for_days(
+    db: AsyncSession, *, doctor_id: uuid.UUID, days: Iterable[date]
+) -> Dict[date, List[Override]]:
+    """Every override of the given dates, with ``[]`` for dates that have none left."""
+    days = list(days)
+    found = (await _load_overrides(db, [doctor_id], days))[doctor_id]
+    return {day: found.get(day, []) for day in days}
+
+
+async def create_overrides(
+    db: AsyncSession, *, doctor_id: uuid.UUID, payload: OverrideCreate
+) -> List[AvailabilityOverride]:
+    """One override row per date of ``payload``'s range, in a single INSERT ... RETURNING."""
+    end_date = payload.end_date or payload.start_date
+    days = [payload.start_date + timedelta(days=i) for i in range((end_date - payload.start_date).days + 1)]
+    res = await db.scalars(
+        insert(AvailabilityOverride).returning(AvailabilityOverride, sort_by_parameter_order=True),
+        [
+            {
+                "doctor_id": doctor_id,
+                "day": day,
+                "kind": payload.kind,
+                "start_time": payload.start_time,
+                "end_time": payload.end_time,
+                "reason": payload.reason,
+            }
+            for day in days
+        ],
+    )
+    created = list(res.all())
+    await db.commit()
+    return created
+
+
+async def list_overrides(
+    db: AsyncSession, *, doctor_id: uuid.UUID, start: date, end: date
+) -> List[AvailabilityOverride]:
+    """The doctor's overrides dated in ``[start, end]``."""
+    res = await db.execute(
+        select(AvailabilityOverride)
+        .where(
+            AvailabilityOverride.doctor_id == doctor_id,
+            AvailabilityOverride.day >= start,
+            AvailabilityOverride.day <= end,
+        )
+        .order_by(AvailabilityOverride.day, AvailabilityOverride.start_time.nulls_first())
+    )
+    return list(res.scalars().all())
+
+
+async def delete_override(db: AsyncSession, *, doctor_id: uuid.UUID, override_id: uuid.UUID) -> Optional[date]:
+    """Delete one of the doctor's overrides; returns its date, or ``None`` if there is no such override."""
+    day = await db.scalar(
+        delete(AvailabilityOverride)
+        .where(AvailabilityOverride.id == override_id, AvailabilityOverride.doctor_id == doctor_id)
+        .returning(AvailabilityOverride.day)
+    )
+    await db.commit()
+    return day
@@ -0,0 +1,35 @@
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.clinic_settings_model import ClinicSettings
+
+
+async def get_timezone_name(db: AsyncSession, *, clinic_id: uuid.UUID) -> Optional[str]:
+    """The clinic's own time zone, or ``None`` if it uses the default."""
+    return await db.scalar(select(ClinicSettings.timezone).where(ClinicSettings.clinic_id == clinic_id))
+
+
+async def get_timezone_names(db: AsyncSession, *, clinic_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, str]:
+    """``get_timezone_name`` for many clinics in one query; clinics using the default are left out."""
+    res = await db.execute(
+        select(ClinicSettings.clinic_id, ClinicSettings.timezone).where(ClinicSettings.clinic_id.in_(list(clinic_ids)))
+    )
+    return {clinic_id: name for clinic_id, name in res.all()}
+
+
+async def set_timezone_name(db: AsyncSession, *, clinic_id: uuid.UUID, name: str) -> ClinicSettings:
+    stmt = insert(ClinicSettings).values(clinic_id=clinic_id, timezone=name)
+    stmt = (
+        stmt.on_conflict_do_update(
+            index_elements=[ClinicSettings.clinic_id], set_={"timezone": stmt.excluded.timezone, "updated_at": func.now()}
+        )
+        .returning(ClinicSettings)
+        .execution_options(populate_existing=True)
+    )
+    entity = await db.scalar(stmt)
+    await db.commit()
+    return entity
@@ -0,0 +1,188 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import BigInteger, bindparam, column, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.recurrence import Recurrence
+from app.crud.appointment_crud import MAX_APPOINTMENT_LENGTH, SlotAlreadyBooked, is_overlap_violation
+from app.models.appointment_model import Appointment
+from app.models.series_model import AppointmentSeries, AppointmentSeriesException
+from app.schemas.appointment_schema import AppointmentCreate
+from app.schemas.series_schema import AppointmentSeriesCreate
+
+Interval = Tuple[datetime, datetime]
+
+EXCEPTION_CONSTRAINT = "uq_appointment_series_exceptions_occurrence"
+
+
+class OccurrenceAlreadyChanged(Exception):
+    """The occurrence was already cancelled or moved."""
+
+
+def calendar_lock_key(doctor_id: uuid.UUID) -> int:
+    return int.from_bytes(doctor_id.bytes[:8], "big", signed=True)
+
+
+async def lock_doctor_calendars(db: AsyncSession, doctor_ids: Iterable[uuid.UUID]) -> None:
+    """Serialize calendar writes for these doctors until the current transaction ends.
+
+    Appointments cannot overlap each other thanks to ex_appointments_doctor_overlap,
+    but series occurrences are not rows, so booking and series creation check each
+    other under this advisory lock. Keys are taken in order to avoid deadlocks.
+    """
+    keys = sorted({calendar_lock_key(doctor_id) for doctor_id in doctor_ids})
+    if not keys:
+        return
+    k = (
+        func.unnest(bindparam("keys", keys, type_=ARRAY(BigInteger)))
+        .table_valued(column("key", BigInteger))
+        .render_derived(name="k")
+    )
+    await db.execute(select(func.pg_advisory_xact_lock(k.c.key)).select_from(k))
+
+
+async def create_series(db: AsyncSession, payload: AppointmentSeriesCreate, recurrence: Recurrence) -> AppointmentSeries:
+    series = AppointmentSeries(
+        patient_name=payload.patient_name,
+        patient_contact_details=payload.patient_contact_details,
+        doctor_id=payload.doctor_id,
+        clinic_id=payload.clinic_id,
+        notes=payload.notes,
+        starts_at=recurrence.starts_at,
+        duration_minutes=int(recurrence.duration / timedelta(minutes=1)),
+        frequency=payload.frequency,
+        interval=payload.interval,
+        count=recurrence.count,
+        ends_at=recurrence.ends_at,
+        timezone=str(recurrence.tz),
+    )
+    db.add(series)
+    await db.commit()
+    await db.refresh(series)
+    return series
+
+
+async def get_series(db: AsyncSession, series_id: uuid.UUID) -> Optional[AppointmentSeries]:
+    return await db.get(AppointmentSeries, series_id)
+
+
+async def delete_series(db: AsyncSession, series: AppointmentSeries) -> None:
+    # Exceptions go with it; appointments of moved occurrences stay
+    await db.delete(series)
+    await db.commit()
+
+
+async def list_exception_starts(
+    db: AsyncSession, *, series_ids: Iterable[uuid.UUID], start: datetime, end: datetime
+) -> Set[Tuple[uuid.UUID, datetime]]:
+    """``(series_id, occurrence_start)`` of cancelled or moved occurrences that could overlap the range."""
+    res = await db.execute(
+        select(AppointmentSeriesException.series_id, AppointmentSeriesException.occurrence_start).where(
+            AppointmentSeriesException.series_id.in_(list(series_ids)),
+            AppointmentSeriesException.occurrence_start < end,
+            AppointmentSeriesException.occurrence_start > start - MAX_APPOINTMENT_LENGTH,
+        )
+    )
+    return {(row.series_id, row.occurrence_start) for row in res}
+
+
+def expand(
+    series: Iterable[AppointmentSeries], skipped: Set[Tuple[uuid.UUID, datetime]], start: datetime, end: datetime
+) -> Iterable[Tuple[AppointmentSeries, int, datetime, datetime]]:
+    """Occurrences of ``series`` overlapping ``[start, end)``, minus the ``skipped`` ones."""
+    for s in series:
+        for index, occurrence_start, occurrence_end in s.recurrence.between(start, end):
+            if (s.id, occurrence_start) not in skipped:
+                yield s, index, occurrence_start, occurrence_end
+
+
+async def list_occurrences(
+    db: AsyncSession,
+    *,
+    doctor_ids: Iterable[uuid.UUID],
+    start: datetime,
+    end: datetime,
+    also_skip: Iterable[Tuple[uuid.UUID, datetime]] = (),
+) -> List[Tuple[AppointmentSeries, int, datetime, datetime]]:
+    """Series occurrences of the doctors overlapping ``[start, end)``, by start.
+
+    Two queries however many series or occurrences there are: the series whose
+    span overlaps the range, then their exceptions in the range.
+    """
+    res = await db.execute(
+        select(AppointmentSeries).where(
+            AppointmentSeries.doctor_id.in_(list(doctor_ids)),
+            AppointmentSeries.starts_at < end,
+            AppointmentSeries.ends_at > start,
+        )
+    )
+    series = list(res.scalars().all())
+    if not series:
+        return []
+    skipped = await list_exception_starts(db, series_ids=[s.id for s in series], start=start, end=end)
+    skipped.update(also_skip)
+    return sorted(expand(series, skipped, start, end), key=lambda o: (o[2], o[0].id))
+
+
+async def list_series_busy_intervals(
+    db: AsyncSession,
+    *,
+    doctor_ids: Iterable[uuid.UUID],
+    start: datetime,
+    end: datetime,
+    also_skip: Iterable[Tuple[uuid.UUID, datetime]] = (),
+) -> Dict[uuid.UUID, List[Interval]]:
+    """``list_occurrences`` as sorted ``(start, end)`` intervals per doctor."""
+    busy: Dict[uuid.UUID, List[Interval]] = {}
+    occurrences = await list_occurrences(db, doctor_ids=doctor_ids, start=start, end=end, also_skip=also_skip)
+    for s, _, occurrence_start, occurrence_end in occurrences:
+        busy.setdefault(s.doctor_id, []).append((occurrence_start, occurrence_end))
+    return busy
+
+
+async def cancel_occurrence(db: AsyncSession, series: AppointmentSeries, occurrence_start: datetime) -> None:
+    db.add(AppointmentSeriesException(series_id=series.id, occurrence_start=occurrence_start))
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if EXCEPTION_CONSTRAINT in str(e.orig):
+            raise OccurrenceAlreadyChanged() from e
+        raise
+
+
+async def move_occurrence(
+    db: AsyncSession, series: AppointmentSeries, occurrence_start: datetime, *, start_time: datetime, end_time: datetime
+) -> Appointment:
+    """Materialize one occurrence as a regular appointment at a new time."""
+    appt = Appointment(
+        **AppointmentCreate(
+            patient_name=series.patient_name,
+            patient_contact_details=series.patient_contact_details,
+            doctor_id=series.doctor_id,
+            clinic_id=series.clinic_id,
+            notes=series.notes,
+            start_time=start_time,
+            end_time=end_time,
+        ).model_dump()
+    )
+    try:
+        db.add(appt)
+        await db.flush()
+        db.add(
+            AppointmentSeriesException(series_id=series.id, occurrence_start=occurrence_start, appointment_id=appt.id)
+        )
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise SlotAlreadyBooked() from e
+        if EXCEPTION_CONSTRAINT in str(e.orig):
+            raise OccurrenceAlreadyChanged() from e
+        raise
+    await db.refresh(appt)
+    return appt
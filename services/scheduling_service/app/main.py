@@ -1,12 +1,19 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from shared.messaging import close_redis, init_redis
+
+from app.core.availability_cache import availability_cache
 from app.core.config import settings
+from app.api.deps import token_decoder
 from app.api.v1.endpoints.appointments import router as appointments_router
 from app.api.v1.endpoints.availability import router as availability_router
+from app.api.v1.endpoints.calendar import router as calendar_router
+from app.api.v1.endpoints.series import router as series_router
 from app.db.session import engine, Base
 
 
@@ -15,8 +22,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Startup
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    init_redis(settings.redis_url)
+    listener_task = asyncio.create_task(availability_cache.listen())
     yield
-    # Shutdown - nothing to do for now
+    # Shutdown
+    listener_task.cancel()
+    try:
+        await listener_task
+    except asyncio.CancelledError:
+        pass
+    availability_cache.clear()
+    await close_redis()
 
 
 def create_app() -> FastAPI:
@@ -45,9 +61,17 @@ def create_app() -> FastAPI:
 
     app.include_router(appointments_router, prefix="/api/v1/appointments", tags=["appointments"])
     app.include_router(availability_router, prefix="/api/v1/availability", tags=["availability"])
+    app.include_router(series_router, prefix="/api/v1/series", tags=["series"])
+    app.include_router(calendar_router, prefix="/api/v1/calendar", tags=["calendar"])
 
     @app.get("/healthz")
     async def healthz():
-        return {"status": "ok", "service": "scheduling", "environment": settings.environment}
+        return {
+            "status": "ok",
+            "service": "scheduling",
+            "environment": settings.environment,
+            "jwt_cache": token_decoder.cache.stats(),
+            "availability_cache": availability_cache.stats(),
+        }
 
     return app
@@ -1,2 +1,4 @@
 from . import appointment_model  # noqa: F401
 from . import availability_model  # noqa: F401
+from . import series_model  # noqa: F401
+from . import clinic_settings_model  # noqa: F401
@@ -1,9 +1,11 @@
 import uuid
-from datetime import time
+from datetime import date, datetime, time
+from enum import StrEnum
 
-from sqlalchemy import Integer, Time
+from sqlalchemy import Date, DateTime, Enum, Index, Integer, String, Time
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
 
 from app.db.session import Base
 
@@ -17,3 +19,23 @@ class DoctorAvailability(Base):
     start_time: Mapped[time] = mapped_column(Time(timezone=False), nullable=False)
     end_time: Mapped[time] = mapped_column(Time(timezone=False), nullable=False)
 
+
+class OverrideKind(StrEnum):
+    CLOSED = "CLOSED"  # whole day without times, otherwise just that part of it
+    EXTRA = "EXTRA"  # additional hours on top of the weekly rules
+
+
+class AvailabilityOverride(Base):
+    """A date-specific change to a doctor's weekly rules (holiday, leave, extra shift)."""
+
+    __tablename__ = "availability_overrides"
+    __table_args__ = (Index("ix_availability_overrides_doctor_id_day", "doctor_id", "day"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    doctor_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)  # wall-clock date, like the rule times
+    kind: Mapped[OverrideKind] = mapped_column(Enum(OverrideKind), nullable=False)
+    start_time: Mapped[time | None] = mapped_column(Time(timezone=False), nullable=True)
+    end_time: Mapped[time | None] = mapped_column(Time(timezone=False), nullable=True)
+    reason: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class ClinicSettings(Base):
+    """Scheduling settings of a clinic; clinics without a row use the defaults."""
+
+    __tablename__ = "clinic_settings"
+
+    clinic_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False)  # IANA name, e.g. Asia/Tehran
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
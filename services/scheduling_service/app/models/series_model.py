@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.core.recurrence import Recurrence, SeriesFrequency, format_rrule, step_of
+from app.core.timezones import zone_by_name
+from app.db.session import Base
+
+
+class AppointmentSeries(Base):
+    """A recurring appointment; occurrences are computed, not stored (see app.core.recurrence)."""
+
+    __tablename__ = "appointment_series"
+    __table_args__ = (
+        # Series of a doctor that overlap a time window
+        Index("ix_appointment_series_doctor_id_starts_at", "doctor_id", "starts_at", postgresql_include=["ends_at"]),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    patient_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    patient_contact_details: Mapped[str] = mapped_column(String(255), nullable=False)
+    doctor_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    clinic_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True, nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # first occurrence
+    duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    frequency: Mapped[SeriesFrequency] = mapped_column(Enum(SeriesFrequency), nullable=False)
+    interval: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)  # end of the last occurrence
+    # Zone the occurrences repeat in (the clinic's, when the series was created)
+    timezone: Mapped[str] = mapped_column(String(64), nullable=False, server_default="UTC")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @property
+    def recurrence(self) -> Recurrence:
+        return Recurrence(
+            starts_at=self.starts_at,
+            duration=timedelta(minutes=self.duration_minutes),
+            step=step_of(self.frequency, self.interval),
+            count=self.count,
+            tz=zone_by_name(self.timezone),
+        )
+
+    @property
+    def rrule(self) -> str:
+        return format_rrule(self.frequency, self.interval, self.count)
+
+
+class AppointmentSeriesException(Base):
+    """One occurrence of a series that was cancelled, or moved to a regular appointment."""
+
+    __tablename__ = "appointment_series_exceptions"
+    __table_args__ = (
+        UniqueConstraint("series_id", "occurrence_start", name="uq_appointment_series_exceptions_occurrence"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    series_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("appointment_series.id", ondelete="CASCADE"), nullable=False
+    )
+    occurrence_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Set when the occurrence was moved; the appointment then carries the booking
+    appointment_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("appointments.id", ondelete="SET NULL"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
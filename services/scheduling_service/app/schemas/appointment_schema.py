@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, ConfigDict
+from app.core.config import settings
 from app.models.appointment_model import AppointmentStatus
 
 
@@ -34,3 +35,25 @@ class AppointmentPublic(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+
+class AppointmentPage(BaseModel):
+    items: List[AppointmentPublic]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` to fetch the next page")
+
+
+class AppointmentBulkCreate(BaseModel):
+    items: List[AppointmentCreate] = Field(min_length=1, max_length=settings.appointments_bulk_max_items)
+
+
+class AppointmentBulkItemResult(BaseModel):
+    index: int = Field(description="Position of the item in the request")
+    status: Literal["created", "rejected"]
+    appointment: Optional[AppointmentPublic] = None
+    detail: Optional[str] = Field(default=None, description="Why the item was rejected")
+
+
+class AppointmentBulkResult(BaseModel):
+    created: int
+    rejected: int
+    results: List[AppointmentBulkItemResult]
@@ -1,7 +1,11 @@
-from datetime import time
+from datetime import date, datetime, time
 import uuid
-from typing import List
-from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from app.core.timezones import zone_by_name
+from app.models.availability_model import OverrideKind
+
+MAX_OVERRIDE_DAYS = 366
 
 
 class AvailabilityRule(BaseModel):
@@ -14,6 +18,19 @@ class AvailabilitySetRequest(BaseModel):
     rules: List[AvailabilityRule]
 
 
+class AvailabilityRuleUpdate(BaseModel):
+    id: uuid.UUID
+    day_of_week: Optional[int] = Field(default=None, ge=0, le=6, description="0=Sunday ... 6=Saturday")
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+
+
+class AvailabilityPatchRequest(BaseModel):
+    add: List[AvailabilityRule] = Field(default_factory=list)
+    update: List[AvailabilityRuleUpdate] = Field(default_factory=list)
+    remove: List[uuid.UUID] = Field(default_factory=list, description="IDs of rules to delete")
+
+
 class DoctorAvailabilityPublic(BaseModel):
     id: uuid.UUID
     doctor_id: uuid.UUID
@@ -23,3 +40,60 @@ class DoctorAvailabilityPublic(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class OverrideCreate(BaseModel):
+    start_date: date
+    end_date: Optional[date] = Field(default=None, description="Last date of the range (inclusive); defaults to start_date")
+    kind: OverrideKind
+    start_time: Optional[time] = Field(default=None, description="Omit both times to close the whole day")
+    end_time: Optional[time] = None
+    reason: Optional[str] = Field(default=None, max_length=255)
+
+    @model_validator(mode="after")
+    def _check_range(self) -> "OverrideCreate":
+        end_date = self.end_date or self.start_date
+        if end_date < self.start_date:
+            raise ValueError("end_date must not be earlier than start_date")
+        if (end_date - self.start_date).days >= MAX_OVERRIDE_DAYS:
+            raise ValueError(f"An override cannot span more than {MAX_OVERRIDE_DAYS} days")
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValueError("start_time and end_time must be given together")
+        if self.start_time is None and self.kind == OverrideKind.EXTRA:
+            raise ValueError("Extra hours need start_time and end_time")
+        if self.start_time is not None and self.start_time >= self.end_time:
+            raise ValueError("start_time must be earlier than end_time")
+        return self
+
+
+class AvailabilityOverridePublic(BaseModel):
+    id: uuid.UUID
+    doctor_id: uuid.UUID
+    day: date
+    kind: OverrideKind
+    start_time: Optional[time]
+    end_time: Optional[time]
+    reason: Optional[str]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ClinicTimezoneUpdate(BaseModel):
+    timezone: str = Field(max_length=64, description="IANA time zone, e.g. Asia/Tehran")
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_zone(cls, value: str) -> str:
+        zone_by_name(value)
+        return value
+
+
+class ClinicTimezonePublic(BaseModel):
+    clinic_id: uuid.UUID
+    timezone: str
+
+
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    jalali_date: str = Field(description="Local date of start_time in the Jalali calendar (YYYY/MM/DD)")
@@ -0,0 +1,34 @@
+import uuid
+from datetime import date, datetime
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class CalendarBlock(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class CalendarDayPublic(BaseModel):
+    date: date
+    jalali_date: str = Field(description="YYYY/MM/DD")
+    weekday: str
+    working: List[CalendarBlock]
+    booked: List[CalendarBlock] = Field(description="Appointments and series occurrences, merged")
+    free: List[CalendarBlock] = Field(description="Working time that is not booked")
+    working_minutes: int
+    booked_minutes: int
+    free_minutes: int
+    utilization: float = Field(description="Booked share of working time, in percent")
+
+
+class DoctorWeekCalendar(BaseModel):
+    doctor_id: uuid.UUID
+    timezone: str
+    week_start: date = Field(description="Saturday starting the week")
+    jalali_week_start: str
+    days: List[CalendarDayPublic]
+    working_minutes: int
+    booked_minutes: int
+    free_minutes: int
+    utilization: float
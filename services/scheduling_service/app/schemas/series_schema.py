@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from app.core.recurrence import SeriesFrequency
+
+
+class AppointmentSeriesCreate(BaseModel):
+    patient_name: str
+    patient_contact_details: str
+    doctor_id: uuid.UUID
+    clinic_id: uuid.UUID
+    notes: Optional[str] = None
+    start_time: datetime = Field(description="Start of the first occurrence; naive times are clinic-local")
+    end_time: datetime = Field(description="End of the first occurrence")
+    frequency: SeriesFrequency = SeriesFrequency.WEEKLY
+    interval: int = Field(default=1, ge=1, le=52)
+    count: Optional[int] = Field(default=None, ge=1, description="Number of occurrences (RRULE COUNT)")
+    until: Optional[datetime] = Field(default=None, description="Last possible occurrence start (RRULE UNTIL)")
+
+    @model_validator(mode="after")
+    def _count_or_until(self) -> "AppointmentSeriesCreate":
+        if (self.count is None) == (self.until is None):
+            raise ValueError("Exactly one of count and until is required")
+        return self
+
+
+class AppointmentSeriesPublic(BaseModel):
+    id: uuid.UUID
+    patient_name: str
+    patient_contact_details: str
+    doctor_id: uuid.UUID
+    clinic_id: uuid.UUID
+    notes: Optional[str]
+    starts_at: datetime
+    ends_at: datetime
+    duration_minutes: int
+    frequency: SeriesFrequency
+    interval: int
+    count: int
+    timezone: str
+    rrule: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SeriesOccurrence(BaseModel):
+    series_id: uuid.UUID
+    index: int
+    start_time: datetime
+    end_time: datetime
+
+
+class SeriesConflict(BaseModel):
+    index: int
+    start_time: datetime
+    detail: str
+
+
+class OccurrenceMove(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class SeriesConflictResponse(BaseModel):
+    detail: str
+    conflicts: List[SeriesConflict]
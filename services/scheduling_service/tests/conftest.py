@@ -0,0 +1,135 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+# Tests write working hours and bookings in UTC unless they set a clinic's zone
+os.environ.setdefault("DEFAULT_TIMEZONE", "UTC")
+
+from shared.messaging import close_redis, init_redis
+
+from app.core.availability_cache import availability_cache
+from app.core.config import settings
+from app.core.timezones import clinic_timezones
+from app.db.session import Base, get_session
+from app.main import create_app
+
+
+@pytest.fixture()
+def anyio_backend() -> str:
+    """Force pytest-anyio to use asyncio backend only."""
+    return "asyncio"
+
+
+def _build_test_database_url() -> str:
+    """Create a test database URL, allowing override via TEST_DATABASE_URL env var."""
+    override = os.getenv("TEST_DATABASE_URL")
+    if override:
+        return override
+
+    raw = settings.database_url
+    parts = urlsplit(raw)
+    db_name = parts.path.rsplit('/', 1)[-1]
+    if not db_name:
+        raise RuntimeError("DATABASE_URL must include a database name")
+    test_db_name = f"{db_name}_test"
+    new_path = parts.path.rsplit('/', 1)[0] + f"/{test_db_name}"
+    return urlunsplit((parts.scheme, parts.netloc, new_path, parts.query, parts.fragment))
+
+
+async def _ensure_database_exists(db_url: str) -> None:
+    """Create the target Postgres database if it is missing (no-op for other DBs)."""
+    parts = urlsplit(db_url)
+    if not parts.scheme.startswith("postgresql"):
+        return
+
+    target_db = parts.path.rsplit('/', 1)[-1]
+    admin_path = parts.path.rsplit('/', 1)[0] + "/postgres"
+    admin_url = urlunsplit((parts.scheme, parts.netloc, admin_path, parts.query, parts.fragment))
+
+    admin_engine = create_async_engine(admin_url, pool_pre_ping=True)
+    try:
+        async with admin_engine.connect() as conn:
+            exists = await conn.scalar(text("SELECT 1 FROM pg_database WHERE datname=:name"), {"name": target_db})
+            if not exists:
+                # CREATE DATABASE cannot run inside a transaction
+                await conn.exec_driver_sql("COMMIT")
+                await conn.exec_driver_sql(f'CREATE DATABASE "{target_db}"')
+    finally:
+        await admin_engine.dispose()
+
+
+@pytest.fixture()
+async def test_engine_and_sessionmaker() -> AsyncGenerator[tuple[AsyncEngine, async_sessionmaker[AsyncSession]], None]:
+    """Engine/sessionmaker on an isolated test database; tables are created and dropped per test."""
+    test_db_url = _build_test_database_url()
+    await _ensure_database_exists(test_db_url)
+
+    engine = create_async_engine(test_db_url, pool_pre_ping=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        yield engine, SessionLocal
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+@pytest.fixture()
+async def app_with_overrides(test_engine_and_sessionmaker) -> FastAPI:
+    """FastAPI app with DB dependency overridden to use the test session."""
+    _, SessionLocal = test_engine_and_sessionmaker
+    app = create_app()
+
+    async def override_get_session() -> AsyncGenerator[AsyncSession, None]:  # type: ignore[override]
+        async with SessionLocal() as session:  # type: ignore
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    return app
+
+
+@pytest.fixture()
+async def client(app_with_overrides: FastAPI) -> AsyncGenerator[AsyncClient, None]:
+    # ASGITransport does not run the lifespan; mirror its Redis setup per test event loop
+    init_redis(settings.redis_url)
+    async with AsyncClient(transport=ASGITransport(app=app_with_overrides), base_url="http://test") as ac:
+        yield ac
+    availability_cache.clear()
+    clinic_timezones.clear()
+    await close_redis()
+
+
+@pytest.fixture()
+def doctor_id() -> uuid.UUID:
+    return uuid.uuid4()
+
+
+def _bearer(claims: dict) -> dict:
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    token = jwt.encode({**claims, "exp": expire}, settings.secret_key, algorithm=settings.algorithm)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def auth_headers(doctor_id: uuid.UUID) -> dict:
+    """Bearer token for ``doctor_id``, signed like auth_service tokens."""
+    return _bearer({"sub": str(doctor_id), "role": "doctor"})
+
+
+@pytest.fixture()
+def admin_headers() -> dict:
+    """Bearer token of a clinic admin."""
+    return _bearer({"sub": str(uuid.uuid4()), "role": "clinic_admin"})
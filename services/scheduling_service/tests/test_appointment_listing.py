@@ -0,0 +1,94 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/appointments"
+
+
+async def _seed(client, doctor_id, auth_headers, clinic_id) -> list[dict]:
+    r = await client.post(
+        "/api/v1/availability/",
+        json={"rules": [{"day_of_week": d, "start_time": "08:00:00", "end_time": "18:00:00"} for d in range(7)]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+    created = []
+    for day in (18, 19, 20):
+        for hour in (9, 10, 11) if day != 20 else (9,):
+            body = {
+                "patient_name": f"Patient {day}-{hour}",
+                "patient_contact_details": "0912",
+                "doctor_id": str(doctor_id),
+                "clinic_id": str(clinic_id),
+                "start_time": f"2026-10-{day}T{hour:02d}:00:00Z",
+                "end_time": f"2026-10-{day}T{hour:02d}:30:00Z",
+                "status": "CANCELLED" if hour == 11 else "SCHEDULED",
+            }
+            r = await client.post(f"{BASE}/", json=body, headers=auth_headers)
+            assert r.status_code == 201, r.text
+            created.append(r.json())
+    return created
+
+
+async def test_pages_follow_start_time_order_without_gaps(client, doctor_id, auth_headers):
+    clinic_id = uuid.uuid4()
+    created = await _seed(client, doctor_id, auth_headers, clinic_id)
+
+    seen, cursor = [], None
+    while True:
+        params = {"doctor_id": str(doctor_id), "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        r = await client.get(f"{BASE}/", params=params, headers=auth_headers)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page["items"]) <= 3
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [a["id"] for a in sorted(created, key=lambda a: (a["start_time"], a["id"]))]
+    assert seen == expected
+
+
+async def test_filters_by_clinic_status_and_window(client, doctor_id, auth_headers):
+    clinic_id = uuid.uuid4()
+    await _seed(client, doctor_id, auth_headers, clinic_id)
+
+    r = await client.get(
+        f"{BASE}/",
+        params={
+            "clinic_id": str(clinic_id),
+            "status": "SCHEDULED",
+            "from": "2026-10-19T00:00:00Z",
+            "to": "2026-10-21T00:00:00Z",
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+    starts = [item["start_time"] for item in r.json()["items"]]
+    assert starts == ["2026-10-19T09:00:00Z", "2026-10-19T10:00:00Z", "2026-10-20T09:00:00Z"]
+    assert r.json()["next_cursor"] is None
+
+    other = await client.get(f"{BASE}/", params={"clinic_id": str(uuid.uuid4())}, headers=auth_headers)
+    assert other.json() == {"items": [], "next_cursor": None}
+
+
+async def test_rejects_bad_cursor_and_oversized_pages(client, auth_headers):
+    assert (await client.get(f"{BASE}/", params={"cursor": "not-a-cursor"}, headers=auth_headers)).status_code == 400
+    too_big = settings.appointments_max_page_size + 1
+    assert (await client.get(f"{BASE}/", params={"limit": too_big}, headers=auth_headers)).status_code == 422
+    assert (await client.get(f"{BASE}/")).status_code == 401
+
+
+def test_cursor_round_trip():
+    key = (datetime(2026, 10, 18, 9, tzinfo=timezone.utc), uuid.uuid4())
+    assert decode_cursor(encode_cursor(*key)) == key
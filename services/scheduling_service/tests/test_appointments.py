@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/appointments"
+
+
+async def _set_sunday_hours(client, auth_headers) -> None:
+    r = await client.post(
+        "/api/v1/availability/",
+        json={"rules": [{"day_of_week": 0, "start_time": "08:00:00", "end_time": "18:00:00"}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+
+
+def _booking(doctor_id: uuid.UUID, start: str, end: str, **overrides) -> dict:
+    return {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": start,
+        "end_time": end,
+        **overrides,
+    }
+
+
+async def test_overlapping_booking_is_rejected(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    first = await client.post(
+        f"{BASE}/", json=_booking(doctor_id, "2026-10-18T09:00:00Z", "2026-10-18T10:00:00Z"), headers=auth_headers
+    )
+    assert first.status_code == 201, first.text
+
+    overlap = await client.post(
+        f"{BASE}/", json=_booking(doctor_id, "2026-10-18T09:30:00Z", "2026-10-18T10:30:00Z"), headers=auth_headers
+    )
+    assert overlap.status_code == 409
+    assert overlap.json()["detail"] == "The requested time slot is already booked."
+
+    # Back-to-back is fine: ranges are half-open
+    adjacent = await client.post(
+        f"{BASE}/", json=_booking(doctor_id, "2026-10-18T10:00:00Z", "2026-10-18T10:30:00Z"), headers=auth_headers
+    )
+    assert adjacent.status_code == 201, adjacent.text
+
+
+async def test_cancelled_appointments_do_not_block_the_slot(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    cancelled = _booking(doctor_id, "2026-10-18T11:00:00Z", "2026-10-18T12:00:00Z", status="CANCELLED")
+    assert (await client.post(f"{BASE}/", json=cancelled, headers=auth_headers)).status_code == 201
+
+    rebooked = await client.post(
+        f"{BASE}/", json=_booking(doctor_id, "2026-10-18T11:00:00Z", "2026-10-18T12:00:00Z"), headers=auth_headers
+    )
+    assert rebooked.status_code == 201, rebooked.text
+
+
+async def test_concurrent_bookings_cannot_double_book(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    payloads = [
+        _booking(doctor_id, "2026-10-18T13:00:00Z", "2026-10-18T13:30:00Z", patient_name=f"Patient {i}")
+        for i in range(8)
+    ]
+
+    responses = await asyncio.gather(*(client.post(f"{BASE}/", json=p, headers=auth_headers) for p in payloads))
+
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [201] + [409] * 7
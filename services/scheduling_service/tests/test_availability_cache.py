@@ -0,0 +1,197 @@
+import asyncio
+import uuid
+from datetime import date, datetime, time
+
+import pytest
+
+from shared.messaging import get_redis
+
+from app.core.availability_cache import CHANNEL, AvailabilityCache, CompiledAvailability, availability_cache
+from app.models.availability_model import OverrideKind
+
+
+pytestmark = pytest.mark.anyio
+
+
+SUNDAY = date(2026, 10, 18)
+RULES = [(0, time(14), time(18)), (0, time(8), time(12)), (0, time(11), time(13)), (1, time(9), time(10))]
+
+
+def _at(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(day, time(hour, minute))
+
+
+@pytest.mark.parametrize("window_days", [0, 14])
+def test_compiled_availability_merges_rules_per_weekday(window_days):
+    # Inside the precomputed window the lookup is a bisect, outside it is computed per day
+    compiled = CompiledAvailability.from_rules(RULES, window_start=SUNDAY, window_days=window_days)
+
+    assert compiled.weekly[0] == [(time(8), time(13)), (time(14), time(18))]
+    assert compiled.covers(_at(SUNDAY, 8), _at(SUNDAY, 13))
+    assert compiled.covers(_at(SUNDAY, 14), _at(SUNDAY, 18))
+    # Spans overlapping rules, but not the gap between windows
+    assert compiled.covers(_at(SUNDAY, 11, 30), _at(SUNDAY, 12, 30))
+    assert not compiled.covers(_at(SUNDAY, 12, 30), _at(SUNDAY, 14, 30))
+    assert not compiled.covers(_at(SUNDAY, 7, 30), _at(SUNDAY, 9))
+    assert not compiled.covers(_at(SUNDAY, 17), _at(SUNDAY, 18, 30))
+    tuesday = date(2026, 10, 20)
+    assert not compiled.covers(_at(tuesday, 9), _at(tuesday, 10))
+
+
+def test_overrides_replace_only_their_own_days():
+    monday, next_sunday, tuesday = date(2026, 10, 19), date(2026, 10, 25), date(2026, 10, 20)
+    overrides = {
+        SUNDAY: [(OverrideKind.CLOSED, None, None)],
+        monday: [(OverrideKind.CLOSED, time(9, 30), time(10))],
+        next_sunday: [(OverrideKind.CLOSED, time(12), time(15)), (OverrideKind.EXTRA, time(18), time(20))],
+        tuesday: [(OverrideKind.EXTRA, time(16), time(17))],
+    }
+    compiled = CompiledAvailability.from_rules(RULES, overrides, window_start=SUNDAY, window_days=14)
+
+    assert compiled.day_windows(SUNDAY) == []
+    assert compiled.day_windows(monday) == [(time(9), time(9, 30))]
+    assert compiled.day_windows(next_sunday) == [(time(8), time(12)), (time(15), time(20))]
+    assert compiled.covers(_at(next_sunday, 17), _at(next_sunday, 19, 30))
+    assert not compiled.covers(_at(SUNDAY, 9), _at(SUNDAY, 10))
+    assert compiled.covers(_at(tuesday, 16), _at(tuesday, 17))
+
+    # Patching a few days gives the same result as compiling from scratch
+    changes = {SUNDAY: [], tuesday: [(OverrideKind.CLOSED, None, None)], date(2027, 3, 21): []}
+    patched = compiled.with_days(changes)
+    fresh = CompiledAvailability.from_rules(
+        RULES, {**overrides, **changes}, window_start=SUNDAY, window_days=14
+    )
+    assert (patched._starts, patched._ends, patched.overrides) == (fresh._starts, fresh._ends, fresh.overrides)
+    assert patched.covers(_at(SUNDAY, 9), _at(SUNDAY, 10))
+    assert not compiled.covers(_at(SUNDAY, 9), _at(SUNDAY, 10))
+
+
+async def test_cache_skips_loads_that_race_with_an_invalidation():
+    cache = AvailabilityCache(maxsize=10, ttl=60, window_days=7)
+    doctor_id = uuid.uuid4()
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        if loads == 1:
+            cache.invalidate_local(doctor_id)
+        return [(0, time(8), time(12))], {}
+
+    await cache.get(doctor_id, loader)
+    await cache.get(doctor_id, loader)
+    await cache.get(doctor_id, loader)
+    assert loads == 2
+    assert cache.stats()["hits"] == 1
+
+
+async def test_booking_sees_new_availability_without_waiting_for_expiry(client, doctor_id, auth_headers):
+    async def set_hours(start: str, end: str) -> None:
+        r = await client.post(
+            "/api/v1/availability/",
+            json={"rules": [{"day_of_week": 0, "start_time": start, "end_time": end}]},
+            headers=auth_headers,
+        )
+        assert r.status_code == 200, r.text
+
+    def booking(start: str, end: str) -> dict:
+        return {
+            "patient_name": "Sara",
+            "patient_contact_details": "0912",
+            "doctor_id": str(doctor_id),
+            "clinic_id": str(uuid.uuid4()),
+            "start_time": start,
+            "end_time": end,
+        }
+
+    await set_hours("08:00:00", "12:00:00")
+    r = await client.post(
+        "/api/v1/appointments/", json=booking("2026-10-18T09:00:00Z", "2026-10-18T09:30:00Z"), headers=auth_headers
+    )
+    assert r.status_code == 201, r.text
+    hits = availability_cache.stats()["hits"]
+    r = await client.post(
+        "/api/v1/appointments/", json=booking("2026-10-18T10:00:00Z", "2026-10-18T10:30:00Z"), headers=auth_headers
+    )
+    assert r.status_code == 201, r.text
+    assert availability_cache.stats()["hits"] == hits + 1
+
+    await set_hours("14:00:00", "18:00:00")
+    r = await client.post(
+        "/api/v1/appointments/", json=booking("2026-10-18T11:00:00Z", "2026-10-18T11:30:00Z"), headers=auth_headers
+    )
+    assert r.status_code == 409
+    r = await client.post(
+        "/api/v1/appointments/", json=booking("2026-10-18T15:00:00Z", "2026-10-18T15:30:00Z"), headers=auth_headers
+    )
+    assert r.status_code == 201, r.text
+
+
+async def test_invalidations_from_other_replicas_are_applied(client):
+    cache = AvailabilityCache(maxsize=10, ttl=60, window_days=7)
+    doctor_id = uuid.uuid4()
+
+    async def loader():
+        return [(0, time(8), time(12))], {}
+
+    listener = asyncio.create_task(cache.listen())
+    try:
+        # Wait for the subscription before filling the cache; subscribing clears it
+        for _ in range(100):
+            if await get_redis().pubsub_numsub(CHANNEL) != [(CHANNEL, 0)]:
+                break
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+        await cache.get(doctor_id, loader)
+        assert cache.stats()["size"] == 1
+
+        await get_redis().publish(CHANNEL, str(doctor_id))
+        for _ in range(100):
+            if cache.stats()["size"] == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert cache.stats()["size"] == 0
+        assert cache.stats()["invalidations"] == 1
+    finally:
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
+
+
+async def test_day_updates_from_other_replicas_are_applied(client):
+    cache = AvailabilityCache(maxsize=10, ttl=60, window_days=7)
+    doctor_id = uuid.uuid4()
+    today = date.today()
+
+    async def loader():
+        return [(day, time(8), time(12)) for day in range(7)], {}
+
+    listener = asyncio.create_task(cache.listen())
+    try:
+        for _ in range(100):
+            if await get_redis().pubsub_numsub(CHANNEL) != [(CHANNEL, 0)]:
+                break
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+        compiled = await cache.get(doctor_id, loader)
+        assert compiled.covers(_at(today, 9), _at(today, 10))
+
+        other_replica = AvailabilityCache(maxsize=10, ttl=60, window_days=7)
+        await other_replica.update_days(doctor_id, {today: [(OverrideKind.CLOSED, time(9), time(11))]})
+        for _ in range(100):
+            if cache.stats()["day_updates"]:
+                break
+            await asyncio.sleep(0.02)
+        # The entry was patched in place, not dropped
+        assert cache.stats()["size"] == 1
+        compiled = await cache.get(doctor_id, loader)
+        assert not compiled.covers(_at(today, 9), _at(today, 10))
+        assert compiled.covers(_at(today, 11), _at(today, 12))
+    finally:
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
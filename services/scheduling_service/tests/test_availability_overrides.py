@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/availability/"
+
+
+def _booking(doctor_id: uuid.UUID, start: str, end: str) -> dict:
+    return {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": start,
+        "end_time": end,
+    }
+
+
+async def test_overrides_change_bookable_hours(client, doctor_id, auth_headers):
+    r = await client.post(
+        BASE, json={"rules": [{"day_of_week": 0, "start_time": "08:00:00", "end_time": "12:00:00"}]}, headers=auth_headers
+    )
+    assert r.status_code == 200, r.text
+
+    # Warm the cache; the overrides below must patch it rather than wait for it to expire
+    r = await client.post(
+        "/api/v1/appointments/",
+        json=_booking(doctor_id, "2026-10-18T08:00:00Z", "2026-10-18T08:30:00Z"),
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+
+    # A two-Sunday holiday, the part of a Sunday, and an extra Saturday shift
+    r = await client.post(
+        f"{BASE}overrides",
+        json={"start_date": "2026-10-25", "end_date": "2026-11-01", "kind": "CLOSED", "reason": "Holiday"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    assert len(r.json()) == 8
+    r = await client.post(
+        f"{BASE}overrides",
+        json={"start_date": "2026-10-18", "kind": "CLOSED", "start_time": "10:00:00", "end_time": "11:00:00"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    partial = r.json()[0]["id"]
+    r = await client.post(
+        f"{BASE}overrides",
+        json={"start_date": "2026-10-24", "kind": "EXTRA", "start_time": "16:00:00", "end_time": "19:00:00"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+
+    async def book(start: str, end: str) -> int:
+        r = await client.post("/api/v1/appointments/", json=_booking(doctor_id, start, end), headers=auth_headers)
+        return r.status_code
+
+    assert await book("2026-10-25T09:00:00Z", "2026-10-25T09:30:00Z") == 409
+    assert await book("2026-11-08T09:00:00Z", "2026-11-08T09:30:00Z") == 201
+    assert await book("2026-10-18T10:30:00Z", "2026-10-18T11:00:00Z") == 409
+    assert await book("2026-10-18T11:00:00Z", "2026-10-18T11:30:00Z") == 201
+    assert await book("2026-10-24T17:00:00Z", "2026-10-24T18:00:00Z") == 201
+
+    r = await client.get(
+        f"{BASE}doctors/{doctor_id}/slots",
+        params={"from": "2026-10-18T00:00:00Z", "to": "2026-10-19T00:00:00Z", "duration": 60},
+    )
+    assert [slot["start_time"] for slot in r.json()] == ["2026-10-18T08:30:00Z"]
+
+    r = await client.get(f"{BASE}doctors/{doctor_id}/overrides", params={"from": "2026-10-18", "to": "2026-10-25"})
+    assert [(o["day"], o["kind"]) for o in r.json()] == [
+        ("2026-10-18", "CLOSED"),
+        ("2026-10-24", "EXTRA"),
+        ("2026-10-25", "CLOSED"),
+    ]
+
+    assert (await client.delete(f"{BASE}overrides/{partial}", headers=auth_headers)).status_code == 204
+    assert (await client.delete(f"{BASE}overrides/{partial}", headers=auth_headers)).status_code == 404
+    assert await book("2026-10-18T10:00:00Z", "2026-10-18T10:30:00Z") == 201
+
+
+async def test_override_validation(client, auth_headers):
+    invalid = [
+        {"start_date": "2026-10-18", "kind": "EXTRA"},
+        {"start_date": "2026-10-18", "kind": "CLOSED", "start_time": "10:00:00"},
+        {"start_date": "2026-10-18", "kind": "EXTRA", "start_time": "11:00:00", "end_time": "10:00:00"},
+        {"start_date": "2026-10-18", "end_date": "2026-10-17", "kind": "CLOSED"},
+        {"start_date": "2026-01-01", "end_date": "2027-06-01", "kind": "CLOSED"},
+    ]
+    for payload in invalid:
+        r = await client.post(f"{BASE}overrides", json=payload, headers=auth_headers)
+        assert r.status_code == 422, payload
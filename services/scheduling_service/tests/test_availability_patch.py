@@ -0,0 +1,85 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/availability/"
+
+
+def _rule(day_of_week: int, start: str, end: str) -> dict:
+    return {"day_of_week": day_of_week, "start_time": start, "end_time": end}
+
+
+async def test_patch_applies_rule_diffs(client, doctor_id, auth_headers):
+    rules = [_rule(0, "08:00:00", "12:00:00"), _rule(0, "14:00:00", "18:00:00"), _rule(1, "09:00:00", "13:00:00")]
+    r = await client.post(BASE, json={"rules": rules}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    morning, afternoon, monday = (rule["id"] for rule in r.json())
+
+    r = await client.patch(
+        BASE,
+        json={
+            "add": [_rule(2, "10:00:00", "12:00:00")],
+            "update": [{"id": afternoon, "start_time": "12:00:00"}],
+            "remove": [monday],
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+    assert [(rule["day_of_week"], rule["start_time"], rule["end_time"]) for rule in r.json()] == [
+        (0, "08:00:00", "12:00:00"),
+        (0, "12:00:00", "18:00:00"),
+        (2, "10:00:00", "12:00:00"),
+    ]
+    assert [rule["id"] for rule in r.json()][:2] == [morning, afternoon]
+
+    stored = await client.get(f"{BASE}doctors/{doctor_id}")
+    assert stored.json() == r.json()
+
+    # The cache was invalidated: a booking spanning both Sunday rules now fits
+    booking = {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(doctor_id),
+        "start_time": "2026-10-18T11:30:00Z",
+        "end_time": "2026-10-18T12:30:00Z",
+    }
+    assert (await client.post("/api/v1/appointments/", json=booking, headers=auth_headers)).status_code == 201
+
+
+async def test_patch_rejects_overlaps_and_unknown_rules(client, doctor_id, auth_headers):
+    r = await client.post(BASE, json={"rules": [_rule(0, "08:00:00", "12:00:00")]}, headers=auth_headers)
+    (rule_id,) = (rule["id"] for rule in r.json())
+
+    r = await client.patch(BASE, json={"add": [_rule(0, "11:00:00", "13:00:00")]}, headers=auth_headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Availability rules overlap on day_of_week 0"
+
+    r = await client.patch(BASE, json={"update": [{"id": rule_id, "end_time": "07:00:00"}]}, headers=auth_headers)
+    assert r.status_code == 400
+
+    r = await client.patch(BASE, json={"remove": [str(doctor_id)]}, headers=auth_headers)
+    assert r.status_code == 404
+
+    # A rule updated and removed, or updated twice, would report a state that was never stored
+    r = await client.patch(
+        BASE, json={"update": [{"id": rule_id, "end_time": "11:00:00"}], "remove": [rule_id]}, headers=auth_headers
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == f"Rules cannot be both updated and removed: {rule_id}"
+    r = await client.patch(
+        BASE,
+        json={"update": [{"id": rule_id, "end_time": "11:00:00"}, {"id": rule_id, "start_time": "09:00:00"}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+
+    r = await client.post(
+        BASE, json={"rules": [_rule(3, "08:00:00", "12:00:00"), _rule(3, "09:00:00", "10:00:00")]}, headers=auth_headers
+    )
+    assert r.status_code == 400
+
+    # Nothing above was applied
+    stored = await client.get(f"{BASE}doctors/{doctor_id}")
+    assert [(rule["id"], rule["end_time"]) for rule in stored.json()] == [(rule_id, "12:00:00")]
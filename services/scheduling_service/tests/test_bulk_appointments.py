@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/appointments"
+SUNDAY = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+async def _set_sunday_hours(client, auth_headers) -> None:
+    r = await client.post(
+        "/api/v1/availability/",
+        json={"rules": [{"day_of_week": 0, "start_time": "08:00:00", "end_time": "18:00:00"}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+
+
+def _item(doctor_id: uuid.UUID, start: datetime, minutes: int = 30, **overrides) -> dict:
+    return {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+        **overrides,
+    }
+
+
+async def test_bulk_reports_each_item(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    booked = await client.post(f"{BASE}/", json=_item(doctor_id, SUNDAY.replace(hour=9)), headers=auth_headers)
+    assert booked.status_code == 201, booked.text
+
+    items = [
+        _item(doctor_id, SUNDAY.replace(hour=10)),  # 0 ok
+        _item(doctor_id, SUNDAY.replace(hour=9, minute=15)),  # 1 overlaps the existing booking
+        _item(doctor_id, SUNDAY.replace(hour=7)),  # 2 before working hours
+        _item(doctor_id, SUNDAY.replace(hour=10, minute=10)),  # 3 overlaps item 7
+        _item(doctor_id, SUNDAY.replace(hour=11), minutes=-30),  # 4 ends before it starts
+        _item(doctor_id, SUNDAY.replace(hour=10, minute=15), status="CANCELLED"),  # 5 cancelled never conflicts
+        _item(uuid.uuid4(), SUNDAY.replace(hour=10)),  # 6 doctor without availability
+        _item(doctor_id, SUNDAY.replace(hour=9, minute=45)),  # 7 kept over item 0, which starts later
+        _item(doctor_id, SUNDAY.replace(hour=10, minute=15)),  # 8 back-to-back with item 7
+    ]
+    r = await client.post(f"{BASE}/bulk", json={"items": items}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    by_index = {result["index"]: result for result in body["results"]}
+
+    assert [by_index[i]["status"] for i in range(len(items))] == [
+        "rejected", "rejected", "rejected", "rejected", "rejected", "created", "rejected", "created", "created"
+    ]
+    assert by_index[0]["detail"] == "Overlaps item 7 of this batch."
+    assert by_index[1]["detail"] == "The requested time slot is already booked."
+    assert by_index[2]["detail"] == "The requested time slot is outside the doctor's working hours."
+    assert by_index[3]["detail"] == "Overlaps item 7 of this batch."
+    assert by_index[4]["detail"] == "start_time must be earlier than end_time"
+    assert by_index[6]["detail"] == "The requested time slot is outside the doctor's working hours."
+    assert by_index[7]["appointment"]["start_time"].startswith("2026-10-18T09:45:00")
+    assert (body["created"], body["rejected"]) == (3, 6)
+
+    listed = await client.get(f"{BASE}/", params={"doctor_id": str(doctor_id)}, headers=auth_headers)
+    assert len(listed.json()["items"]) == 4
+
+
+async def test_bulk_books_a_full_day_in_one_request(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    items = [_item(doctor_id, SUNDAY.replace(hour=8) + timedelta(minutes=5 * n), minutes=5) for n in range(120)]
+
+    r = await client.post(f"{BASE}/bulk", json={"items": items}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["created"], body["rejected"]) == (120, 0)
+    assert [result["index"] for result in body["results"]] == list(range(120))
+    assert [datetime.fromisoformat(result["appointment"]["start_time"]) for result in body["results"]] == [
+        datetime.fromisoformat(item["start_time"]) for item in items
+    ]
+
+    again = await client.post(f"{BASE}/bulk", json={"items": items[:3]}, headers=auth_headers)
+    assert again.json()["rejected"] == 3
@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+URL = "/api/v1/calendar/doctors/{}"
+
+
+async def test_week_calendar_aggregates_and_revalidates(client, doctor_id, auth_headers):
+    rules = [
+        {"day_of_week": 0, "start_time": "08:00:00", "end_time": "12:00:00"},
+        {"day_of_week": 1, "start_time": "10:00:00", "end_time": "12:00:00"},
+    ]
+    r = await client.post("/api/v1/availability/", json={"rules": rules}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+
+    async def book(start: str, end: str) -> None:
+        booking = {
+            "patient_name": "Sara",
+            "patient_contact_details": "0912",
+            "doctor_id": str(doctor_id),
+            "clinic_id": str(uuid.uuid4()),
+            "start_time": start,
+            "end_time": end,
+        }
+        r = await client.post("/api/v1/appointments/", json=booking, headers=auth_headers)
+        assert r.status_code == 201, r.text
+
+    # Two touching appointments make one block
+    await book("2026-10-18T09:00:00Z", "2026-10-18T09:30:00Z")
+    await book("2026-10-18T09:30:00Z", "2026-10-18T10:00:00Z")
+    await book("2026-10-18T11:00:00Z", "2026-10-18T11:30:00Z")
+    series = {
+        "patient_name": "Reza",
+        "patient_contact_details": "0935",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": "2026-10-19T10:00:00Z",
+        "end_time": "2026-10-19T10:45:00Z",
+        "count": 4,
+    }
+    r = await client.post("/api/v1/series/", json=series, headers=auth_headers)
+    assert r.status_code == 201, r.text
+
+    r = await client.get(URL.format(doctor_id), params={"week": "2026-10-18"}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    week = r.json()
+    assert (week["week_start"], week["jalali_week_start"]) == ("2026-10-17", "1405/07/25")
+    assert [day["weekday"] for day in week["days"]][:2] == ["Shanbeh", "Yekshanbeh"]
+    sunday, monday = week["days"][1], week["days"][2]
+
+    def spans(blocks):
+        return [(b["start_time"][11:16], b["end_time"][11:16]) for b in blocks]
+
+    assert spans(sunday["booked"]) == [("09:00", "10:00"), ("11:00", "11:30")]
+    assert spans(sunday["free"]) == [("08:00", "09:00"), ("10:00", "11:00"), ("11:30", "12:00")]
+    assert (sunday["working_minutes"], sunday["booked_minutes"], sunday["utilization"]) == (240, 90, 37.5)
+    assert spans(monday["booked"]) == [("10:00", "10:45")]
+    assert (week["working_minutes"], week["free_minutes"], week["utilization"]) == (360, 225, 37.5)
+
+    # Unchanged week: 304, whichever calendar the week is named in
+    etag = r.headers["etag"]
+    r = await client.get(
+        URL.format(doctor_id), params={"week": "1405/07/30"}, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    await book("2026-10-19T11:00:00Z", "2026-10-19T11:30:00Z")
+    r = await client.get(
+        URL.format(doctor_id), params={"week": "2026-10-18"}, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert spans(r.json()["days"][2]["booked"]) == [("10:00", "10:45"), ("11:00", "11:30")]
+
+    r = await client.get(URL.format(doctor_id), params={"week": "1405/13/01"}, headers=auth_headers)
+    assert r.status_code == 400
@@ -0,0 +1,164 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.recurrence import Recurrence, count_until
+
+
+pytestmark = pytest.mark.anyio
+
+BASE = "/api/v1/series"
+SUNDAY = datetime(2026, 10, 18, 9, tzinfo=timezone.utc)
+WEEK = timedelta(weeks=1)
+
+
+def test_recurrence_expands_only_the_window():
+    recurrence = Recurrence(starts_at=SUNDAY, duration=timedelta(minutes=45), step=WEEK, count=10)
+
+    assert recurrence.ends_at == SUNDAY + 9 * WEEK + timedelta(minutes=45)
+    # The window starts in the middle of occurrence 2 and ends right at the start of occurrence 5
+    window = list(recurrence.between(SUNDAY + 2 * WEEK + timedelta(minutes=30), SUNDAY + 5 * WEEK))
+    assert [index for index, _, _ in window] == [2, 3, 4]
+    assert window[0][1:] == (SUNDAY + 2 * WEEK, SUNDAY + 2 * WEEK + timedelta(minutes=45))
+    assert list(recurrence.between(SUNDAY - 2 * WEEK, SUNDAY)) == []
+    assert list(recurrence.between(SUNDAY + 20 * WEEK, SUNDAY + 30 * WEEK)) == []
+
+    assert count_until(SUNDAY, WEEK, SUNDAY + 4 * WEEK) == 5
+    assert count_until(SUNDAY, WEEK, SUNDAY - timedelta(days=1)) == 0
+
+
+async def _set_sunday_hours(client, auth_headers) -> None:
+    r = await client.post(
+        "/api/v1/availability/",
+        json={"rules": [{"day_of_week": 0, "start_time": "08:00:00", "end_time": "18:00:00"}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+
+
+def _series(doctor_id: uuid.UUID, **overrides) -> dict:
+    return {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": SUNDAY.isoformat(),
+        "end_time": (SUNDAY + timedelta(minutes=45)).isoformat(),
+        "frequency": "WEEKLY",
+        "count": 12,
+        **overrides,
+    }
+
+
+def _booking(doctor_id: uuid.UUID, start: datetime, minutes: int = 30) -> dict:
+    return {
+        "patient_name": "Reza",
+        "patient_contact_details": "0935",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+    }
+
+
+async def test_series_blocks_its_occurrences(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    r = await client.post(f"{BASE}/", json=_series(doctor_id), headers=auth_headers)
+    assert r.status_code == 201, r.text
+    series = r.json()
+    assert series["rrule"] == "FREQ=WEEKLY;INTERVAL=1;COUNT=12"
+
+    r = await client.get(f"{BASE}/{series['id']}/occurrences", headers=auth_headers)
+    assert [o["index"] for o in r.json()] == list(range(12))
+
+    # Single and bulk bookings see the occurrences that are not stored anywhere
+    r = await client.post("/api/v1/appointments/", json=_booking(doctor_id, SUNDAY + 3 * WEEK), headers=auth_headers)
+    assert r.status_code == 409
+    assert r.json()["detail"] == "The requested time slot is already booked."
+    r = await client.post(
+        "/api/v1/appointments/bulk",
+        json={"items": [_booking(doctor_id, SUNDAY + 4 * WEEK + timedelta(hours=h)) for h in (0, 1)]},
+        headers=auth_headers,
+    )
+    assert [item["status"] for item in r.json()["results"]] == ["rejected", "created"]
+
+    day = SUNDAY + 5 * WEEK
+    r = await client.get(
+        f"/api/v1/availability/doctors/{doctor_id}/slots",
+        params={"from": day.isoformat(), "to": (day + timedelta(hours=2, minutes=15)).isoformat(), "duration": 45},
+    )
+    assert [slot["start_time"] for slot in r.json()] == ["2026-11-22T09:45:00Z", "2026-11-22T10:30:00Z"]
+
+    # A second series running into the last two occurrences of the first
+    later = SUNDAY + 10 * WEEK + timedelta(minutes=30)
+    overlapping = _series(
+        doctor_id,
+        count=None,
+        until=(SUNDAY + 20 * WEEK).isoformat(),
+        start_time=later.isoformat(),
+        end_time=(later + timedelta(minutes=45)).isoformat(),
+    )
+    r = await client.post(f"{BASE}/", json=overlapping, headers=auth_headers)
+    assert r.status_code == 409
+    assert [c["index"] for c in r.json()["conflicts"]] == [0, 1]
+
+
+async def test_cancelled_and_moved_occurrences_are_the_only_rows(client, doctor_id, auth_headers):
+    await _set_sunday_hours(client, auth_headers)
+    series = (await client.post(f"{BASE}/", json=_series(doctor_id), headers=auth_headers)).json()
+
+    assert (await client.delete(f"{BASE}/{series['id']}/occurrences/2", headers=auth_headers)).status_code == 204
+    assert (await client.delete(f"{BASE}/{series['id']}/occurrences/2", headers=auth_headers)).status_code == 409
+    assert (await client.delete(f"{BASE}/{series['id']}/occurrences/12", headers=auth_headers)).status_code == 404
+
+    # Moving into its own old slot is fine: the occurrence no longer blocks it
+    new_start = SUNDAY + 5 * WEEK + timedelta(minutes=15)
+    r = await client.post(
+        f"{BASE}/{series['id']}/occurrences/5/move",
+        json={"start_time": new_start.isoformat(), "end_time": (new_start + timedelta(minutes=45)).isoformat()},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    assert r.json()["patient_name"] == "Sara"
+
+    r = await client.get(
+        f"{BASE}/occurrences",
+        params={"doctor_id": str(doctor_id), "from": SUNDAY.isoformat(), "to": (SUNDAY + 7 * WEEK).isoformat()},
+        headers=auth_headers,
+    )
+    assert [o["index"] for o in r.json()] == [0, 1, 3, 4, 6]
+
+    r = await client.post("/api/v1/appointments/", json=_booking(doctor_id, SUNDAY + 2 * WEEK), headers=auth_headers)
+    assert r.status_code == 201, r.text
+    r = await client.post("/api/v1/appointments/", json=_booking(doctor_id, new_start), headers=auth_headers)
+    assert r.status_code == 409
+
+    assert (await client.delete(f"{BASE}/{series['id']}", headers=auth_headers)).status_code == 204
+    assert (await client.get(f"{BASE}/{series['id']}", headers=auth_headers)).status_code == 404
+    r = await client.post("/api/v1/appointments/", json=_booking(doctor_id, SUNDAY + 3 * WEEK), headers=auth_headers)
+    assert r.status_code == 201, r.text
+
+
+async def test_naive_occurrence_windows_are_clinic_local(client, doctor_id, auth_headers, admin_headers):
+    clinic_id = uuid.uuid4()
+    r = await client.put(
+        f"/api/v1/availability/clinics/{clinic_id}/timezone", json={"timezone": "Asia/Tehran"}, headers=admin_headers
+    )
+    assert r.status_code == 200, r.text
+    await _set_sunday_hours(client, auth_headers)
+    # 09:00 in Tehran is 05:30Z
+    body = _series(doctor_id, clinic_id=str(clinic_id), start_time="2026-10-18T09:00:00", end_time="2026-10-18T09:45:00")
+    series = (await client.post(f"{BASE}/", json=body, headers=auth_headers)).json()
+    assert series["starts_at"] == "2026-10-18T05:30:00Z"
+
+    window = {"from": "2026-10-18T09:00:00", "to": "2026-10-18T09:30:00"}
+    r = await client.get(f"{BASE}/{series['id']}/occurrences", params=window, headers=auth_headers)
+    assert [o["start_time"] for o in r.json()] == ["2026-10-18T05:30:00Z"]
+
+    params = {"doctor_id": str(doctor_id), **window}
+    r = await client.get(f"{BASE}/occurrences", params={**params, "clinic_id": str(clinic_id)}, headers=auth_headers)
+    assert [o["index"] for o in r.json()] == [0]
+    # Without a clinic the window is read in the default zone (UTC in these tests), 09:00Z-09:30Z
+    r = await client.get(f"{BASE}/occurrences", params=params, headers=auth_headers)
+    assert r.json() == []
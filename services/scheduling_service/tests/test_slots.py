@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+from app.core.slots import find_free_slots, merge_intervals, subtract_busy
+
+
+pytestmark = pytest.mark.anyio
+
+UTC = timezone.utc
+TEHRAN = timezone(timedelta(hours=3, minutes=30))
+# 2026-10-18 is a Sunday (day_of_week 0)
+SUNDAY = datetime(2026, 10, 18, tzinfo=UTC)
+
+
+def _at(day: datetime, hour: int, minute: int = 0) -> datetime:
+    return day.replace(hour=hour, minute=minute)
+
+
+def test_merge_intervals_joins_overlapping_and_touching():
+    assert merge_intervals([(5, 7), (1, 3), (3, 4), (6, 9)]) == [(1, 4), (5, 9)]
+
+
+def test_subtract_busy_handles_busy_spanning_several_windows():
+    free = [(0, 10), (12, 20), (25, 30)]
+    busy = [(2, 3), (8, 14), (19, 26)]
+    assert list(subtract_busy(free, busy)) == [(0, 2), (3, 8), (14, 19), (26, 30)]
+
+
+def test_slots_skip_booked_time():
+    rules = [(0, time(9), time(12))]
+    busy = [(_at(SUNDAY, 10), _at(SUNDAY, 10, 30)), (_at(SUNDAY, 10, 15), _at(SUNDAY, 11))]
+
+    slots = find_free_slots(rules, busy, SUNDAY, SUNDAY + timedelta(days=1), timedelta(minutes=30), UTC)
+
+    assert slots == [
+        (_at(SUNDAY, 9), _at(SUNDAY, 9, 30)),
+        (_at(SUNDAY, 9, 30), _at(SUNDAY, 10)),
+        (_at(SUNDAY, 11), _at(SUNDAY, 11, 30)),
+        (_at(SUNDAY, 11, 30), _at(SUNDAY, 12)),
+    ]
+
+
+def test_slots_follow_weekly_rules_and_range_bounds():
+    rules = [(0, time(9), time(10)), (2, time(14), time(15))]
+    start = _at(SUNDAY, 9, 30)
+    end = SUNDAY + timedelta(days=7, hours=9, minutes=30)
+
+    slots = find_free_slots(rules, [], start, end, timedelta(minutes=30), UTC)
+
+    assert [s for s, _ in slots] == [
+        _at(SUNDAY, 9, 30),
+        _at(SUNDAY + timedelta(days=2), 14),
+        _at(SUNDAY + timedelta(days=2), 14, 30),
+        _at(SUNDAY + timedelta(days=7), 9),
+    ]
+
+
+def test_rules_are_read_in_the_requested_offset():
+    start = datetime(2026, 10, 18, tzinfo=TEHRAN)
+    slots = find_free_slots([(0, time(9), time(10))], [], start, start + timedelta(days=1), timedelta(hours=1), TEHRAN)
+    assert slots == [(start.replace(hour=9), start.replace(hour=10))]
+    assert slots[0][0] == datetime(2026, 10, 18, 5, 30, tzinfo=UTC)
+
+
+async def test_slots_endpoint_subtracts_appointments(client, doctor_id, auth_headers):
+    r = await client.post(
+        "/api/v1/availability/",
+        json={"rules": [{"day_of_week": 0, "start_time": "09:00:00", "end_time": "11:00:00"}]},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+    booking = {
+        "patient_name": "Sara",
+        "patient_contact_details": "0912",
+        "doctor_id": str(doctor_id),
+        "clinic_id": str(uuid.uuid4()),
+        "start_time": "2026-10-18T09:30:00+00:00",
+        "end_time": "2026-10-18T10:00:00+00:00",
+    }
+    r = await client.post("/api/v1/appointments/", json=booking, headers=auth_headers)
+    assert r.status_code == 201, r.text
+
+    r = await client.get(
+        f"/api/v1/availability/doctors/{doctor_id}/slots",
+        params={"from": "2026-10-18T00:00:00+00:00", "to": "2026-10-19T00:00:00+00:00", "duration": 30},
+    )
+    assert r.status_code == 200, r.text
+    assert [slot["start_time"] for slot in r.json()] == [
+        "2026-10-18T09:00:00Z",
+        "2026-10-18T10:00:00Z",
+        "2026-10-18T10:30:00Z",
+    ]
+
+
+async def test_slots_endpoint_rejects_invalid_ranges(client, doctor_id):
+    url = f"/api/v1/availability/doctors/{doctor_id}/slots"
+    r = await client.get(url, params={"from": "2026-10-19T00:00:00Z", "to": "2026-10-18T00:00:00Z"})
+    assert r.status_code == 400
+    r = await client.get(url, params={"from": "2026-01-01T00:00:00Z", "to": "2027-06-01T00:00:00Z"})
+    assert r.status_code == 400
@@ -0,0 +1,210 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from hypothesis import example, given, settings, strategies as st
+
+from app.core.jalali import from_jalali, month_length, parse_jalali, to_jalali, week_start
+from app.core.recurrence import Recurrence
+from app.core.slots import expand_availability, weekly_day_windows, weekly_windows
+from app.core.timezones import ZoneTable
+
+
+pytestmark = pytest.mark.anyio
+
+UTC = timezone.utc
+# Tehran observed DST until 2022 and Santiago still does, both at midnight; the others
+# move at other hours or by 30 minutes
+ZONES = ["Asia/Tehran", "America/Santiago", "America/New_York", "Europe/London", "Australia/Lord_Howe"]
+TABLE_START = date(2015, 1, 1)
+TABLES = {name: ZoneTable(ZoneInfo(name), TABLE_START, 15 * 366) for name in ZONES}
+
+# Reaching a little past both ends of the tables exercises the zoneinfo fallback
+instants = st.datetimes(min_value=datetime(2014, 6, 1), max_value=datetime(2030, 6, 1), timezones=st.just(UTC))
+wall_times = st.datetimes(min_value=datetime(2014, 6, 1), max_value=datetime(2030, 6, 1))
+
+
+@given(name=st.sampled_from(ZONES), instant=instants)
+def test_to_local_matches_zoneinfo(name, instant):
+    assert TABLES[name].to_local(instant) == instant.astimezone(ZoneInfo(name)).replace(tzinfo=None)
+
+
+@given(name=st.sampled_from(ZONES), local=wall_times)
+def test_to_utc_matches_zoneinfo_fold_0(name, local):
+    expected = local.replace(tzinfo=ZoneInfo(name)).astimezone(UTC)
+    assert TABLES[name].to_utc(local) == expected
+
+
+@given(name=st.sampled_from(ZONES), local=wall_times)
+def test_wall_times_round_trip_unless_skipped(name, local):
+    table = TABLES[name]
+    back = table.to_local(table.to_utc(local))
+    # Only a time inside a DST gap comes back different, moved forward by the gap
+    assert back == local or timedelta(0) < back - local <= timedelta(hours=1)
+
+
+@given(name=st.sampled_from(ZONES), day=st.dates(min_value=date(2015, 1, 1), max_value=date(2029, 12, 30)))
+def test_days_tile_the_timeline(name, day):
+    table = TABLES[name]
+    start, end = table.day_bounds(day)
+    assert timedelta(hours=22) <= end - start <= timedelta(hours=25)
+    assert table.local_date(start) == day
+    assert table.local_date(end - timedelta(microseconds=1)) == day
+
+
+def test_dst_days_have_their_real_length():
+    new_york = TABLES["America/New_York"]
+    spring, autumn = new_york.day_bounds(date(2026, 3, 8)), new_york.day_bounds(date(2026, 11, 1))
+    assert spring[1] - spring[0] == timedelta(hours=23)
+    assert autumn[1] - autumn[0] == timedelta(hours=25)
+    # 02:30 does not exist on 2026-03-08 and moves to 03:30 EDT
+    assert new_york.to_utc(datetime(2026, 3, 8, 2, 30)) == datetime(2026, 3, 8, 7, 30, tzinfo=UTC)
+    # 01:30 happens twice on 2026-11-01; the first one (EDT) is taken
+    assert new_york.to_utc(datetime(2026, 11, 1, 1, 30)) == datetime(2026, 11, 1, 5, 30, tzinfo=UTC)
+    # Adding a wall-clock day keeps 09:00 across the change, adding 24 hours does not
+    nine = new_york.to_utc(datetime(2026, 3, 7, 9))
+    assert new_york.to_local(new_york.shift_wall(nine, timedelta(days=1))) == datetime(2026, 3, 8, 9)
+    assert new_york.to_local(nine + timedelta(days=1)) == datetime(2026, 3, 8, 10)
+
+
+def test_midnight_transitions_skip_the_first_hour():
+    santiago = TABLES["America/Santiago"]
+    # Clocks jump from 00:00 to 01:00 on 2025-09-07, so the day starts at 01:00 -03
+    assert santiago.day_start(date(2025, 9, 7)) == datetime(2025, 9, 7, 4, tzinfo=UTC)
+    # Times in the skipped hour move forward, after the start of the day, not before it
+    assert santiago.to_utc(datetime(2025, 9, 7)) == datetime(2025, 9, 7, 4, tzinfo=UTC)
+    assert santiago.to_utc(datetime(2025, 9, 7, 0, 30)) == datetime(2025, 9, 7, 4, 30, tzinfo=UTC)
+    assert santiago.to_utc(datetime(2025, 9, 7, 1)) == datetime(2025, 9, 7, 4, tzinfo=UTC)
+    # Clocks go back from 00:00 to 23:00 on 2026-04-05: 23:30 the day before happens twice
+    # and takes the first occurrence, midnight happens once, at -04
+    assert santiago.to_utc(datetime(2026, 4, 4, 23, 30)) == datetime(2026, 4, 5, 2, 30, tzinfo=UTC)
+    assert santiago.to_utc(datetime(2026, 4, 5)) == datetime(2026, 4, 5, 4, tzinfo=UTC)
+
+
+def test_working_windows_across_dst_keep_their_real_length():
+    # A Sunday night shift 00:00-05:00 loses an hour when clocks spring forward
+    windows = weekly_day_windows(weekly_windows([(0, time(0), time(5))]))
+    tz = ZoneInfo("America/New_York")
+    start = datetime(2026, 3, 8, tzinfo=tz)
+    [(shift_start, shift_end)] = expand_availability(windows, start, start + timedelta(days=1), tz)
+    assert shift_end - shift_start == timedelta(hours=4)
+    assert shift_start.tzinfo is UTC
+
+
+@settings(max_examples=50)
+# 02:00 does not exist on 2026-03-08, so the last occurrence is pushed forward to 03:00
+@example(first=datetime(2026, 3, 2, 2), step_days=1, count=7, window_start=datetime(2026, 3, 8), window_days=0)
+@given(
+    first=st.datetimes(min_value=datetime(2026, 1, 1), max_value=datetime(2027, 1, 1)),
+    step_days=st.sampled_from([1, 7, 14]),
+    count=st.integers(min_value=1, max_value=60),
+    window_start=st.datetimes(min_value=datetime(2025, 12, 1), max_value=datetime(2028, 1, 1)),
+    window_days=st.integers(min_value=0, max_value=120),
+)
+def test_recurrence_in_wall_clock_time_matches_brute_force(first, step_days, count, window_start, window_days):
+    tz = ZoneInfo("America/New_York")
+    table = ZoneTable(tz, date(2025, 1, 1), 4 * 366)
+    step, duration = timedelta(days=step_days), timedelta(minutes=45)
+    starts_at = table.to_utc(first)
+    recurrence = Recurrence(starts_at=starts_at, duration=duration, step=step, count=count, tz=tz)
+    start = window_start.replace(tzinfo=UTC)
+    end = start + timedelta(days=window_days, hours=5)
+
+    everything = [(k, table.to_utc(table.to_local(starts_at) + k * step)) for k in range(count)]
+    expected = [(k, s, s + duration) for k, s in everything if s < end and s + duration > start]
+    assert list(recurrence.between(start, end)) == expected
+    assert recurrence.ends_at == everything[-1][1] + duration
+    assert [recurrence.start_of(k) for k in range(count)] == [s for _, s in everything]
+
+
+@given(day=st.dates(min_value=date(1800, 1, 1), max_value=date(2400, 12, 31)))
+def test_jalali_round_trips_and_weeks_start_on_saturday(day):
+    jalali = to_jalali(day)
+    assert 1 <= jalali.day <= month_length(jalali.year, jalali.month)
+    assert from_jalali(*jalali) == day
+    assert parse_jalali(str(jalali)) == day
+
+    following = to_jalali(day + timedelta(days=1))
+    assert following > jalali
+    first = week_start(day)
+    assert first.weekday() == 5 and first <= day < first + timedelta(days=7)
+
+
+def test_known_jalali_dates():
+    assert str(to_jalali(date(2026, 10, 18))) == "1405/07/26"
+    assert from_jalali(1404, 1, 1) == date(2025, 3, 21)
+    # 1403 is a leap year, so Esfand has 30 days and Nowruz 1404 follows 1403/12/30
+    assert to_jalali(date(2025, 3, 20)) == (1403, 12, 30)
+    assert month_length(1404, 12) == 29
+    with pytest.raises(ValueError):
+        from_jalali(1404, 12, 30)
+
+
+async def test_only_clinic_admins_set_the_clinic_time_zone(client, auth_headers, admin_headers):
+    url = f"/api/v1/availability/clinics/{uuid.uuid4()}/timezone"
+    assert (await client.put(url, json={"timezone": "Asia/Tehran"})).status_code == 401
+    # A doctor's token, like any other without the clinic_admin role
+    assert (await client.put(url, json={"timezone": "Asia/Tehran"}, headers=auth_headers)).status_code == 403
+    assert (await client.get(url)).json()["timezone"] == "UTC"
+
+    assert (await client.put(url, json={"timezone": "Asia/Tehran"}, headers=admin_headers)).status_code == 200
+    assert (await client.get(url)).json()["timezone"] == "Asia/Tehran"
+
+
+async def test_bookings_are_checked_in_the_clinic_time_zone(client, doctor_id, auth_headers, admin_headers):
+    clinic_id = uuid.uuid4()
+    assert (await client.get(f"/api/v1/availability/clinics/{clinic_id}/timezone")).json()["timezone"] == "UTC"
+    r = await client.put(
+        f"/api/v1/availability/clinics/{clinic_id}/timezone", json={"timezone": "Mars/Olympus"}, headers=admin_headers
+    )
+    assert r.status_code == 422
+    r = await client.put(
+        f"/api/v1/availability/clinics/{clinic_id}/timezone", json={"timezone": "Asia/Tehran"}, headers=admin_headers
+    )
+    assert r.json() == {"clinic_id": str(clinic_id), "timezone": "Asia/Tehran"}
+
+    # Sunday 08:00-12:00 and Monday 00:00-02:00 Tehran time
+    rules = [
+        {"day_of_week": 0, "start_time": "08:00:00", "end_time": "12:00:00"},
+        {"day_of_week": 1, "start_time": "00:00:00", "end_time": "02:00:00"},
+    ]
+    r = await client.post("/api/v1/availability/", json={"rules": rules}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+
+    async def book(start: str, end: str):
+        booking = {
+            "patient_name": "Sara",
+            "patient_contact_details": "0912",
+            "doctor_id": str(doctor_id),
+            "clinic_id": str(clinic_id),
+            "start_time": start,
+            "end_time": end,
+        }
+        return await client.post("/api/v1/appointments/", json=booking, headers=auth_headers)
+
+    # 05:00Z is 08:30 in Tehran; 09:00Z is 12:30, after hours
+    assert (await book("2026-10-18T05:00:00Z", "2026-10-18T05:30:00Z")).status_code == 201
+    assert (await book("2026-10-18T09:00:00Z", "2026-10-18T09:30:00Z")).status_code == 409
+    # Naive times are clinic-local
+    r = await book("2026-10-18T10:00:00", "2026-10-18T10:30:00")
+    assert r.status_code == 201, r.text
+    assert r.json()["start_time"] == "2026-10-18T06:30:00Z"
+    # 00:30-01:30 Monday in Tehran crosses midnight in UTC but not on the clinic's calendar
+    assert (await book("2026-10-18T21:00:00Z", "2026-10-18T22:00:00Z")).status_code == 201
+
+    r = await client.get(
+        f"/api/v1/availability/doctors/{doctor_id}/slots",
+        params={
+            "from": "2026-10-18T00:00:00",
+            "to": "2026-10-18T10:00:00",
+            "duration": 30,
+            "clinic_id": str(clinic_id),
+        },
+    )
+    assert r.status_code == 200, r.text
+    assert [(slot["start_time"], slot["jalali_date"]) for slot in r.json()] == [
+        ("2026-10-18T08:00:00+03:30", "1405/07/26"),
+        ("2026-10-18T09:00:00+03:30", "1405/07/26"),
+        ("2026-10-18T09:30:00+03:30", "1405/07/26"),
+    ]
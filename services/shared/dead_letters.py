@@ -0,0 +1,184 @@
+"""Delayed retries and dead letters for ``yakhteh_events`` consumer groups.
+
+Events whose handler fails are moved from the stream to a per-group sorted set
+(``yakhteh_events:retry:<group>``) scored by when they are due again, with
+exponential backoff between attempts. Once ``max_attempts`` is exhausted, or
+straight away for payloads that cannot be parsed, they go to a per-group
+dead-letter stream (``yakhteh_events:dead:<group>``) together with the reason.
+
+Dead letters can be inspected and replayed into the group's retry queue::
+
+    python -m shared.dead_letters list clinic_service
+    python -m shared.dead_letters replay clinic_service            # everything
+    python -m shared.dead_letters replay clinic_service 1712-0 ... # selected entries
+
+Replaying only affects the given group; other groups never see the event again.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from redis.asyncio.client import Pipeline
+
+from .messaging import PAYLOAD_FIELD, STREAM, close_redis, get_redis, init_redis
+
+DEAD_LETTER_MAXLEN = 100_000
+
+# Atomically lease due retries: push their score past the lease so another
+# replica does not pick them up while they are being handled. A crashed
+# consumer's lease simply expires and the retry becomes due again.
+_CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], ARGV[3], member)
+end
+return due
+"""
+
+
+def retry_key(group: str) -> str:
+    return f"{STREAM}:retry:{group}"
+
+
+def dead_letter_stream(group: str) -> str:
+    return f"{STREAM}:dead:{group}"
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Exponential backoff with jitter for the given (1-based) attempt number."""
+    delay = min(max_s, base_s * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+@dataclass
+class RetryRecord:
+    payload: str
+    attempt: int
+    error: str
+    source_id: str
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {"payload": self.payload, "attempt": self.attempt, "error": self.error, "source_id": self.source_id},
+            sort_keys=True,
+        )
+
+    @classmethod
+    def loads(cls, raw: str) -> "RetryRecord":
+        data = json.loads(raw)
+        return cls(payload=data["payload"], attempt=data["attempt"], error=data["error"], source_id=data["source_id"])
+
+
+def schedule_retry(pipe: Pipeline, group: str, record: RetryRecord, delay_s: float) -> None:
+    pipe.zadd(retry_key(group), {record.dumps(): time.time() + delay_s})
+
+
+def add_dead_letter(pipe: Pipeline, group: str, *, payload: str, reason: str, attempts: int, source_id: str) -> None:
+    pipe.xadd(
+        dead_letter_stream(group),
+        {
+            PAYLOAD_FIELD: payload,
+            "reason": reason,
+            "attempts": str(attempts),
+            "source_id": source_id,
+            "failed_at": str(int(time.time())),
+        },
+        maxlen=DEAD_LETTER_MAXLEN,
+        approximate=True,
+    )
+
+
+async def claim_due_retries(group: str, *, count: int, lease_s: float) -> List[RetryRecord]:
+    now = time.time()
+    members = await get_redis().eval(_CLAIM_DUE_SCRIPT, 1, retry_key(group), now, count, now + lease_s)
+    return [RetryRecord.loads(member) for member in members]
+
+
+def finish_retry(pipe: Pipeline, group: str, record: RetryRecord) -> None:
+    pipe.zrem(retry_key(group), record.dumps())
+
+
+async def list_dead_letters(group: str, count: int = 100) -> List[Dict[str, Any]]:
+    entries = await get_redis().xrange(dead_letter_stream(group), count=count)
+    return [{"id": entry_id, **fields} for entry_id, fields in entries]
+
+
+async def replay_dead_letters(group: str, entry_ids: Optional[Sequence[str]] = None, *, batch_size: int = 500) -> int:
+    """Move dead letters back to the group's retry queue with a fresh attempt count.
+
+    Replays the given entries, or every dead letter when ``entry_ids`` is empty.
+    """
+    r = get_redis()
+    stream = dead_letter_stream(group)
+    replayed = 0
+    start = "-"
+    while True:
+        if entry_ids:
+            entries = []
+            for entry_id in entry_ids:
+                found = await r.xrange(stream, min=entry_id, max=entry_id)
+                entries.extend(found)
+        else:
+            entries = await r.xrange(stream, min=start, count=batch_size)
+        if not entries:
+            return replayed
+
+        async with r.pipeline(transaction=True) as pipe:
+            for entry_id, fields in entries:
+                record = RetryRecord(
+                    payload=fields.get(PAYLOAD_FIELD, ""),
+                    attempt=0,
+                    error=f"replayed: {fields.get('reason', '')}",
+                    source_id=fields.get("source_id", entry_id),
+                )
+                schedule_retry(pipe, group, record, 0)
+                pipe.xdel(stream, entry_id)
+            await pipe.execute()
+        replayed += len(entries)
+        if entry_ids:
+            return replayed
+        start = f"({entries[-1][0]}"
+
+
+async def _main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m shared.dead_letters", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://redis_cache:6379/0"))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = sub.add_parser("list", help="show dead letters of a consumer group")
+    list_cmd.add_argument("group")
+    list_cmd.add_argument("--count", type=int, default=100)
+
+    replay_cmd = sub.add_parser("replay", help="requeue dead letters for another round of retries")
+    replay_cmd.add_argument("group")
+    replay_cmd.add_argument("ids", nargs="*", help="dead-letter entry IDs (default: all)")
+
+    args = parser.parse_args(argv)
+    init_redis(args.redis_url)
+    try:
+        if args.command == "list":
+            for entry in await list_dead_letters(args.group, args.count):
+                try:
+                    event = json.loads(entry.get(PAYLOAD_FIELD, ""))
+                    summary = f"{event.get('event_type')} {event.get('event_id')}"
+                except (ValueError, AttributeError):
+                    summary = "<unparseable payload>"
+                print(
+                    f"{entry['id']}  attempts={entry.get('attempts')}  failed_at={entry.get('failed_at')}  "
+                    f"{summary}  reason={entry.get('reason')}"
+                )
+        else:
+            replayed = await replay_dead_letters(args.group, args.ids)
+            print(f"Replayed {replayed} dead letters into {retry_key(args.group)}")
+    finally:
+        await close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
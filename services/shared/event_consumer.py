@@ -0,0 +1,440 @@
+"""Consumer-group reader for the ``yakhteh_events`` stream.
+
+Every service reads the stream through its own consumer group, so each group
+sees every event once, and replicas of the same worker (same group, different
+consumer names) split the load between them. An entry is XACKed only after its
+handler returns; entries left pending by a crashed replica (or by a failed
+batch) are taken over with XAUTOCLAIM once they have been idle for
+``claim_idle_ms``.
+
+Entries are read in micro-batches: up to ``batch_size`` entries, waiting at most
+``batch_linger_ms`` for a partial batch to fill. Handlers receive every event of
+their type in the batch at once, so they can write it with a single statement,
+and up to ``concurrency`` batches are processed at the same time.
+
+Delivery is at-least-once, so after a batch succeeds the consumer records each
+``event_id`` under a per-group Redis key that expires after ``dedup_ttl_s``
+and skips events it finds recorded. That filter is only a fast path: handlers
+must still be idempotent (unique constraints with ``ON CONFLICT DO NOTHING``),
+because two replicas can handle the same event before either records it.
+
+Events whose handler fails are acknowledged and moved to a retry queue with
+exponential backoff; after ``max_attempts`` they land in the group's
+dead-letter stream, as do payloads that cannot be parsed (see
+``shared.dead_letters``). Due retries are handled by a task of their own that
+takes one of the ``concurrency`` slots, so a backlog of retries does not hold
+up reading new events.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Set, Tuple
+
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError, ResponseError
+
+from .dead_letters import (
+    RetryRecord,
+    add_dead_letter,
+    backoff_delay,
+    claim_due_retries,
+    finish_retry,
+    schedule_retry,
+)
+from .messaging import PAYLOAD_FIELD, STREAM, get_redis, parse_event
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[List[Any]], Awaitable[None]]
+StreamEntry = Tuple[str, Optional[Dict[str, str]]]
+
+DEDUP_KEY_PREFIX = "yakhteh:processed:"
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def entry_timestamp_ms(entry_id: str) -> int:
+    """Milliseconds part of a stream entry ID, i.e. when the event was published."""
+    return int(entry_id.split("-", 1)[0])
+
+
+class ConsumerMetrics:
+    """Throughput and lag counters, logged every ``interval_s`` seconds."""
+
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self.handled = 0
+        self.failed_batches = 0
+        self.duplicates = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.lag_ms = 0
+        self._window_handled = 0
+        self._window_started = time.monotonic()
+
+    def record(self, handled: int, last_entry_id: str) -> None:
+        self.handled += handled
+        self._window_handled += handled
+        self.lag_ms = max(0, int(time.time() * 1000) - entry_timestamp_ms(last_entry_id))
+
+    def events_per_second(self) -> float:
+        elapsed = time.monotonic() - self._window_started
+        return self._window_handled / elapsed if elapsed > 0 else 0.0
+
+    def maybe_log(self, group: str) -> None:
+        if time.monotonic() - self._window_started < self.interval_s:
+            return
+        logger.info(
+            f"{group}: {self.events_per_second():.1f} events/s, lag {self.lag_ms} ms, "
+            f"{self.handled} handled, {self.duplicates} duplicates skipped, {self.retried} retries scheduled, "
+            f"{self.dead_lettered} dead-lettered, {self.failed_batches} failed batches"
+        )
+        self._window_handled = 0
+        self._window_started = time.monotonic()
+
+
+class StreamConsumer:
+    def __init__(
+        self,
+        group: str,
+        handlers: Dict[str, BatchHandler],
+        *,
+        consumer_name: Optional[str] = None,
+        batch_size: int = 100,
+        batch_linger_ms: int = 50,
+        concurrency: int = 4,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60_000,
+        claim_interval_s: float = 30.0,
+        stats_interval_s: float = 30.0,
+        dedup_ttl_s: int = 86_400,
+        max_attempts: int = 5,
+        retry_base_delay_s: float = 1.0,
+        retry_max_delay_s: float = 300.0,
+        retry_poll_interval_s: float = 1.0,
+    ) -> None:
+        self.group = group
+        self.handlers = handlers
+        self.consumer_name = consumer_name or default_consumer_name()
+        self.batch_size = batch_size
+        self.batch_linger_ms = batch_linger_ms
+        self.concurrency = concurrency
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval_s = claim_interval_s
+        self.dedup_ttl_s = dedup_ttl_s
+        self.max_attempts = max_attempts
+        self.retry_base_delay_s = retry_base_delay_s
+        self.retry_max_delay_s = retry_max_delay_s
+        self.retry_poll_interval_s = retry_poll_interval_s
+        self.metrics = ConsumerMetrics(stats_interval_s)
+        self._next_claim_at = 0.0
+        self._next_retry_at = 0.0
+        self._retry_task: Optional[asyncio.Task] = None
+
+    async def ensure_group(self) -> None:
+        try:
+            # id="0" so a newly created group also picks up events published before it existed
+            await get_redis().xgroup_create(STREAM, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self) -> None:
+        await self.ensure_group()
+        logger.info(
+            f"Consuming {STREAM} as {self.group}/{self.consumer_name} "
+            f"(batch_size={self.batch_size}, concurrency={self.concurrency})"
+        )
+        await self._drain_own_pending()
+
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight: Set[asyncio.Task] = set()
+
+        def start(coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+            # The caller has acquired a slot; the task gives it back when done
+            task = asyncio.create_task(coro)
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _t: slots.release())
+            return task
+
+        try:
+            while True:
+                await slots.acquire()
+                if self._retries_due():
+                    self._retry_task = start(self._process_retries_safely())
+                    continue
+                try:
+                    entries = await self._next_batch()
+                except RedisError as e:
+                    # Keep the worker alive through Redis restarts and network blips
+                    slots.release()
+                    logger.warning(f"{self.group}: reading the stream failed, retrying: {e}")
+                    await asyncio.sleep(1.0)
+                    continue
+                except BaseException:
+                    slots.release()
+                    raise
+                if not entries:
+                    slots.release()
+                    self.metrics.maybe_log(self.group)
+                    continue
+                start(self._handle_batch_safely(entries))
+        finally:
+            # Let batches already read finish so they get acknowledged
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def poll_once(self) -> int:
+        """Read and handle one batch inline; returns the number of entries handled."""
+        entries = await self._next_batch()
+        if entries:
+            await self.handle_batch(entries)
+        return len(entries)
+
+    def _retries_due(self) -> bool:
+        # At most one retry task at a time, so retries never take more than one slot
+        if self._retry_task is not None and not self._retry_task.done():
+            return False
+        if time.monotonic() < self._next_retry_at:
+            return False
+        self._next_retry_at = time.monotonic() + self.retry_poll_interval_s
+        return True
+
+    async def _process_retries_safely(self) -> None:
+        try:
+            if await self.process_due_retries() >= self.batch_size:
+                # More may be due; check again on the next loop
+                self._next_retry_at = 0.0
+        except Exception:
+            # The leases expire and the retries become due again
+            logger.exception(f"{self.group}: processing due retries failed")
+        self.metrics.maybe_log(self.group)
+
+    async def _next_batch(self) -> List[StreamEntry]:
+        if time.monotonic() >= self._next_claim_at:
+            self._next_claim_at = time.monotonic() + self.claim_interval_s
+            stale = await self._claim_stale()
+            if stale:
+                return stale
+        return await self._read_new()
+
+    async def _read_new(self) -> List[StreamEntry]:
+        r = get_redis()
+        response = await r.xreadgroup(
+            self.group, self.consumer_name, {STREAM: ">"}, count=self.batch_size, block=self.block_ms
+        )
+        entries: List[StreamEntry] = response[0][1] if response else []
+        if not entries:
+            return entries
+
+        # Top up a partial batch until it is full or the linger time has passed
+        deadline = time.monotonic() + self.batch_linger_ms / 1000
+        while len(entries) < self.batch_size:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            response = await r.xreadgroup(
+                self.group,
+                self.consumer_name,
+                {STREAM: ">"},
+                count=self.batch_size - len(entries),
+                block=remaining_ms,
+            )
+            if not response:
+                break
+            entries.extend(response[0][1])
+        return entries
+
+    async def _claim_stale(self) -> List[StreamEntry]:
+        # Take over up to one batch of entries other consumers left pending too long
+        result = await get_redis().xautoclaim(
+            STREAM, self.group, self.consumer_name, self.claim_idle_ms, start_id="0-0", count=self.batch_size
+        )
+        # Redis >= 7 appends a list of deleted IDs
+        entries: List[StreamEntry] = result[1]
+        if entries:
+            logger.info(f"Reclaimed {len(entries)} stale entries for {self.group}")
+            # More may be waiting; check again on the next read
+            self._next_claim_at = 0.0
+        return entries
+
+    async def _drain_own_pending(self) -> None:
+        # Entries delivered to this consumer name before a restart but never acknowledged
+        while True:
+            response = await get_redis().xreadgroup(
+                self.group, self.consumer_name, {STREAM: "0"}, count=self.batch_size
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                return
+            await self.handle_batch(entries)
+
+    async def _handle_batch_safely(self, entries: List[StreamEntry]) -> None:
+        try:
+            await self.handle_batch(entries)
+        except Exception:
+            # Redis failed mid-batch; XAUTOCLAIM hands the entries out again after claim_idle_ms
+            self.metrics.failed_batches += 1
+            logger.exception(f"{self.group}: batch of {len(entries)} entries failed")
+        self.metrics.maybe_log(self.group)
+
+    def _dedup_key(self, event_id: str) -> str:
+        return f"{DEDUP_KEY_PREFIX}{self.group}:{event_id}"
+
+    async def _dispatch(self, events: List[Any]) -> Dict[str, str]:
+        """Run the handlers; returns ``{event_id: error}`` for the events that failed.
+
+        When a handler fails on a batch, its events are retried one at a time so a
+        single bad event does not send the whole batch to the retry queue.
+        """
+        by_type: Dict[str, List[Any]] = defaultdict(list)
+        for event in events:
+            by_type[event.event_type].append(event)
+
+        failed: Dict[str, str] = {}
+        for event_type, typed_events in by_type.items():
+            handler = self.handlers.get(event_type)
+            if handler is None:
+                continue
+            try:
+                await handler(typed_events)
+                continue
+            except Exception as e:
+                if len(typed_events) == 1:
+                    failed[typed_events[0].event_id] = repr(e)
+                    continue
+                logger.warning(f"{self.group}: {event_type} batch of {len(typed_events)} failed ({e!r}), isolating")
+            for event in typed_events:
+                try:
+                    await handler([event])
+                except Exception as e:
+                    failed[event.event_id] = repr(e)
+        return failed
+
+    async def handle_batch(self, entries: List[StreamEntry]) -> None:
+        """Handle a batch of stream entries and XACK all of them in one call.
+
+        Events whose handler fails are moved to the retry queue and malformed
+        payloads to the dead-letter stream in the same transaction as the XACK.
+        """
+        events: List[Any] = []
+        sources: Dict[str, Tuple[str, str]] = {}
+        malformed: List[Tuple[str, str, str]] = []
+        for entry_id, fields in entries:
+            if not fields:
+                # Entry was trimmed from the stream while pending
+                continue
+            raw = fields.get(PAYLOAD_FIELD, "")
+            try:
+                event = parse_event(raw)
+            except ValueError as e:
+                logger.warning(f"Dead-lettering malformed event {entry_id}: {e}")
+                malformed.append((entry_id, raw, str(e)))
+                continue
+            if event.event_id in sources:
+                self.metrics.duplicates += 1
+                continue
+            sources[event.event_id] = (entry_id, raw)
+            events.append(event)
+
+        r = get_redis()
+        if events:
+            processed = await r.mget([self._dedup_key(event.event_id) for event in events])
+            fresh = [event for event, done in zip(events, processed) if done is None]
+            self.metrics.duplicates += len(events) - len(fresh)
+        else:
+            fresh = []
+
+        failed = await self._dispatch(fresh)
+
+        async with r.pipeline(transaction=True) as pipe:
+            for event in fresh:
+                entry_id, raw = sources[event.event_id]
+                if event.event_id in failed:
+                    record = RetryRecord(payload=raw, attempt=1, error=failed[event.event_id], source_id=entry_id)
+                    self._schedule_or_bury(pipe, record)
+                else:
+                    pipe.set(self._dedup_key(event.event_id), "1", ex=self.dedup_ttl_s)
+            for entry_id, raw, reason in malformed:
+                add_dead_letter(pipe, self.group, payload=raw, reason=f"malformed: {reason}", attempts=0, source_id=entry_id)
+                self.metrics.dead_lettered += 1
+            pipe.xack(STREAM, self.group, *[entry_id for entry_id, _ in entries])
+            await pipe.execute()
+        self.metrics.record(len(entries), entries[-1][0])
+
+    def _schedule_or_bury(self, pipe: Pipeline, record: RetryRecord) -> None:
+        if record.attempt >= self.max_attempts:
+            logger.error(f"{self.group}: giving up on {record.source_id} after {record.attempt} attempts: {record.error}")
+            add_dead_letter(
+                pipe,
+                self.group,
+                payload=record.payload,
+                reason=record.error,
+                attempts=record.attempt,
+                source_id=record.source_id,
+            )
+            self.metrics.dead_lettered += 1
+        else:
+            delay = backoff_delay(record.attempt, self.retry_base_delay_s, self.retry_max_delay_s)
+            logger.warning(
+                f"{self.group}: attempt {record.attempt} for {record.source_id} failed, retrying in {delay:.1f}s: "
+                f"{record.error}"
+            )
+            schedule_retry(pipe, self.group, record, delay)
+            self.metrics.retried += 1
+
+    async def process_due_retries(self) -> int:
+        """Handle retries whose backoff has elapsed; returns how many were claimed."""
+        records = await claim_due_retries(self.group, count=self.batch_size, lease_s=self.claim_idle_ms / 1000)
+        if not records:
+            return 0
+
+        events: List[Any] = []
+        by_event_id: Dict[str, RetryRecord] = {}
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for record in records:
+                try:
+                    event = parse_event(record.payload)
+                except ValueError as e:
+                    finish_retry(pipe, self.group, record)
+                    add_dead_letter(
+                        pipe,
+                        self.group,
+                        payload=record.payload,
+                        reason=f"malformed: {e}",
+                        attempts=record.attempt,
+                        source_id=record.source_id,
+                    )
+                    self.metrics.dead_lettered += 1
+                    continue
+                by_event_id[event.event_id] = record
+                events.append(event)
+            await pipe.execute()
+
+        failed = await self._dispatch(events)
+
+        async with get_redis().pipeline(transaction=True) as pipe:
+            for event in events:
+                record = by_event_id[event.event_id]
+                finish_retry(pipe, self.group, record)
+                if event.event_id in failed:
+                    next_record = RetryRecord(
+                        payload=record.payload,
+                        attempt=record.attempt + 1,
+                        error=failed[event.event_id],
+                        source_id=record.source_id,
+                    )
+                    self._schedule_or_bury(pipe, next_record)
+                else:
+                    pipe.set(self._dedup_key(event.event_id), "1", ex=self.dedup_ttl_s)
+            await pipe.execute()
+        self.metrics.handled += len(records)
+        return len(records)
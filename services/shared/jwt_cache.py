@@ -0,0 +1,137 @@
+"""Cached JWT verification shared by all services."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
+
+# (claims, error, expires_at) - exactly one of claims/error is set
+_Entry = Tuple[Optional[Dict[str, Any]], Optional[JWTError], float]
+
+
+class TokenCache:
+    """Size-bounded LRU of verification results keyed by token digest.
+
+    Accepted tokens are kept until their ``exp`` claim (capped at ``max_ttl``);
+    rejected tokens are kept for ``negative_ttl`` seconds so replaying a bad or
+    expired token does not cost a signature check every time.
+    """
+
+    def __init__(self, maxsize: int = 10_000, negative_ttl: float = 30.0, max_ttl: float = 3600.0) -> None:
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[JWTError]]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, error, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if error is not None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return claims, error
+
+    def put_claims(self, key: bytes, claims: Dict[str, Any], expires_at: float) -> None:
+        self._put(key, (claims, None, min(expires_at, time.time() + self.max_ttl)))
+
+    def put_error(self, key: bytes, error: JWTError) -> None:
+        self._put(key, (None, error, time.time() + self.negative_ttl))
+
+    def _put(self, key: bytes, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class CachedJWTDecoder:
+    """``jwt.decode`` with a ``TokenCache`` in front of it.
+
+    Raises the same ``jose`` exceptions as ``jwt.decode``, including for cached
+    rejections, so callers can keep their existing error mapping.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, cache: Optional[TokenCache] = None) -> None:
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.cache = cache if cache is not None else TokenCache()
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            claims, error = cached
+            if error is not None:
+                raise type(error)(*error.args)
+            return dict(claims)  # type: ignore[arg-type]
+
+        try:
+            claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError as e:
+            self.cache.put_error(key, e)
+            raise
+
+        exp = claims.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else time.time() + self.cache.max_ttl
+        self.cache.put_claims(key, claims, expires_at)
+        return dict(claims)
+
+
+def decoder_from_settings(settings: Any) -> CachedJWTDecoder:
+    """The decoder for a service's settings (``secret_key``, ``algorithm`` and the ``jwt_*`` cache options)."""
+    return CachedJWTDecoder(
+        settings.secret_key,
+        settings.algorithm,
+        TokenCache(maxsize=settings.jwt_cache_size, negative_ttl=settings.jwt_negative_cache_ttl_seconds),
+    )
+
+
+def build_current_user_dependency(decoder: CachedJWTDecoder, oauth2_scheme: Callable[..., Any]) -> Callable[..., Any]:
+    """Create the ``get_current_user_payload`` FastAPI dependency for a service."""
+
+    async def get_current_user_payload(token: str = Depends(oauth2_scheme)) -> dict:
+        try:
+            return decoder.decode(token)
+        except ExpiredSignatureError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    return get_current_user_payload
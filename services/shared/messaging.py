@@ -0,0 +1,114 @@
+"""Event messaging over Redis shared by all services.
+
+Each process owns one pooled Redis client: call ``init_redis`` at startup (FastAPI
+lifespan or worker entrypoint) and ``close_redis`` on shutdown, and use
+``get_redis`` everywhere else instead of creating clients per call.
+
+Events are appended to the ``yakhteh_events`` Redis Stream, so they survive
+consumer restarts; see ``shared.event_consumer`` for the consumer-group side.
+Every event carries an ``event_id``; an event derived from another one should
+use ``derived_event_id`` so that replaying the source yields the same ID.
+"""
+
+import uuid
+from typing import Annotated, Final, Iterable, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from redis.asyncio import ConnectionPool, Redis
+
+STREAM: Final[str] = "yakhteh_events"
+# Approximate cap on retained stream entries (XADD MAXLEN ~)
+STREAM_MAXLEN: Final[int] = 100_000
+PAYLOAD_FIELD: Final[str] = "payload"
+
+_redis: Optional[Redis] = None
+
+
+class BaseEvent(BaseModel):
+    # Stable across redeliveries; consumers use it to skip events they already handled
+    event_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+
+
+class UserCreatedEvent(BaseEvent):
+    event_type: Literal["USER_CREATED"] = "USER_CREATED"
+    # Validated here so a malformed ID is dead-lettered by parse_event, not dropped by a handler
+    user_id: uuid.UUID
+    user_email: str
+    workspace_name: str
+
+
+class WorkspaceCreatedEvent(BaseEvent):
+    event_type: Literal["WORKSPACE_CREATED"] = "WORKSPACE_CREATED"
+    clinic_id: str
+    user_id: str
+
+
+Event = Annotated[Union[UserCreatedEvent, WorkspaceCreatedEvent], Field(discriminator="event_type")]
+
+_event_adapter: TypeAdapter[Event] = TypeAdapter(Event)
+
+
+def init_redis(
+    redis_url: str,
+    *,
+    max_connections: int = 50,
+    socket_connect_timeout: float = 2.0,
+    socket_timeout: Optional[float] = None,
+) -> Redis:
+    """Create the process-wide pooled Redis client (idempotent).
+
+    ``socket_timeout`` bounds every command; leave it unset in processes that
+    block on stream reads, or set it above their ``block`` time.
+    """
+    global _redis
+    if _redis is None:
+        pool = ConnectionPool.from_url(
+            redis_url,
+            decode_responses=True,
+            max_connections=max_connections,
+            socket_connect_timeout=socket_connect_timeout,
+            socket_timeout=socket_timeout,
+        )
+        _redis = Redis(connection_pool=pool)
+    return _redis
+
+
+def get_redis() -> Redis:
+    if _redis is None:
+        raise RuntimeError("Redis is not initialised; call init_redis() at startup")
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose(close_connection_pool=True)
+        _redis = None
+
+
+def derived_event_id(event_type: str, source_id: Union[str, uuid.UUID]) -> str:
+    """Deterministic event ID for an event emitted as a consequence of ``source_id``."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"yakhteh:{event_type}:{source_id}"))
+
+
+def parse_event(raw: Union[str, bytes]) -> Event:
+    """Decode a published event, raising ``ValueError`` for malformed or unknown payloads."""
+    try:
+        return _event_adapter.validate_json(raw)
+    except ValidationError as e:
+        raise ValueError(f"Invalid event payload: {e}") from e
+
+
+async def publish(event: Event) -> str:
+    """Append an event to the stream and return its entry ID."""
+    return await get_redis().xadd(
+        STREAM, {PAYLOAD_FIELD: event.model_dump_json()}, maxlen=STREAM_MAXLEN, approximate=True
+    )
+
+
+async def publish_many(events: Iterable[Event]) -> list[str]:
+    """Append several events in one round-trip."""
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for event in events:
+            pipe.xadd(STREAM, {PAYLOAD_FIELD: event.model_dump_json()}, maxlen=STREAM_MAXLEN, approximate=True)
+        return await pipe.execute()
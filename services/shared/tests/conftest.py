@@ -0,0 +1,15 @@
+import pytest
+
+from shared.base_config import BaseServiceSettings
+
+
+@pytest.fixture()
+def anyio_backend() -> str:
+    """Force pytest-anyio to use asyncio backend only."""
+    return "asyncio"
+
+
+@pytest.fixture()
+def redis_url() -> str:
+    # REDIS_URL from the environment, as in the services
+    return BaseServiceSettings().redis_url
@@ -0,0 +1,242 @@
+import asyncio
+import time
+import uuid
+from typing import Any, List, Optional, Set
+
+import pytest
+
+from shared.dead_letters import (
+    RetryRecord,
+    backoff_delay,
+    claim_due_retries,
+    dead_letter_stream,
+    list_dead_letters,
+    replay_dead_letters,
+    retry_key,
+    schedule_retry,
+)
+from shared.event_consumer import DEDUP_KEY_PREFIX, StreamConsumer
+from shared.messaging import PAYLOAD_FIELD, STREAM, UserCreatedEvent, close_redis, get_redis, init_redis, publish
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Recorder:
+    """USER_CREATED handler that records events and fails the first ``fail_times`` calls per event.
+
+    With ``only`` set, just those event IDs fail; with ``gate`` set, calls
+    after an event's first one wait for it.
+    """
+
+    def __init__(
+        self, fail_times: int = 0, *, only: Optional[Set[str]] = None, gate: Optional[asyncio.Event] = None
+    ) -> None:
+        self.fail_times = fail_times
+        self.only = only
+        self.gate = gate
+        self.calls: dict[str, int] = {}
+        self.handled: List[str] = []
+
+    async def __call__(self, events: List[Any]) -> None:
+        for event in events:
+            self.calls[event.event_id] = self.calls.get(event.event_id, 0) + 1
+        if self.gate is not None and any(self.calls[e.event_id] > 1 for e in events):
+            # Hold retries until the test lets them through
+            await self.gate.wait()
+        if any(self.calls[e.event_id] <= self._budget(e.event_id) for e in events):
+            raise RuntimeError("handler failed")
+        self.handled.extend(event.event_id for event in events)
+
+    def _budget(self, event_id: str) -> int:
+        return self.fail_times if self.only is None or event_id in self.only else 0
+
+
+def _event() -> UserCreatedEvent:
+    return UserCreatedEvent(user_id=uuid.uuid4(), user_email="a@example.com", workspace_name="Clinic")
+
+
+def _consumer(group: str, handler: Recorder, **kwargs) -> StreamConsumer:
+    options = dict(block_ms=100, batch_linger_ms=0, retry_base_delay_s=0.0, retry_max_delay_s=0.0)
+    options.update(kwargs)
+    return StreamConsumer(group, {"USER_CREATED": handler}, consumer_name="test", **options)
+
+
+@pytest.fixture()
+async def group(redis_url):
+    r = init_redis(redis_url)
+    name = f"test-consumer-{uuid.uuid4().hex[:8]}"
+    # Start at the end of the shared stream instead of replaying its history
+    await r.xgroup_create(STREAM, name, id="$", mkstream=True)
+    try:
+        yield name
+    finally:
+        await r.xgroup_destroy(STREAM, name)
+        await r.delete(retry_key(name), dead_letter_stream(name))
+        async for key in r.scan_iter(f"{DEDUP_KEY_PREFIX}{name}:*"):
+            await r.delete(key)
+        await close_redis()
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    for attempt, full in [(1, 1.0), (2, 2.0), (3, 4.0), (10, 30.0)]:
+        delay = backoff_delay(attempt, 1.0, 30.0)
+        assert full * 0.5 <= delay <= full
+
+
+async def test_batch_is_handled_once_and_duplicates_are_skipped(group):
+    handler = Recorder()
+    consumer = _consumer(group, handler)
+    events = [_event() for _ in range(3)]
+    for event in events:
+        await publish(event)
+    # The same event published again, e.g. by a relay that crashed before clearing its outbox
+    await publish(events[0])
+
+    assert await consumer.poll_once() == 4
+    await publish(events[1])
+    assert await consumer.poll_once() == 1
+
+    assert sorted(handler.handled) == sorted(event.event_id for event in events)
+    assert consumer.metrics.duplicates == 2
+    assert (await get_redis().xpending(STREAM, group))["pending"] == 0
+
+
+async def test_failed_event_is_retried_after_backoff(group):
+    ok, failing = _event(), _event()
+    # Fails in the batch and again when isolated, then succeeds on the retry
+    handler = Recorder(fail_times=2, only={failing.event_id})
+    consumer = _consumer(group, handler)
+    await publish(ok)
+    await publish(failing)
+
+    assert await consumer.poll_once() == 2
+    # The batch was isolated: ``ok`` went through, ``failing`` is queued for a retry
+    assert handler.handled == [ok.event_id]
+    assert await get_redis().zcard(retry_key(group)) == 1
+
+    assert await consumer.process_due_retries() == 1
+    assert handler.handled == [ok.event_id, failing.event_id]
+    assert await get_redis().zcard(retry_key(group)) == 0
+    assert await get_redis().exists(f"{DEDUP_KEY_PREFIX}{group}:{failing.event_id}")
+
+
+async def test_retry_waits_for_its_backoff(group):
+    consumer = _consumer(group, Recorder(fail_times=1), retry_base_delay_s=60.0, retry_max_delay_s=60.0)
+    await publish(_event())
+    await consumer.poll_once()
+
+    [(_, due_at)] = await get_redis().zrange(retry_key(group), 0, -1, withscores=True)
+    assert due_at >= time.time() + 29
+    assert await consumer.process_due_retries() == 0
+
+
+async def test_event_is_dead_lettered_after_max_attempts_and_can_be_replayed(group):
+    handler = Recorder(fail_times=3)
+    consumer = _consumer(group, handler, max_attempts=3)
+    event = _event()
+    await publish(event)
+
+    await consumer.poll_once()
+    assert await consumer.process_due_retries() == 1
+    assert await consumer.process_due_retries() == 1
+    assert handler.calls[event.event_id] == 3
+    assert await get_redis().zcard(retry_key(group)) == 0
+
+    [dead] = await list_dead_letters(group)
+    assert dead["attempts"] == "3"
+    assert "handler failed" in dead["reason"]
+    assert UserCreatedEvent.model_validate_json(dead[PAYLOAD_FIELD]).event_id == event.event_id
+
+    # Replay starts a fresh round of attempts; the handler succeeds on its fourth call
+    assert await replay_dead_letters(group) == 1
+    assert await list_dead_letters(group) == []
+    assert await consumer.process_due_retries() == 1
+    assert handler.handled == [event.event_id]
+
+
+async def test_replay_only_touches_selected_entries(group):
+    consumer = _consumer(group, Recorder(fail_times=10), max_attempts=1)
+    await publish(_event())
+    await publish(_event())
+    await consumer.poll_once()
+    first, second = await list_dead_letters(group)
+
+    assert await replay_dead_letters(group, [second["id"]]) == 1
+    assert [entry["id"] for entry in await list_dead_letters(group)] == [first["id"]]
+    [record] = [RetryRecord.loads(m) for m in await get_redis().zrange(retry_key(group), 0, -1)]
+    assert record.attempt == 0
+    assert record.payload == second[PAYLOAD_FIELD]
+
+
+async def test_malformed_payload_is_dead_lettered_without_calling_handlers(group):
+    handler = Recorder()
+    consumer = _consumer(group, handler)
+    await get_redis().xadd(STREAM, {PAYLOAD_FIELD: "not json"})
+
+    assert await consumer.poll_once() == 1
+    assert handler.calls == {}
+    [dead] = await list_dead_letters(group)
+    assert dead[PAYLOAD_FIELD] == "not json"
+    assert dead["reason"].startswith("malformed")
+    assert dead["attempts"] == "0"
+
+
+async def test_event_with_an_invalid_user_id_is_dead_lettered(group):
+    handler = Recorder()
+    consumer = _consumer(group, handler)
+    payload = _event().model_dump_json().replace('"user_id":"', '"user_id":"not-a-uuid-')
+    await get_redis().xadd(STREAM, {PAYLOAD_FIELD: payload})
+
+    assert await consumer.poll_once() == 1
+    assert handler.calls == {}
+    [dead] = await list_dead_letters(group)
+    assert dead[PAYLOAD_FIELD] == payload
+    assert dead["reason"].startswith("malformed")
+
+
+async def test_retry_lease_hides_claimed_records_until_it_expires(group):
+    r = get_redis()
+    record = RetryRecord(payload="{}", attempt=1, error="boom", source_id="1-0")
+    async with r.pipeline(transaction=True) as pipe:
+        schedule_retry(pipe, group, record, 0)
+        await pipe.execute()
+
+    assert await claim_due_retries(group, count=10, lease_s=0.2) == [record]
+    # Another replica polling meanwhile does not get the leased record
+    assert await claim_due_retries(group, count=10, lease_s=0.2) == []
+
+    # The claiming replica died without finishing it: the lease runs out and the record is due again
+    await asyncio.sleep(0.3)
+    assert await claim_due_retries(group, count=10, lease_s=0.2) == [record]
+
+
+async def test_slow_retries_do_not_hold_up_new_events(group):
+    gate = asyncio.Event()
+    stuck = _event()
+    handler = Recorder(fail_times=1, only={stuck.event_id}, gate=gate)
+    consumer = _consumer(group, handler, concurrency=2, retry_poll_interval_s=0.05)
+    await publish(stuck)
+    await consumer.poll_once()
+    assert await get_redis().zcard(retry_key(group)) == 1
+
+    task = asyncio.create_task(consumer.run())
+    try:
+        # Wait until the retry is blocked inside its handler
+        while handler.calls.get(stuck.event_id, 0) < 2:
+            await asyncio.sleep(0.01)
+        fresh = _event()
+        await publish(fresh)
+        async with asyncio.timeout(5):
+            while fresh.event_id not in handler.handled:
+                await asyncio.sleep(0.01)
+        assert stuck.event_id not in handler.handled
+
+        gate.set()
+        async with asyncio.timeout(5):
+            while stuck.event_id not in handler.handled:
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task